@@ -2,6 +2,7 @@
 Optimizer routes - Proxy to optimizer services
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Dict, Any
 import httpx
@@ -61,10 +62,92 @@ async def get_optimization_results(optimization_id: str, limit: int = 100):
 
 @router.post("/genetic")
 async def run_genetic_optimization(request: dict):
-    """Run genetic algorithm optimization"""
-    async with httpx.AsyncClient(timeout=7200.0) as client:
+    """Queue genetic algorithm optimization"""
+    async with httpx.AsyncClient() as client:
         response = await client.post(
             f"{settings.ML_OPTIMIZER_URL}/api/v1/optimize/genetic",
             json=request
         )
         return response.json()
+
+
+@router.post("/bayesian")
+async def run_bayesian_optimization(request: dict):
+    """Queue Bayesian optimization"""
+    async with httpx.AsyncClient() as client:
+        response = await client.post(
+            f"{settings.ML_OPTIMIZER_URL}/api/v1/optimize/bayesian",
+            json=request
+        )
+        return response.json()
+
+
+@router.get("/ml/{optimization_id}/status")
+async def get_ml_optimization_status(optimization_id: str):
+    """Get ML optimization status and latest snapshot"""
+    async with httpx.AsyncClient() as client:
+        response = await client.get(
+            f"{settings.ML_OPTIMIZER_URL}/api/v1/optimize/{optimization_id}/status"
+        )
+        return response.json()
+
+
+@router.get("/ml/{optimization_id}/results")
+async def get_ml_optimization_results(optimization_id: str):
+    """Get ML optimization results"""
+    async with httpx.AsyncClient() as client:
+        response = await client.get(
+            f"{settings.ML_OPTIMIZER_URL}/api/v1/optimize/{optimization_id}/results"
+        )
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=response.json().get('detail'))
+        return response.json()
+
+
+@router.get("/ml/{optimization_id}/convergence")
+async def get_ml_optimization_convergence(optimization_id: str):
+    """Get per-generation convergence history of a genetic optimization"""
+    async with httpx.AsyncClient() as client:
+        response = await client.get(
+            f"{settings.ML_OPTIMIZER_URL}/api/v1/optimize/{optimization_id}/convergence"
+        )
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=response.json().get('detail'))
+        return response.json()
+
+
+@router.post("/ml/{optimization_id}/cancel")
+async def cancel_ml_optimization(optimization_id: str):
+    """Cancel an ML optimization"""
+    async with httpx.AsyncClient() as client:
+        response = await client.post(
+            f"{settings.ML_OPTIMIZER_URL}/api/v1/optimize/{optimization_id}/cancel"
+        )
+        return response.json()
+
+
+@router.post("/ml/{optimization_id}/resume")
+async def resume_ml_optimization(optimization_id: str):
+    """Resume a genetic optimization from its last checkpoint"""
+    async with httpx.AsyncClient() as client:
+        response = await client.post(
+            f"{settings.ML_OPTIMIZER_URL}/api/v1/optimize/{optimization_id}/resume"
+        )
+        if response.status_code != 202:
+            raise HTTPException(status_code=response.status_code, detail=response.json().get('detail'))
+        return response.json()
+
+
+@router.get("/ml/{optimization_id}/stream")
+async def stream_ml_optimization(optimization_id: str):
+    """Relay the ML optimizer's Server-Sent Events stream"""
+    async def relay():
+        async with httpx.AsyncClient(timeout=None) as client:
+            async with client.stream(
+                "GET",
+                f"{settings.ML_OPTIMIZER_URL}/api/v1/optimize/{optimization_id}/stream"
+            ) as response:
+                async for chunk in response.aiter_raw():
+                    yield chunk
+    
+    return StreamingResponse(relay(), media_type="text/event-stream")
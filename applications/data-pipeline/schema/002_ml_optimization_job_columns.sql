@@ -0,0 +1,14 @@
+-- ============================================
+-- Trading AI System - Database Schema
+-- Migration 002: ML optimizer job columns
+-- ============================================
+
+
+-- ml_optimization_jobs is created by the ml-optimizer service
+-- (Base.metadata.create_all), which never alters an existing table.
+-- Databases created before GA checkpoints and convergence telemetry
+-- need these columns added once; new databases get them from create_all.
+ALTER TABLE IF EXISTS ml_optimization_jobs
+    ADD COLUMN IF NOT EXISTS convergence JSONB,
+    ADD COLUMN IF NOT EXISTS checkpoint BYTEA,
+    ADD COLUMN IF NOT EXISTS checkpoint_generation INTEGER;
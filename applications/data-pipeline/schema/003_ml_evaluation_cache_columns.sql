@@ -0,0 +1,14 @@
+-- ============================================
+-- Trading AI System - Database Schema
+-- Migration 003: ML evaluation cache columns
+-- ============================================
+
+
+-- ml_evaluation_cache is created by the ml-optimizer service
+-- (Base.metadata.create_all), which never alters an existing table.
+-- Bayesian warm starts select cached results by strategy and evaluation
+-- path; rows stored before these columns existed keep NULLs and are
+-- never used as warm-start points.
+ALTER TABLE IF EXISTS ml_evaluation_cache
+    ADD COLUMN IF NOT EXISTS strategy_name VARCHAR(255),
+    ADD COLUMN IF NOT EXISTS evaluator VARCHAR(100);
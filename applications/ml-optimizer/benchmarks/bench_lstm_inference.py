@@ -0,0 +1,110 @@
+"""
+Benchmark - LSTM inference on Keras vs TFLite
+
+Trains one LSTMPredictor on a synthetic price series, then times multi-step
+forecasts and holdout evaluation for the Keras model and for each TFLite
+quantization. Accuracy is the holdout R2 and the largest deviation of
+single-window forecasts from the Keras model (batched forecasts always run
+on Keras). Run from the service directory:
+
+    python -m benchmarks.bench_lstm_inference --rows 5000 --epochs 5
+"""
+import argparse
+import time
+import numpy as np
+import pandas as pd
+
+
+from src.algorithms.lstm_predictor import LSTMPredictor, TFLITE_QUANTIZATIONS
+
+
+
+
+def make_frame(rows: int, seed: int = 42) -> pd.DataFrame:
+    """Random-walk close with volume and two smooth derived features"""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, rows)) + 5 * np.sin(np.arange(rows) / 50)
+    volume = rng.gamma(2.0, 50.0, rows)
+    
+    df = pd.DataFrame({'close': close, 'volume': volume})
+    df['ema_20'] = df['close'].ewm(span=20, adjust=False).mean()
+    df['rsi'] = 50 + 50 * np.tanh(df['close'].diff().fillna(0).rolling(14, min_periods=1).mean())
+    return df
+
+
+
+
+def timed(fn, repeat: int) -> float:
+    """Best wall time of `repeat` calls in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+
+
+def run(rows: int, epochs: int, steps: int, batch: int, repeat: int, threads: int):
+    """Print a latency / accuracy table"""
+    df = make_frame(rows)
+    
+    predictor = LSTMPredictor(sequence_length=60, features=['close', 'volume', 'rsi', 'ema_20'])
+    X_train, y_train, X_test, y_test = predictor.prepare_data(df, target_column='close')
+    predictor.build_model((predictor.sequence_length, len(predictor.features)))
+    predictor.train(X_train, y_train, X_test, y_test, epochs=epochs, batch_size=64)
+    
+    single = np.ascontiguousarray(X_test[-1:])
+    many = np.ascontiguousarray(X_test[-batch:])
+    
+    # Warm up the compiled forecast before timing
+    reference = predictor.forecast(many, steps)
+    
+    predictor.tflite_threads = threads
+    
+    print(
+        f"{'runtime':<16} {'size (KB)':>10} {'1 x ' + str(steps) + ' (ms)':>14} "
+        f"{str(batch) + ' x ' + str(steps) + ' (ms)':>14} {'eval (s)':>9} {'r2':>7} {'max dev':>8}"
+    )
+    
+    # Keras first, then the same weights exported at each precision
+    for quantization in [None] + TFLITE_QUANTIZATIONS:
+        if quantization is None:
+            name = 'keras'
+        else:
+            name = f'tflite-{quantization}'
+            predictor.export_tflite(quantization, representative=X_train)
+        
+        predictor.forecast(single, steps)
+        single_time = timed(lambda: predictor.forecast(single, steps), repeat)
+        batch_time = timed(lambda: predictor.forecast(many, steps), repeat)
+        
+        start = time.perf_counter()
+        metrics = predictor.evaluate(X_test, y_test)
+        eval_time = time.perf_counter() - start
+        
+        forecasts = np.concatenate([predictor.forecast(many[i:i + 1], steps) for i in range(len(many))])
+        deviation = np.abs(forecasts - reference).max()
+        exported = predictor.tflite_model
+        size = (len(exported) if exported is not None else predictor.memory_bytes()) / 1024
+        
+        print(
+            f"{name:<16} {size:>10.0f} {single_time * 1000:>14.1f} {batch_time * 1000:>14.1f} "
+            f"{eval_time:>9.2f} {metrics['r2']:>7.4f} {deviation:>8.4f}"
+        )
+
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--epochs", type=int, default=5)
+    parser.add_argument("--steps", type=int, default=30)
+    parser.add_argument("--batch", type=int, default=32, help="sequences forecast together")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--threads", type=int, default=2, help="TFLite interpreter threads")
+    args = parser.parse_args()
+    
+    run(args.rows, args.epochs, args.steps, args.batch, args.repeat, args.threads)
@@ -0,0 +1,96 @@
+"""
+Benchmark - Vectorized Pareto utilities vs DEAP
+
+Times NSGA-II selection (k = n / 2, as when parents + offspring are reduced
+to the next population) and Pareto-front maintenance for random fitness
+sets. Run from the service directory:
+
+    python -m benchmarks.bench_pareto --sizes 100 1000 10000 --objectives 3
+"""
+import argparse
+import time
+import numpy as np
+from deap import base, creator, tools
+
+
+from src.algorithms.pareto import ParetoArchive, select_nsga2
+
+
+
+
+def make_population(fitness: np.ndarray) -> list:
+    """DEAP individuals carrying the given fitness rows"""
+    if not hasattr(creator, "FitnessBench"):
+        creator.create("FitnessBench", base.Fitness, weights=(1.0,) * fitness.shape[1])
+        creator.create("IndividualBench", list, fitness=creator.FitnessBench)
+    
+    population = []
+    for i, values in enumerate(fitness):
+        ind = creator.IndividualBench([float(i)])
+        ind.fitness.values = tuple(values)
+        population.append(ind)
+    return population
+
+
+
+
+def timed(fn, repeat: int) -> float:
+    """Best wall time of `repeat` calls in seconds"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+
+
+def run(sizes, n_objectives: int, repeat: int, deap_limit: int):
+    """Print a timing table"""
+    rng = np.random.default_rng(42)
+    
+    print(f"{'n':>7} {'task':<10} {'deap (s)':>10} {'numpy (s)':>10} {'speedup':>8}")
+    
+    for n in sizes:
+        fitness = rng.random((n, n_objectives))
+        genomes = np.arange(n, dtype=np.float64)[:, None]
+        population = make_population(fitness)
+        batches = np.array_split(np.arange(n), max(1, n // 100))
+        
+        def deap_archive():
+            front = tools.ParetoFront()
+            for batch in batches:
+                front.update([population[i] for i in batch])
+        
+        def numpy_archive():
+            archive = ParetoArchive(1, n_objectives)
+            for batch in batches:
+                archive.update(genomes[batch], fitness[batch])
+        
+        tasks = [
+            ('select', lambda: tools.selNSGA2(population, n // 2), lambda: select_nsga2(fitness, n // 2)),
+            ('archive', deap_archive, numpy_archive)
+        ]
+        
+        for name, deap_fn, numpy_fn in tasks:
+            numpy_time = timed(numpy_fn, repeat)
+            
+            if n <= deap_limit:
+                deap_time = timed(deap_fn, 1 if n >= 10000 else repeat)
+                print(f"{n:>7} {name:<10} {deap_time:>10.4f} {numpy_time:>10.4f} {deap_time / numpy_time:>7.1f}x")
+            else:
+                print(f"{n:>7} {name:<10} {'skipped':>10} {numpy_time:>10.4f} {'':>8}")
+
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--objectives", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--deap-limit", type=int, default=10000, help="skip DEAP above this size")
+    args = parser.parse_args()
+    
+    run(args.sizes, args.objectives, args.repeat, args.deap_limit)
@@ -1,17 +1,21 @@
 """
 Bayesian Optimization implementation
 """
-from skopt import gp_minimize
-from skopt.space import Real, Integer
-from skopt.utils import use_named_args
+from skopt import Optimizer
+from skopt.space import Real, Integer, Space
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Any, Callable, Optional, Tuple
 import logging
 
 
 logger = logging.getLogger(__name__)
 
 
+# Objectives that are maximized (negated because skopt minimizes)
+MAXIMIZE_OBJECTIVES = ['net_profit', 'profit_factor', 'sharpe_ratio']
+
+
 
 
 class BayesianOptimizer:
@@ -19,7 +23,9 @@ class BayesianOptimizer:
     Bayesian optimization for efficient parameter search
     
     Uses Gaussian Process to model the objective function and
-    intelligently select next points to evaluate
+    intelligently select next points to evaluate. Points are proposed
+    in rounds of `batch_size` (ask/tell with a constant-liar strategy)
+    and each round is evaluated concurrently on a worker pool.
     """
     
     def __init__(
@@ -28,13 +34,27 @@ class BayesianOptimizer:
         objective: str,
         evaluation_function: Callable,
         n_initial_points: int = 10,
-        n_iterations: int = 50
+        n_iterations: int = 50,
+        cache: Optional[Any] = None,
+        batch_size: int = 1,
+        batch_strategy: str = "cl_min",
+        x0: Optional[List[List[Any]]] = None,
+        y0: Optional[List[float]] = None
     ):
+        if n_iterations < 0:
+            raise ValueError("n_iterations must not be negative")
+        
         self.parameters = parameters
         self.objective = objective
         self.evaluation_function = evaluation_function
         self.n_initial_points = n_initial_points
         self.n_iterations = n_iterations
+        self.cache = cache  # EvaluationCache shared with other evaluators
+        self.batch_size = max(1, batch_size)
+        self.batch_strategy = batch_strategy
+        self.x0 = x0 or []  # previously evaluated points, in parameter order
+        self.y0 = y0 or []  # their objective values as stored (not negated)
+        self.observations: List[Tuple[List[Any], float]] = []  # (point, value) of the last run
         
         self._setup_space()
     
@@ -51,56 +71,156 @@ class BayesianOptimizer:
             else:
                 self.space.append(Real(param['min'], param['max'], name=param['name']))
     
-    def optimize(self) -> Dict[str, Any]:
+    def _warm_start_points(self) -> Tuple[List[List[Any]], List[float]]:
         """
-        Run Bayesian optimization
+        Prepare prior evaluations for seeding the surrogate
+        
+        Points outside the search space are dropped and duplicates keep
+        their first value.
         
         Returns:
-            Dictionary with optimization results
+            Points and values in the optimizer's minimization convention
         """
-        logger.info(f"Starting Bayesian optimization: {self.n_iterations} iterations")
+        space = Space(self.space)
+        points, values, seen = [], [], set()
         
-        # Define objective function
-        @use_named_args(self.space)
-        def objective(**params):
-            # Evaluate
-            results = self.evaluation_function(params)
-            
-            # Get objective value (negate if maximizing)
-            value = results.get(self.objective, 0)
+        for x, y in zip(self.x0, self.y0):
+            point = [
+                int(round(v)) if param['type'] == 'int' else float(v)
+                for v, param in zip(x, self.parameters)
+            ]
             
-            # Bayesian optimization minimizes, so negate profit
-            if self.objective in ['net_profit', 'profit_factor', 'sharpe_ratio']:
-                value = -value
+            if tuple(point) in seen or point not in space or y is None or not np.isfinite(y):
+                continue
+            seen.add(tuple(point))
             
-            return value
+            points.append(point)
+            values.append(-float(y) if self.objective in MAXIMIZE_OBJECTIVES else float(y))
+        
+        return points, values
+    
+    def _objective(self, point: List[Any]) -> float:
+        """
+        Evaluate a single point proposed by the optimizer
+        
+        Args:
+            point: Parameter values in search-space order
+        
+        Returns:
+            Value to minimize
+        """
+        params = dict(zip(self.param_names, point))
+        
+        # Evaluate (memoized when a cache is attached)
+        if self.cache is not None:
+            results = self.cache.evaluate(params, self.evaluation_function)
+        else:
+            results = self.evaluation_function(params)
+        
+        # Get objective value (negate if maximizing)
+        value = results.get(self.objective, 0)
+        
+        # Bayesian optimization minimizes, so negate profit
+        if self.objective in MAXIMIZE_OBJECTIVES:
+            value = -value
         
-        # Run optimization
-        result = gp_minimize(
-            objective,
-            self.space,
-            n_calls=self.n_iterations,
+        return float(value)
+    
+    def _natural_value(self, value: float) -> float:
+        """Undo the negation applied to maximized objectives"""
+        return -value if self.objective in MAXIMIZE_OBJECTIVES else value
+    
+    def _best(self, points: List[List[Any]], values: List[float]) -> Tuple[Optional[Dict[str, Any]], Optional[float]]:
+        """Best of the given points (minimization convention) as parameters and natural value"""
+        if not points:
+            return None, None
+        
+        best = int(np.argmin(values))
+        return dict(zip(self.param_names, points[best])), self._natural_value(values[best])
+    
+    def optimize(self, progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        """
+        Run Bayesian optimization
+        
+        Warm-start points only inform the surrogate. The best point and the
+        convergence trace cover the points evaluated in this run, so with
+        `n_iterations=0` there is no best point (None).
+        
+        Args:
+            progress_callback: Called after each round with the best point so
+                far and the convergence trace; may raise to stop the run
+        
+        Returns:
+            Dictionary with optimization results
+        """
+        logger.info(
+            f"Starting Bayesian optimization: {self.n_iterations} iterations, "
+            f"{self.batch_size} points per round"
+        )
+        
+        optimizer = Optimizer(
+            dimensions=self.space,
+            base_estimator="GP",
             n_initial_points=self.n_initial_points,
-            random_state=42,
-            verbose=True
+            random_state=42
         )
         
-        # Extract best parameters
-        best_params = {
-            self.param_names[i]: result.x[i]
-            for i in range(len(self.param_names))
-        }
+        # Seed the surrogate with prior evaluations; they also count
+        # towards n_initial_points, so the budget goes to new points only
+        x0, y0 = self._warm_start_points()
+        if x0:
+            logger.info(f"Warm-starting from {len(x0)} prior evaluations")
+            optimizer.tell(x0, y0)
+        
+        # Points of this run and their values to minimize
+        points_seen: List[List[Any]] = []
+        values_seen: List[float] = []
+        
+        with ThreadPoolExecutor(max_workers=self.batch_size) as pool:
+            while len(points_seen) < self.n_iterations:
+                n_points = min(self.batch_size, self.n_iterations - len(points_seen))
+                
+                # Propose a round of points (constant liar keeps them apart)
+                if n_points > 1:
+                    points = optimizer.ask(n_points=n_points, strategy=self.batch_strategy)
+                else:
+                    points = [optimizer.ask()]
+                
+                # Evaluate the round concurrently and report back
+                values = list(pool.map(self._objective, points))
+                optimizer.tell(points, values)
+                
+                points_seen.extend(list(point) for point in points)
+                values_seen.extend(values)
+                
+                best_params, best_value = self._best(points_seen, values_seen)
+                logger.info(f"Evaluated {len(points_seen)}/{self.n_iterations} points, best: {best_value}")
+                
+                if progress_callback is not None:
+                    progress_callback({
+                        'evaluated': len(points_seen),
+                        'n_iterations': self.n_iterations,
+                        'best_parameters': best_params,
+                        'best_objective_value': best_value,
+                        'convergence_data': list(values_seen),
+                        'cache_stats': self.cache.stats() if self.cache is not None else None
+                    })
+        
+        # New evaluations of this run, in natural units (usable as x0/y0 later)
+        self.observations = [
+            (point, self._natural_value(value))
+            for point, value in zip(points_seen, values_seen)
+        ]
         
-        # Get best objective value (un-negate if needed)
-        best_value = result.fun
-        if self.objective in ['net_profit', 'profit_factor', 'sharpe_ratio']:
-            best_value = -best_value
+        best_params, best_value = self._best(points_seen, values_seen)
         
         logger.info(f"Optimization complete. Best {self.objective}: {best_value}")
         
         return {
             'best_parameters': best_params,
             'best_objective_value': best_value,
-            'iterations_completed': len(result.func_vals),
-            'convergence_data': result.func_vals.tolist()
+            'iterations_completed': len(points_seen),
+            'warm_start_points': len(x0),
+            'convergence_data': list(values_seen),
+            'cache_stats': self.cache.stats() if self.cache is not None else None
         }
@@ -0,0 +1,100 @@
+"""
+Genetic algorithm checkpoints - Compact serialization of generation state
+"""
+from typing import Dict, Any
+import io
+import json
+import numpy as np
+
+
+CHECKPOINT_VERSION = 4
+
+
+
+
+def dump_checkpoint(state: Dict[str, Any]) -> bytes:
+    """
+    Serialize generation state into a compressed .npz blob
+    
+    Genomes and fitnesses are stored as float64 matrices; everything else
+    (generation, names, convergence history, RNG scalars) goes into a JSON header, so
+    loading never needs pickle.
+    
+    Args:
+        state: Dictionary with generation, evaluations, parameters, objectives,
+            population, population_fitness, archive (ParetoArchive.state()), convergence,
+            python_rng (random.Random.getstate()) and numpy_rng
+            (np.random.Generator.bit_generator.state)
+    
+    Returns:
+        Checkpoint bytes
+    """
+    genomes, fitness, dominated_count, history_genomes, history = state['archive']
+    py_version, py_internal, py_gauss = state['python_rng']
+    
+    header = {
+        'version': CHECKPOINT_VERSION,
+        'generation': state['generation'],
+        'evaluations': state['evaluations'],
+        'parameters': state['parameters'],
+        'objectives': state['objectives'],
+        'convergence': state['convergence'],
+        'python_rng': [py_version, py_gauss],
+        'numpy_rng': state['numpy_rng']
+    }
+    
+    buffer = io.BytesIO()
+    np.savez_compressed(
+        buffer,
+        header=np.array(json.dumps(header)),
+        population=np.asarray(state['population'], dtype=np.float64),
+        population_fitness=np.asarray(state['population_fitness'], dtype=np.float64),
+        archive_genomes=np.asarray(genomes, dtype=np.float64),
+        archive_fitness=np.asarray(fitness, dtype=np.float64),
+        archive_dominated_count=np.asarray(dominated_count, dtype=np.int64),
+        history_genomes=np.asarray(history_genomes, dtype=np.float64),
+        history_fitness=np.asarray(history, dtype=np.float64),
+        python_rng=np.asarray(py_internal, dtype=np.uint32)
+    )
+    
+    return buffer.getvalue()
+
+
+
+
+def load_checkpoint(data: bytes) -> Dict[str, Any]:
+    """
+    Deserialize a checkpoint written by dump_checkpoint
+    
+    Args:
+        data: Checkpoint bytes
+    
+    Returns:
+        State dictionary in the same layout dump_checkpoint accepts
+    """
+    with np.load(io.BytesIO(data), allow_pickle=False) as arrays:
+        header = json.loads(str(arrays['header']))
+        
+        if header.get('version') != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version: {header.get('version')}")
+        
+        py_version, py_gauss = header['python_rng']
+        
+        return {
+            'generation': header['generation'],
+            'evaluations': header['evaluations'],
+            'parameters': header['parameters'],
+            'objectives': header['objectives'],
+            'convergence': header['convergence'],
+            'population': arrays['population'],
+            'population_fitness': arrays['population_fitness'],
+            'archive': (
+                arrays['archive_genomes'],
+                arrays['archive_fitness'],
+                arrays['archive_dominated_count'],
+                arrays['history_genomes'],
+                arrays['history_fitness']
+            ),
+            'python_rng': (py_version, tuple(int(v) for v in arrays['python_rng']), py_gauss),
+            'numpy_rng': header['numpy_rng']
+        }
@@ -0,0 +1,269 @@
+"""
+Convergence recorder - Compact per-generation telemetry for the genetic optimizer
+"""
+from typing import List, Dict, Any, Optional
+import time
+import numpy as np
+
+
+# Margin below the first generation's worst values for the hypervolume reference point
+REFERENCE_MARGIN = 0.1
+
+
+
+
+def hypervolume(points: np.ndarray, reference: np.ndarray) -> float:
+    """
+    Exact hypervolume dominated by points (maximization) relative to reference
+    
+    Two objectives use a vectorized sweep; more objectives slice along the
+    last one and recurse, which is fine for Pareto fronts of a few hundred
+    points.
+    
+    Args:
+        points: Array of shape (n, m), maximization convention
+        reference: Array of shape (m,), worse than every point of interest
+    
+    Returns:
+        Hypervolume (0 if no point improves on the reference)
+    """
+    # Work with gains over the reference; points not strictly better add nothing
+    points = np.asarray(points, dtype=np.float64)
+    gains = points - reference
+    gains = gains[(gains > 0).all(axis=1)]
+    if len(gains) == 0:
+        return 0.0
+    
+    return float(_hypervolume_gains(gains))
+
+
+
+
+def _hypervolume_gains(gains: np.ndarray) -> float:
+    """Volume of the union of boxes [0, gain] (all gains positive)"""
+    if gains.shape[1] == 1:
+        return gains[:, 0].max()
+    
+    if gains.shape[1] == 2:
+        # Sweep x from large to small, tracking the best y so far
+        order = np.argsort(-gains[:, 0], kind='stable')
+        x = gains[order, 0]
+        y = np.maximum.accumulate(gains[order, 1])
+        widths = x - np.append(x[1:], 0.0)
+        return float((widths * y).sum())
+    
+    # Slice along the last objective, largest first
+    order = np.argsort(-gains[:, -1], kind='stable')
+    gains = gains[order]
+    depths = gains[:, -1] - np.append(gains[1:, -1], 0.0)
+    
+    volume = 0.0
+    for i in range(len(gains)):
+        if depths[i] > 0:
+            volume += depths[i] * _hypervolume_gains(gains[:i + 1, :-1])
+    
+    return volume
+
+
+
+
+class ConvergenceRecorder:
+    """
+    Array-backed convergence history of a genetic optimization
+    
+    One row per generation: objective mean/std/min/max (natural units),
+    hypervolume of the Pareto archive, evaluations, wall time and cache hit
+    rate. Replaces DEAP's Logbook; `to_dict` is columnar and JSON-ready.
+    """
+    
+    def __init__(self, objectives: List[str], signs: np.ndarray, capacity: int = 64):
+        """
+        Args:
+            objectives: Objective names
+            signs: Per objective, 1 if the fitness is the natural value and
+                -1 if it was negated for maximization
+            capacity: Initial number of generations to allocate
+        """
+        self.objectives = list(objectives)
+        self.signs = np.asarray(signs, dtype=np.float64)
+        self.reference = None  # maximization convention, fixed at first record
+        
+        self._size = 0
+        self._allocate(capacity)
+        
+        self._start = time.perf_counter()
+        self._time_offset = 0.0
+        self._cache_lookups = 0
+        self._cache_hits = 0
+    
+    def _allocate(self, capacity: int):
+        m = len(self.objectives)
+        self.generation = np.zeros(capacity, dtype=np.int32)
+        self.evaluations = np.zeros(capacity, dtype=np.int64)
+        self.wall_time = np.zeros(capacity)
+        self.cache_hit_rate = np.full(capacity, np.nan)
+        self.hypervolume = np.zeros(capacity)
+        self.stats = {name: np.zeros((capacity, m)) for name in ('mean', 'std', 'min', 'max')}
+    
+    def _grow(self):
+        old = self.columns()
+        self._allocate(max(1, 2 * len(self.generation)))
+        self._load(old)
+    
+    def _load(self, columns: Dict[str, np.ndarray]):
+        n = len(columns['generation'])
+        self.generation[:n] = columns['generation']
+        self.evaluations[:n] = columns['evaluations']
+        self.wall_time[:n] = columns['wall_time']
+        self.cache_hit_rate[:n] = columns['cache_hit_rate']
+        self.hypervolume[:n] = columns['hypervolume']
+        for name in self.stats:
+            self.stats[name][:n] = columns[name]
+        self._size = n
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def record(
+        self,
+        generation: int,
+        population_fitness: np.ndarray,
+        front_fitness: np.ndarray,
+        evaluations: int,
+        cache_stats: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Record one generation
+        
+        Args:
+            generation: Generation number
+            population_fitness: Population fitness, maximization convention
+            front_fitness: Pareto archive fitness, maximization convention
+            evaluations: Evaluations performed in this generation
+            cache_stats: Cumulative EvaluationCache.stats(), if cached
+        
+        Returns:
+            The recorded row (see `latest`)
+        """
+        if self._size == len(self.generation):
+            self._grow()
+        
+        population_fitness = np.asarray(population_fitness, dtype=np.float64)
+        
+        if self.reference is None:
+            low = population_fitness.min(axis=0)
+            span = population_fitness.max(axis=0) - low
+            self.reference = low - REFERENCE_MARGIN * np.where(span > 0, span, 1.0)
+        
+        i = self._size
+        natural = population_fitness * self.signs
+        self.generation[i] = generation
+        self.evaluations[i] = evaluations
+        self.wall_time[i] = self._time_offset + time.perf_counter() - self._start
+        self.hypervolume[i] = hypervolume(front_fitness, self.reference)
+        self.stats['mean'][i] = natural.mean(axis=0)
+        self.stats['std'][i] = natural.std(axis=0)
+        self.stats['min'][i] = natural.min(axis=0)
+        self.stats['max'][i] = natural.max(axis=0)
+        
+        # Hit rate of this generation's lookups only
+        if cache_stats is not None:
+            hits = cache_stats['hits'] + cache_stats['persistent_hits']
+            lookups = cache_stats['lookups'] - self._cache_lookups
+            if lookups > 0:
+                self.cache_hit_rate[i] = (hits - self._cache_hits) / lookups
+            self._cache_lookups = cache_stats['lookups']
+            self._cache_hits = hits
+        
+        self._size += 1
+        
+        return self.latest()
+    
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Recorded rows as arrays"""
+        n = self._size
+        columns = {
+            'generation': self.generation[:n],
+            'evaluations': self.evaluations[:n],
+            'wall_time': self.wall_time[:n],
+            'cache_hit_rate': self.cache_hit_rate[:n],
+            'hypervolume': self.hypervolume[:n]
+        }
+        columns.update({name: values[:n] for name, values in self.stats.items()})
+        return columns
+    
+    def latest(self) -> Dict[str, Any]:
+        """Last recorded row"""
+        if self._size == 0:
+            return {}
+        
+        i = self._size - 1
+        rate = self.cache_hit_rate[i]
+        
+        return {
+            'generation': int(self.generation[i]),
+            'evaluations': int(self.evaluations[i]),
+            'total_evaluations': int(self.evaluations[:self._size].sum()),
+            'wall_time': round(float(self.wall_time[i]), 3),
+            'hypervolume': float(self.hypervolume[i]),
+            'cache_hit_rate': None if np.isnan(rate) else round(float(rate), 4),
+            'objectives': {
+                objective: {name: float(values[i, j]) for name, values in self.stats.items()}
+                for j, objective in enumerate(self.objectives)
+            }
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Columnar, JSON-ready history for storage and plotting"""
+        columns = self.columns()
+        
+        return {
+            'objectives': self.objectives,
+            'reference_point': None if self.reference is None else (self.reference * self.signs).tolist(),
+            'generation': columns['generation'].tolist(),
+            'evaluations': columns['evaluations'].tolist(),
+            'wall_time': np.round(columns['wall_time'], 3).tolist(),
+            'hypervolume': columns['hypervolume'].tolist(),
+            'cache_hit_rate': [
+                None if np.isnan(rate) else round(float(rate), 4)
+                for rate in columns['cache_hit_rate']
+            ],
+            'stats': {
+                objective: {name: columns[name][:, j].tolist() for name in self.stats}
+                for j, objective in enumerate(self.objectives)
+            }
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], signs: np.ndarray, capacity: int = 64) -> "ConvergenceRecorder":
+        """
+        Rebuild a recorder from `to_dict` output (used when resuming)
+        
+        Wall time continues from the last recorded value; per-generation cache
+        hit rates restart with the new run's cache.
+        """
+        recorder = cls(data['objectives'], signs, capacity=max(capacity, len(data['generation'])))
+        if data['reference_point'] is not None:
+            recorder.reference = np.asarray(data['reference_point']) * recorder.signs
+        
+        columns = {
+            'generation': np.asarray(data['generation']),
+            'evaluations': np.asarray(data['evaluations']),
+            'wall_time': np.asarray(data['wall_time'], dtype=np.float64),
+            'cache_hit_rate': np.array(
+                [np.nan if rate is None else rate for rate in data['cache_hit_rate']],
+                dtype=np.float64
+            ),
+            'hypervolume': np.asarray(data['hypervolume'], dtype=np.float64)
+        }
+        for name in ('mean', 'std', 'min', 'max'):
+            columns[name] = np.array(
+                [data['stats'][objective][name] for objective in recorder.objectives],
+                dtype=np.float64
+            ).T.reshape(len(columns['generation']), len(recorder.objectives))
+        
+        recorder._load(columns)
+        if len(recorder):
+            recorder._time_offset = float(columns['wall_time'][-1])
+        
+        return recorder
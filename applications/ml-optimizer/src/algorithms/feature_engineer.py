@@ -3,15 +3,45 @@ Feature engineering for trading data
 """
 import pandas as pd
 import numpy as np
-from typing import List, Dict, Any
-from sklearn.ensemble import RandomForestRegressor
+from typing import List, Dict, Any, Optional, Tuple, NamedTuple
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+from sklearn.ensemble import RandomForestRegressor, HistGradientBoostingRegressor
+from sklearn.inspection import permutation_importance
 from sklearn.preprocessing import StandardScaler
+import hashlib
 import logging
 
 
 logger = logging.getLogger(__name__)
 
 
+MA_PERIODS = [5, 10, 20, 50, 200]
+
+# EMA spans applied to close (moving averages and MACD legs)
+EMA_SPANS = sorted(set(MA_PERIODS) | {12, 26})
+MACD_SIGNAL_SPAN = 9
+
+# Trailing candles any feature row can depend on (sma_200 plus the previous close)
+WARMUP_ROWS = max(MA_PERIODS) + 1
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# Output columns of create_features, in order
+FEATURE_NAMES = (
+    ['returns', 'log_returns']
+    + [name for period in MA_PERIODS for name in (f'sma_{period}', f'ema_{period}')]
+    + [
+        'volatility_20', 'atr_14', 'rsi_14', 'macd', 'macd_signal',
+        'volume_sma_20', 'volume_ratio', 'high_low_ratio', 'close_open_ratio',
+        'trend_5', 'trend_20', 'bb_upper', 'bb_lower', 'bb_width'
+    ]
+)
+
+# Identifies the feature definitions in cache keys; bump the suffix when a formula changes
+FEATURE_SET_HASH = hashlib.sha256(('|'.join(FEATURE_NAMES) + '|v1').encode('utf-8')).hexdigest()[:16]
+
+
 
 
 class FeatureEngineer:
@@ -19,127 +49,131 @@ class FeatureEngineer:
     Feature engineering and selection for trading data
     """
     
-    def __init__(self):
+    def __init__(self, cache: Optional[Any] = None):
         self.scaler = StandardScaler()
         self.feature_importance = {}
+        self.model_score = 0.0
+        self.cache = cache  # FeatureCache shared across requests
     
-    def create_features(self, df: pd.DataFrame) -> pd.DataFrame:
+    def create_features(
+        self,
+        df: pd.DataFrame,
+        backtest_id: Optional[Any] = None,
+        timeframe: Optional[str] = None
+    ) -> pd.DataFrame:
         """
         Create technical features from OHLCV data
         
+        All indicators are computed with NumPy in one pass into a
+        preallocated float32 matrix that is attached to the input in a
+        single concat. When a cache is attached and backtest_id/timeframe
+        are given, results are reused for the same data, and candles
+        appended since the cached frame are computed incrementally.
+        
         Args:
             df: DataFrame with OHLCV data
+            backtest_id: Backtest the candles belong to (cache key)
+            timeframe: Candle timeframe, e.g. 'H1' (cache key)
             
         Returns:
             DataFrame with additional features
         """
-        logger.info("Creating technical features")
+        if self.cache is None or backtest_id is None or timeframe is None:
+            logger.info("Creating technical features")
+            return FeatureState().append(df)
         
-        df = df.copy()
+        key = (str(backtest_id), timeframe, FEATURE_SET_HASH)
+        fingerprint = _fingerprint(df)
+        entry = self.cache.get(key)
         
-        # Price-based features
-        df['returns'] = df['close'].pct_change()
-        df['log_returns'] = np.log(df['close'] / df['close'].shift(1))
+        if entry is not None and entry.fingerprint == fingerprint:
+            logger.info(f"Using cached features for {key}")
+            return entry.features.copy()
         
-        # Moving averages
-        for period in [5, 10, 20, 50, 200]:
-            df[f'sma_{period}'] = df['close'].rolling(window=period).mean()
-            df[f'ema_{period}'] = df['close'].ewm(span=period).mean()
+        if entry is not None and entry.rows < len(df) and _fingerprint(df.iloc[:entry.rows]) == entry.fingerprint:
+            # Only the appended candles need computing
+            logger.info(f"Extending cached features for {key} by {len(df) - entry.rows} candles")
+            state = entry.state.copy()
+            features = pd.concat([entry.features, state.append(df.iloc[entry.rows:])])
+        else:
+            logger.info("Creating technical features")
+            state = FeatureState()
+            features = state.append(df)
         
-        # Volatility
-        df['volatility_20'] = df['returns'].rolling(window=20).std()
-        df['atr_14'] = self._calculate_atr(df, period=14)
+        logger.info(f"Created {len(features.columns)} features")
         
-        # Momentum indicators
-        df['rsi_14'] = self._calculate_rsi(df['close'], period=14)
-        df['macd'], df['macd_signal'] = self._calculate_macd(df['close'])
-        
-        # Volume features
-        df['volume_sma_20'] = df['volume'].rolling(window=20).mean()
-        df['volume_ratio'] = df['volume'] / df['volume_sma_20']
-        
-        # Price patterns
-        df['high_low_ratio'] = df['high'] / df['low']
-        df['close_open_ratio'] = df['close'] / df['open']
-        
-        # Trend features
-        df['trend_5'] = (df['close'] > df['sma_5']).astype(int)
-        df['trend_20'] = (df['close'] > df['sma_20']).astype(int)
+        self.cache.put(key, CachedFeatures(fingerprint, len(df), features, state))
         
-        # Bollinger Bands
-        df['bb_upper'], df['bb_lower'] = self._calculate_bollinger_bands(df['close'])
-        df['bb_width'] = df['bb_upper'] - df['bb_lower']
-        
-        logger.info(f"Created {len(df.columns)} features")
-        
-        return df.dropna()
-    
-    def _calculate_rsi(self, prices: pd.Series, period: int = 14) -> pd.Series:
-        """Calculate RSI indicator"""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
-    
-    def _calculate_macd(self, prices: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9):
-        """Calculate MACD indicator"""
-        ema_fast = prices.ewm(span=fast).mean()
-        ema_slow = prices.ewm(span=slow).mean()
-        macd = ema_fast - ema_slow
-        macd_signal = macd.ewm(span=signal).mean()
-        return macd, macd_signal
+        return features.copy()
     
-    def _calculate_atr(self, df: pd.DataFrame, period: int = 14) -> pd.Series:
-        """Calculate Average True Range"""
-        high_low = df['high'] - df['low']
-        high_close = np.abs(df['high'] - df['close'].shift())
-        low_close = np.abs(df['low'] - df['close'].shift())
-        
-        ranges = pd.concat([high_low, high_close, low_close], axis=1)
-        true_range = ranges.max(axis=1)
-        atr = true_range.rolling(window=period).mean()
-        
-        return atr
-    
-    def _calculate_bollinger_bands(self, prices: pd.Series, period: int = 20, std_dev: int = 2):
-        """Calculate Bollinger Bands"""
-        sma = prices.rolling(window=period).mean()
-        std = prices.rolling(window=period).std()
+    def compute_feature_matrix(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Compute every feature of FEATURE_NAMES
         
-        upper_band = sma + (std * std_dev)
-        lower_band = sma - (std * std_dev)
+        Args:
+            df: DataFrame with open, high, low, close and volume columns
         
-        return upper_band, lower_band
+        Returns:
+            float32 array of shape (len(df), len(FEATURE_NAMES)); warm-up
+            rows are NaN
+        """
+        matrix, _ = _feature_matrix(_ohlcv_arrays(df), {}, skip=0)
+        return matrix
     
     def select_features(
         self,
         X: pd.DataFrame,
         y: pd.Series,
-        top_n: int = 20
+        top_n: int = 20,
+        method: str = 'permutation',
+        max_rows: int = 20000,
+        holdout: float = 0.2,
+        n_repeats: int = 5,
+        n_jobs: int = -1
     ) -> List[str]:
         """
-        Select most important features using Random Forest
+        Select most important features
+        
+        The 'permutation' method fits a histogram gradient boosting model on a
+        row sample of the earlier rows and scores permutation importance on
+        the later, held-out rows, permuting features in parallel. Importances
+        are cached per dataset hash. 'random_forest' fits a 100-tree forest on
+        every row (the original behaviour).
         
         Args:
-            X: Feature matrix
+            X: Feature matrix (rows in time order)
             y: Target variable
             top_n: Number of top features to select
+            method: 'permutation' or 'random_forest'
+            max_rows: Row sample size for fitting and for scoring
+            holdout: Fraction of the latest rows held out for scoring
+            n_repeats: Permutations per feature
+            n_jobs: Parallel workers for permutation scoring
             
         Returns:
             List of selected feature names
         """
-        logger.info(f"Selecting top {top_n} features from {len(X.columns)}")
+        logger.info(f"Selecting top {top_n} features from {len(X.columns)} ({method})")
         
-        # Train Random Forest
-        rf = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
-        rf.fit(X, y)
+        if method == 'random_forest':
+            importances, self.model_score = self._forest_importance(X, y)
+        else:
+            key = ('importance', _dataset_hash(X, y), method, max_rows, holdout, n_repeats)
+            cached = self.cache.get(key) if self.cache is not None else None
+            
+            if cached is not None:
+                logger.info("Using cached feature importance")
+                importances, self.model_score = cached
+            else:
+                importances, self.model_score = self._permutation_importance(
+                    X, y, max_rows, holdout, n_repeats, n_jobs
+                )
+                if self.cache is not None:
+                    self.cache.put(key, (importances, self.model_score))
         
-        # Get feature importance
         importance = pd.DataFrame({
             'feature': X.columns,
-            'importance': rf.feature_importances_
+            'importance': importances
         }).sort_values('importance', ascending=False)
         
         self.feature_importance = importance.set_index('feature')['importance'].to_dict()
@@ -149,3 +183,303 @@ class FeatureEngineer:
         logger.info(f"Top 5 features: {top_features[:5]}")
         
         return top_features
+    
+    def _forest_importance(self, X: pd.DataFrame, y: pd.Series) -> Tuple[np.ndarray, float]:
+        """Impurity importance of a random forest on every row"""
+        rf = RandomForestRegressor(n_estimators=100, random_state=42, n_jobs=-1)
+        rf.fit(X, y)
+        
+        return rf.feature_importances_, float(rf.score(X, y))
+    
+    def _permutation_importance(
+        self,
+        X: pd.DataFrame,
+        y: pd.Series,
+        max_rows: int,
+        holdout: float,
+        n_repeats: int,
+        n_jobs: int
+    ) -> Tuple[np.ndarray, float]:
+        """Held-out permutation importance of a sampled gradient boosting fit"""
+        values = X.to_numpy(dtype=np.float32)
+        target = y.to_numpy(dtype=np.float64)
+        
+        # Chronological split: fit on the past, score on the latest rows
+        split = int(len(values) * (1 - holdout))
+        rng = np.random.default_rng(42)
+        train = _sample_rows(rng, 0, split, max_rows)
+        test = _sample_rows(rng, split, len(values), max_rows)
+        
+        model = HistGradientBoostingRegressor(max_iter=200, early_stopping=True, random_state=42)
+        model.fit(values[train], target[train])
+        
+        result = permutation_importance(
+            model,
+            values[test],
+            target[test],
+            n_repeats=n_repeats,
+            n_jobs=n_jobs,
+            random_state=42
+        )
+        
+        # Negative means permuting helped: the feature carries no signal
+        importances = np.clip(result.importances_mean, 0, None)
+        
+        return importances, float(model.score(values[test], target[test]))
+
+
+
+
+class CachedFeatures(NamedTuple):
+    """Feature frame cached together with the state needed to extend it"""
+    fingerprint: Tuple
+    rows: int  # candles the frame was built from
+    features: pd.DataFrame
+    state: "FeatureState"
+
+
+
+
+class FeatureState:
+    """
+    Incremental feature computation for appended candles
+    
+    Keeps the last WARMUP_ROWS candles (enough for every rolling window,
+    including sma_200) and the running numerator/denominator of each EMA.
+    Appending N candles costs O(N) regardless of history length, and the
+    rows produced are identical to the batch path on the full history.
+    """
+    
+    def __init__(self):
+        self.tail = {name: np.empty(0) for name in OHLCV_COLUMNS}
+        self.ema_state: Dict[str, Tuple[float, float]] = {}
+        self.rows = 0
+    
+    def append(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Compute features for new candles
+        
+        Args:
+            df: Candles following the ones already appended
+        
+        Returns:
+            The candles with feature columns, without warm-up rows
+        """
+        new = _ohlcv_arrays(df)
+        skip = len(self.tail['close'])
+        arrays = {name: np.concatenate([self.tail[name], new[name]]) for name in OHLCV_COLUMNS}
+        
+        matrix, self.ema_state = _feature_matrix(arrays, self.ema_state, skip)
+        
+        self.tail = {name: values[-WARMUP_ROWS:].copy() for name, values in arrays.items()}
+        self.rows += len(df)
+        
+        features = pd.DataFrame(matrix, index=df.index, columns=FEATURE_NAMES, copy=False)
+        return pd.concat([df, features], axis=1).dropna()
+    
+    def copy(self) -> "FeatureState":
+        """Independent copy (states are small)"""
+        state = FeatureState()
+        state.tail = {name: values.copy() for name, values in self.tail.items()}
+        state.ema_state = dict(self.ema_state)
+        state.rows = self.rows
+        return state
+
+
+
+
+def _ohlcv_arrays(df: pd.DataFrame) -> Dict[str, np.ndarray]:
+    """OHLCV columns as float64 arrays"""
+    return {name: df[name].to_numpy(dtype=np.float64) for name in OHLCV_COLUMNS}
+
+
+
+
+def _feature_matrix(
+    arrays: Dict[str, np.ndarray],
+    ema_state: Dict[str, Tuple[float, float]],
+    skip: int
+) -> Tuple[np.ndarray, Dict[str, Tuple[float, float]]]:
+    """
+    Compute the feature rows for arrays[skip:]
+    
+    Rows before `skip` are history only: rolling windows read them, while
+    EMAs continue from `ema_state` instead.
+    
+    Returns:
+        float32 matrix of shape (len - skip, len(FEATURE_NAMES)) and the
+        updated EMA states
+    """
+    high, low, close, volume = arrays['high'], arrays['low'], arrays['close'], arrays['volume']
+    new = slice(skip, None)
+    
+    out = np.empty((len(close) - skip, len(FEATURE_NAMES)), dtype=np.float32)
+    column = {name: i for i, name in enumerate(FEATURE_NAMES)}
+    ema_state = dict(ema_state)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Price-based features
+        prev_close = _shift(close)
+        returns = close / prev_close - 1
+        out[:, column['returns']] = returns[new]
+        out[:, column['log_returns']] = np.log(close[new] / prev_close[new])
+        
+        # Moving averages
+        sma = {period: _rolling_mean(close, period, skip) for period in MA_PERIODS}
+        ema = {}
+        for span in EMA_SPANS:
+            ema[span], ema_state[f'close_{span}'] = _ema(close[new], span, ema_state.get(f'close_{span}'))
+        for period in MA_PERIODS:
+            out[:, column[f'sma_{period}']] = sma[period]
+            out[:, column[f'ema_{period}']] = ema[period]
+        
+        # Volatility
+        out[:, column['volatility_20']] = _rolling_std(returns, 20, skip)
+        true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+        out[:, column['atr_14']] = _rolling_mean(true_range, 14, skip)
+        
+        # Momentum indicators: RSI on simple averages of gains and losses
+        delta = close - prev_close
+        gain = _rolling_mean(np.where(delta > 0, delta, 0.0), 14, skip)
+        loss = _rolling_mean(np.where(delta < 0, -delta, 0.0), 14, skip)
+        out[:, column['rsi_14']] = 100 - (100 / (1 + gain / loss))
+        
+        macd = ema[12] - ema[26]
+        macd_signal, ema_state['macd_signal'] = _ema(macd, MACD_SIGNAL_SPAN, ema_state.get('macd_signal'))
+        out[:, column['macd']] = macd
+        out[:, column['macd_signal']] = macd_signal
+        
+        # Volume features
+        volume_sma = _rolling_mean(volume, 20, skip)
+        out[:, column['volume_sma_20']] = volume_sma
+        out[:, column['volume_ratio']] = volume[new] / volume_sma
+        
+        # Price patterns
+        out[:, column['high_low_ratio']] = high[new] / low[new]
+        out[:, column['close_open_ratio']] = close[new] / arrays['open'][new]
+        
+        # Trend features
+        out[:, column['trend_5']] = close[new] > sma[5]
+        out[:, column['trend_20']] = close[new] > sma[20]
+        
+        # Bollinger Bands
+        bb_std = _rolling_std(close, 20, skip)
+        bb_upper = sma[20] + bb_std * 2
+        bb_lower = sma[20] - bb_std * 2
+        out[:, column['bb_upper']] = bb_upper
+        out[:, column['bb_lower']] = bb_lower
+        out[:, column['bb_width']] = bb_upper - bb_lower
+    
+    return out, ema_state
+
+
+
+
+def _shift(values: np.ndarray) -> np.ndarray:
+    """Values shifted one row forward (first row NaN)"""
+    shifted = np.empty_like(values)
+    if len(values):
+        shifted[0] = np.nan
+        shifted[1:] = values[:-1]
+    return shifted
+
+
+
+
+def _rolling_windows(values: np.ndarray, window: int, skip: int) -> Tuple[np.ndarray, int]:
+    """
+    Strided windows ending at rows skip.. (no copies)
+    
+    Returns:
+        Windows for the rows that have a full window, and how many leading
+        output rows are still warming up
+    """
+    first = max(skip, window - 1)
+    windows = sliding_window_view(values[first - window + 1:], window) if len(values) > first else np.empty((0, window))
+    return windows, first - skip
+
+
+
+
+def _rolling_mean(values: np.ndarray, window: int, skip: int = 0) -> np.ndarray:
+    """Trailing mean over `window` rows for rows skip.. (NaN until the window is full)"""
+    result = np.full(len(values) - skip, np.nan)
+    windows, warmup = _rolling_windows(values, window, skip)
+    result[warmup:] = windows.mean(axis=1)
+    return result
+
+
+
+
+def _rolling_std(values: np.ndarray, window: int, skip: int = 0) -> np.ndarray:
+    """Trailing sample standard deviation (ddof=1) over `window` rows for rows skip.."""
+    result = np.full(len(values) - skip, np.nan)
+    windows, warmup = _rolling_windows(values, window, skip)
+    result[warmup:] = windows.std(axis=1, ddof=1)
+    return result
+
+
+
+
+def _ema(
+    values: np.ndarray,
+    span: int,
+    state: Optional[Tuple[float, float]] = None
+) -> Tuple[np.ndarray, Optional[Tuple[float, float]]]:
+    """
+    Exponential moving average matching pandas `ewm(span=span).mean()`
+    
+    pandas' default adjust=True divides the decayed sum of values by the
+    decayed sum of weights; both are first-order IIR filters, so a run can
+    continue from the last (sum, weight) pair.
+    
+    Returns:
+        EMA values and the state after the last value
+    """
+    decay = 1 - 2 / (span + 1)
+    last_sum, last_weight = state if state is not None else (0.0, 0.0)
+    
+    weighted, _ = lfilter([1.0], [1.0, -decay], values, zi=[decay * last_sum])
+    weights, _ = lfilter([1.0], [1.0, -decay], np.ones(len(values)), zi=[decay * last_weight])
+    
+    if len(values):
+        state = (float(weighted[-1]), float(weights[-1]))
+    
+    return weighted / weights, state
+
+
+
+
+def _sample_rows(rng: np.random.Generator, start: int, stop: int, max_rows: int) -> np.ndarray:
+    """Sorted random sample of at most max_rows row indices in [start, stop)"""
+    if stop - start <= max_rows:
+        return np.arange(start, stop)
+    return np.sort(rng.choice(np.arange(start, stop), size=max_rows, replace=False))
+
+
+
+
+def _dataset_hash(X: pd.DataFrame, y: pd.Series) -> str:
+    """Content hash of a feature matrix and target"""
+    digest = hashlib.sha256()
+    digest.update('|'.join(map(str, X.columns)).encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(X, index=True).to_numpy().tobytes())
+    digest.update(pd.util.hash_pandas_object(y, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+
+
+def data_version(df: pd.DataFrame) -> str:
+    """Short hash identifying a candle frame's contents (changes when candles are added)"""
+    return hashlib.sha256(repr(_fingerprint(df)).encode('utf-8')).hexdigest()[:16]
+
+
+
+
+def _fingerprint(df: pd.DataFrame) -> Tuple:
+    """Cheap identity of a candle frame, to detect stale cache entries"""
+    if len(df) == 0:
+        return (0,)
+    last = df[OHLCV_COLUMNS].iloc[-1]
+    return (len(df), str(df.index[0]), str(df.index[-1])) + tuple(float(v) for v in last)
@@ -1,16 +1,47 @@
 """
 Genetic Algorithm implementation using NSGA-II
 """
-from deap import base, creator, tools, algorithms
+from deap import base, tools
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-from typing import List, Dict, Any, Tuple, Callable
+from typing import List, Dict, Any, Tuple, Callable, Optional
 import logging
 import random
 
 
+from .checkpoint import dump_checkpoint, load_checkpoint
+from .convergence import ConvergenceRecorder
+from .pareto import ParetoArchive, select_nsga2
+
+
 logger = logging.getLogger(__name__)
 
 
+# Objectives that are minimized (negated because all fitness weights are 1.0)
+MINIMIZE_OBJECTIVES = ['max_drawdown', 'max_drawdown_percent', 'volatility']
+
+
+
+
+def individual_class(n_objectives: int) -> type:
+    """
+    Individual class (a list with a `fitness`) private to one optimizer
+    
+    DEAP's creator registers classes as globals of the `creator` module, so
+    another optimizer built in the process, with a different number of
+    objectives, would replace them under a running or resuming one.
+    """
+    # Maximize all objectives (we'll negate minimization objectives)
+    fitness_class = type("FitnessMulti", (base.Fitness,), {'weights': (1.0,) * n_objectives})
+    
+    class Individual(list):
+        def __init__(self, iterable=()):
+            super().__init__(iterable)
+            self.fitness = fitness_class()
+    
+    return Individual
+
+
 
 
 class GeneticOptimizer:
@@ -28,7 +59,11 @@ class GeneticOptimizer:
         population_size: int = 100,
         generations: int = 50,
         crossover_prob: float = 0.7,
-        mutation_prob: float = 0.2
+        mutation_prob: float = 0.2,
+        cache: Optional[Any] = None,
+        n_workers: int = 1,
+        initial_population: Optional[List[Dict[str, Any]]] = None,
+        seed: Optional[int] = None
     ):
         self.parameters = parameters
         self.objectives = objectives
@@ -37,20 +72,20 @@ class GeneticOptimizer:
         self.generations = generations
         self.crossover_prob = crossover_prob
         self.mutation_prob = mutation_prob
+        self.cache = cache  # EvaluationCache shared with other evaluators
+        self.n_workers = n_workers
+        self.initial_population = initial_population or []  # parameter dicts seeding generation 0
+        
+        # Private RNGs (checkpointed with each generation), so concurrent runs
+        # in one process neither share nor disturb each other's random streams
+        self.rng = random.Random(seed)
+        self.np_rng = np.random.default_rng(seed)
         
         self._setup_deap()
     
     def _setup_deap(self):
         """Setup DEAP framework"""
-        # Create fitness and individual classes
-        if hasattr(creator, "FitnessMulti"):
-            del creator.FitnessMulti
-        if hasattr(creator, "Individual"):
-            del creator.Individual
-        
-        # Maximize all objectives (we'll negate minimization objectives)
-        creator.create("FitnessMulti", base.Fitness, weights=tuple([1.0] * len(self.objectives)))
-        creator.create("Individual", list, fitness=creator.FitnessMulti)
+        self._individual_cls = individual_class(len(self.objectives))
         
         self.toolbox = base.Toolbox()
         
@@ -59,14 +94,14 @@ class GeneticOptimizer:
             if param['type'] == 'int':
                 self.toolbox.register(
                     f"attr_{i}",
-                    random.randint,
+                    self.rng.randint,
                     param['min'],
                     param['max']
                 )
             else:  # float
                 self.toolbox.register(
                     f"attr_{i}",
-                    random.uniform,
+                    self.rng.uniform,
                     param['min'],
                     param['max']
                 )
@@ -75,7 +110,7 @@ class GeneticOptimizer:
         self.toolbox.register(
             "individual",
             tools.initCycle,
-            creator.Individual,
+            self._individual_cls,
             tuple([getattr(self.toolbox, f"attr_{i}") for i in range(len(self.parameters))]),
             n=1
         )
@@ -84,9 +119,9 @@ class GeneticOptimizer:
         
         # Register genetic operators
         self.toolbox.register("evaluate", self._evaluate)
-        self.toolbox.register("mate", tools.cxTwoPoint)
+        self.toolbox.register("mate", self._mate)
         self.toolbox.register("mutate", self._mutate)
-        self.toolbox.register("select", tools.selNSGA2)
+        self.toolbox.register("select", self._select)
     
     def _evaluate(self, individual: List[float]) -> Tuple[float, ...]:
         """
@@ -94,7 +129,7 @@ class GeneticOptimizer:
         
         Args:
             individual: List of parameter values
-            
+        
         Returns:
             Tuple of objective values
         """
@@ -104,8 +139,11 @@ class GeneticOptimizer:
             for i in range(len(self.parameters))
         }
         
-        # Evaluate using provided function
-        results = self.evaluation_function(params)
+        # Evaluate using provided function (memoized when a cache is attached)
+        if self.cache is not None:
+            results = self.cache.evaluate(params, self.evaluation_function)
+        else:
+            results = self.evaluation_function(params)
         
         # Extract objective values
         objective_values = []
@@ -113,7 +151,7 @@ class GeneticOptimizer:
             value = results.get(obj, 0)
             
             # Negate if we want to minimize this objective
-            if obj in ['max_drawdown', 'max_drawdown_percent', 'volatility']:
+            if obj in MINIMIZE_OBJECTIVES:
                 value = -value
             
             objective_values.append(value)
@@ -126,71 +164,138 @@ class GeneticOptimizer:
         
         Args:
             individual: Individual to mutate
-            
+        
         Returns:
             Mutated individual
         """
-        for i in range(len(individual)):
-            if random.random() < 0.1:  # 10% chance per gene
-                param = self.parameters[i]
-                if param['type'] == 'int':
-                    individual[i] = random.randint(param['min'], param['max'])
-                else:
-                    individual[i] = random.uniform(param['min'], param['max'])
+        mutated = self.np_rng.random(len(individual)) < 0.1  # 10% chance per gene
+        
+        for i in np.flatnonzero(mutated):
+            param = self.parameters[i]
+            if param['type'] == 'int':
+                individual[i] = int(self.np_rng.integers(param['min'], param['max'], endpoint=True))
+            else:
+                individual[i] = float(self.np_rng.uniform(param['min'], param['max']))
         
         return (individual,)
     
-    def optimize(self) -> Dict[str, Any]:
+    def _mate(self, ind1: List[float], ind2: List[float]) -> Tuple[List[float], List[float]]:
         """
-        Run genetic algorithm optimization
+        Two-point crossover (DEAP's cxTwoPoint on the optimizer's RNG)
+        
+        Args:
+            ind1: First individual, modified in place
+            ind2: Second individual, modified in place
         
         Returns:
-            Dictionary with optimization results
+            Both individuals
         """
-        logger.info(f"Starting genetic algorithm: {self.population_size} individuals, {self.generations} generations")
+        size = min(len(ind1), len(ind2))
+        if size < 2:
+            return ind1, ind2
+        
+        cxpoint1 = self.rng.randint(1, size)
+        cxpoint2 = self.rng.randint(1, size - 1)
+        if cxpoint2 >= cxpoint1:
+            cxpoint2 += 1
+        else:
+            cxpoint1, cxpoint2 = cxpoint2, cxpoint1
+        
+        ind1[cxpoint1:cxpoint2], ind2[cxpoint1:cxpoint2] = ind2[cxpoint1:cxpoint2], ind1[cxpoint1:cxpoint2]
         
-        # Create initial population
-        population = self.toolbox.population(n=self.population_size)
+        return ind1, ind2
+    
+    def _vary(self, population: List[Any]) -> List[Any]:
+        """
+        Produce offspring by crossover, mutation or reproduction
         
-        # Statistics
-        stats = tools.Statistics(lambda ind: ind.fitness.values)
-        stats.register("avg", np.mean, axis=0)
-        stats.register("std", np.std, axis=0)
-        stats.register("min", np.min, axis=0)
-        stats.register("max", np.max, axis=0)
+        Same scheme as DEAP's varOr, drawing from the optimizer's RNG instead
+        of the global one.
         
-        # Hall of fame (best individuals)
-        hof = tools.ParetoFront()
+        Args:
+            population: Parent population
         
-        # Run algorithm
-        population, logbook = algorithms.eaMuPlusLambda(
-            population,
-            self.toolbox,
-            mu=self.population_size,
-            lambda_=self.population_size,
-            cxpb=self.crossover_prob,
-            mutpb=self.mutation_prob,
-            ngen=self.generations,
-            stats=stats,
-            halloffame=hof,
-            verbose=True
+        Returns:
+            population_size offspring; varied ones have invalid fitness
+        """
+        offspring = []
+        for _ in range(self.population_size):
+            op_choice = self.rng.random()
+            if op_choice < self.crossover_prob:
+                ind1, ind2 = [self.toolbox.clone(ind) for ind in self.rng.sample(population, 2)]
+                ind1, ind2 = self.toolbox.mate(ind1, ind2)
+                del ind1.fitness.values
+                offspring.append(ind1)
+            elif op_choice < self.crossover_prob + self.mutation_prob:
+                ind = self.toolbox.clone(self.rng.choice(population))
+                ind, = self.toolbox.mutate(ind)
+                del ind.fitness.values
+                offspring.append(ind)
+            else:
+                offspring.append(self.rng.choice(population))
+        
+        return offspring
+    
+    def _seed_individuals(self) -> List[Any]:
+        """Individuals for the seed parameter sets, clipped into the search space"""
+        individuals = []
+        for params in self.initial_population[:self.population_size]:
+            genome = []
+            for param in self.parameters:
+                value = min(max(params.get(param['name'], param['min']), param['min']), param['max'])
+                genome.append(int(round(value)) if param['type'] == 'int' else float(value))
+            individuals.append(self._individual_cls(genome))
+        
+        if individuals:
+            logger.info(f"Seeding initial population with {len(individuals)} individuals")
+        
+        return individuals
+    
+    def _select(self, individuals: List[Any], k: int) -> List[Any]:
+        """NSGA-II selection on the vectorized non-dominated sort"""
+        fitness = np.array([ind.fitness.wvalues for ind in individuals])
+        return [individuals[i] for i in select_nsga2(fitness, k)]
+    
+    def _update_archive(self, archive: ParetoArchive, individuals: List[Any]):
+        """Record evaluated individuals in the Pareto archive"""
+        archive.update(
+            np.array([list(ind) for ind in individuals], dtype=np.float64),
+            np.array([ind.fitness.values for ind in individuals])
         )
+    
+    def _evaluate_invalid(self, individuals: List[Any]) -> int:
+        """
+        Evaluate individuals without a valid fitness
         
-        # Extract Pareto front
+        Returns:
+            Number of evaluations performed
+        """
+        invalid = [ind for ind in individuals if not ind.fitness.valid]
+        fitnesses = self.toolbox.map(self.toolbox.evaluate, invalid)
+        
+        for ind, fit in zip(invalid, fitnesses):
+            ind.fitness.values = fit
+        
+        return len(invalid)
+    
+    def _extract_pareto_front(self, archive: ParetoArchive) -> List[Dict[str, Any]]:
+        """Convert the Pareto archive into result dictionaries"""
         pareto_front = []
-        for rank, individual in enumerate(hof):
+        for rank, (genome, fitness, dominated_count) in enumerate(
+            zip(archive.genomes, archive.fitness, archive.dominated_count)
+        ):
             params = {
-                self.parameters[i]['name']: individual[i]
-                for i in range(len(self.parameters))
+                param['name']: int(round(value)) if param['type'] == 'int' else float(value)
+                for param, value in zip(self.parameters, genome)
             }
             
             objectives = {
-                self.objectives[i]: individual.fitness.values[i]
+                self.objectives[i]: float(fitness[i])
                 for i in range(len(self.objectives))
             }
             
             # Un-negate minimization objectives
-            for obj in ['max_drawdown', 'max_drawdown_percent', 'volatility']:
+            for obj in MINIMIZE_OBJECTIVES:
                 if obj in objectives:
                     objectives[obj] = -objectives[obj]
             
@@ -198,14 +303,186 @@ class GeneticOptimizer:
                 'rank': rank + 1,
                 'parameters': params,
                 'objectives': objectives,
-                'dominated_count': 0
+                'dominated_count': int(dominated_count)
             })
         
+        return pareto_front
+    
+    def _objective_signs(self) -> np.ndarray:
+        """-1 for objectives negated in the fitness, 1 otherwise"""
+        return np.array([-1.0 if obj in MINIMIZE_OBJECTIVES else 1.0 for obj in self.objectives])
+    
+    def _make_individual(self, genome: np.ndarray, fitness: np.ndarray) -> Any:
+        """Rebuild an evaluated individual from checkpoint arrays"""
+        individual = self._individual_cls(
+            int(round(value)) if param['type'] == 'int' else float(value)
+            for value, param in zip(genome, self.parameters)
+        )
+        individual.fitness.values = tuple(float(v) for v in fitness)
+        return individual
+    
+    def _checkpoint(
+        self,
+        generation: int,
+        evaluations: int,
+        population: List[Any],
+        archive: ParetoArchive,
+        recorder: ConvergenceRecorder
+    ) -> bytes:
+        """Serialize the state needed to continue after `generation`"""
+        return dump_checkpoint({
+            'generation': generation,
+            'evaluations': evaluations,
+            'parameters': [param['name'] for param in self.parameters],
+            'objectives': list(self.objectives),
+            'population': [list(ind) for ind in population],
+            'population_fitness': [ind.fitness.values for ind in population],
+            'archive': archive.state(),
+            'convergence': recorder.to_dict(),
+            'python_rng': self.rng.getstate(),
+            'numpy_rng': self.np_rng.bit_generator.state
+        })
+    
+    def _restore(self, data: bytes) -> Tuple[int, int, List[Any], ParetoArchive, ConvergenceRecorder]:
+        """
+        Restore generation state from a checkpoint
+        
+        Also restores the optimizer's RNG states, so a resumed run draws the
+        same offspring the interrupted run would have.
+        
+        Returns:
+            Last completed generation, evaluations so far, population,
+            Pareto archive and convergence recorder
+        """
+        state = load_checkpoint(data)
+        
+        if state['parameters'] != [param['name'] for param in self.parameters] \
+                or state['objectives'] != list(self.objectives):
+            raise ValueError("Checkpoint does not match the optimization's parameters/objectives")
+        
+        population = [
+            self._make_individual(genome, fitness)
+            for genome, fitness in zip(state['population'], state['population_fitness'])
+        ]
+        
+        archive = ParetoArchive.from_state(*state['archive'])
+        
+        self.rng.setstate(state['python_rng'])
+        self.np_rng.bit_generator.state = state['numpy_rng']
+        
+        recorder = ConvergenceRecorder.from_dict(
+            state['convergence'],
+            self._objective_signs(),
+            capacity=self.generations + 1
+        )
+        
+        return state['generation'], state['evaluations'], population, archive, recorder
+    
+    def optimize(
+        self,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        checkpoint_callback: Optional[Callable[[int, bytes], None]] = None,
+        resume_from: Optional[bytes] = None
+    ) -> Dict[str, Any]:
+        """
+        Run genetic algorithm optimization
+        
+        The (mu + lambda) loop matches DEAP's eaMuPlusLambda, unrolled so that
+        progress can be reported after every generation.
+        
+        Args:
+            progress_callback: Called after each generation with the current
+                Pareto front and statistics; may raise to stop the run
+            checkpoint_callback: Called after each generation with the
+                generation number and a checkpoint blob
+            resume_from: Checkpoint blob to continue from instead of
+                starting with a random population
+        
+        Returns:
+            Dictionary with optimization results
+        """
+        logger.info(f"Starting genetic algorithm: {self.population_size} individuals, {self.generations} generations")
+        
+        # Non-dominated solutions across all generations
+        archive = ParetoArchive(len(self.parameters), len(self.objectives))
+        start_gen = 0
+        evaluations = 0
+        
+        # Per-generation statistics, hypervolume, timing and cache hit rate
+        recorder = ConvergenceRecorder(self.objectives, self._objective_signs(), capacity=self.generations + 1)
+        
+        if resume_from is not None:
+            # Continue after the last checkpointed generation
+            last_gen, evaluations, population, archive, recorder = self._restore(resume_from)
+            start_gen = last_gen + 1
+            logger.info(f"Resuming from generation {last_gen} ({evaluations} evaluations)")
+        else:
+            # Create initial population (seeds first, random individuals for the rest)
+            population = self._seed_individuals()
+            population += self.toolbox.population(n=self.population_size - len(population))
+        
+        # Evaluate each generation's new individuals concurrently
+        pool = None
+        if self.n_workers > 1:
+            pool = ThreadPoolExecutor(max_workers=self.n_workers)
+            self.toolbox.register("map", pool.map)
+        
+        # Run algorithm
+        try:
+            for gen in range(start_gen, self.generations + 1):
+                if gen == 0:
+                    nevals = self._evaluate_invalid(population)
+                    self._update_archive(archive, population)
+                else:
+                    # Vary the population and select the next generation
+                    offspring = self._vary(population)
+                    nevals = self._evaluate_invalid(offspring)
+                    self._update_archive(archive, offspring)
+                    population[:] = self.toolbox.select(population + offspring, self.population_size)
+                
+                evaluations += nevals
+                cache_stats = self.cache.stats() if self.cache is not None else None
+                record = recorder.record(
+                    gen,
+                    np.array([ind.fitness.values for ind in population]),
+                    archive.fitness,
+                    nevals,
+                    cache_stats
+                )
+                logger.info(
+                    f"Generation {gen}/{self.generations}: {nevals} evaluations, "
+                    f"hypervolume {record['hypervolume']:.6g}"
+                )
+                
+                if checkpoint_callback is not None:
+                    checkpoint_callback(gen, self._checkpoint(gen, evaluations, population, archive, recorder))
+                
+                if progress_callback is not None:
+                    progress_callback({
+                        'generation': gen,
+                        'generations': self.generations,
+                        'evaluations': nevals,
+                        'statistics': record,
+                        'convergence': recorder.to_dict(),
+                        'pareto_front': self._extract_pareto_front(archive),
+                        'cache_stats': cache_stats
+                    })
+        finally:
+            if pool is not None:
+                pool.shutdown()
+                self.toolbox.register("map", map)
+        
+        # Extract Pareto front
+        pareto_front = self._extract_pareto_front(archive)
+        
         logger.info(f"Optimization complete. Pareto front size: {len(pareto_front)}")
         
         return {
             'pareto_front': pareto_front,
             'best_solution': pareto_front[0] if pareto_front else None,
             'generations_completed': self.generations,
-            'logbook': logbook
+            'resumed_from_generation': start_gen - 1 if resume_from is not None else None,
+            'total_evaluations': evaluations,
+            'convergence': recorder.to_dict(),
+            'cache_stats': self.cache.stats() if self.cache is not None else None
         }
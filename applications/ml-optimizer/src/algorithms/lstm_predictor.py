@@ -3,16 +3,84 @@ LSTM model for time series prediction
 """
 import numpy as np
 import pandas as pd
-from typing import Tuple, List
+from typing import Tuple, List, Dict, Any, Optional
+import json
 import logging
+import os
+import threading
+import tensorflow as tf
 from tensorflow import keras
 from tensorflow.keras import layers
 from sklearn.preprocessing import MinMaxScaler
 
+from .sequences import sequence_windows
+
 
 logger = logging.getLogger(__name__)
 
 
+# Fitted MinMaxScaler attributes persisted next to the weights
+SCALER_ATTRIBUTES = ['min_', 'scale_', 'data_min_', 'data_max_', 'data_range_']
+
+# Weight / activation precision options for the TFLite export
+TFLITE_QUANTIZATIONS = ['none', 'dynamic', 'int8']
+
+# Training windows fed to the converter to calibrate int8 activations
+CALIBRATION_SAMPLES = 200
+
+
+
+
+class WindowSequence(keras.utils.Sequence):
+    """
+    Keras batch source over sequence window views
+    
+    Only the current batch is gathered into a contiguous array, so training
+    and inference never materialize the full (samples, sequence, features)
+    tensor.
+    """
+    
+    def __init__(
+        self,
+        X: np.ndarray,
+        y: Optional[np.ndarray] = None,
+        batch_size: int = 32,
+        shuffle: bool = False,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            X: Windows, typically from `sequence_windows`
+            y: Targets aligned with X (omit for inference)
+            batch_size: Windows per batch
+            shuffle: Reorder windows at the end of every epoch
+            seed: Seed for the shuffling order
+        """
+        super().__init__()
+        self.X = X
+        self.y = y
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self._rng = np.random.default_rng(seed)
+        self._order = np.arange(len(X))
+        if shuffle:
+            self._rng.shuffle(self._order)
+    
+    def __len__(self) -> int:
+        return int(np.ceil(len(self.X) / self.batch_size))
+    
+    def __getitem__(self, index: int):
+        rows = self._order[index * self.batch_size:(index + 1) * self.batch_size]
+        batch = np.ascontiguousarray(self.X[rows], dtype=np.float32)
+        if self.y is None:
+            return batch
+        return batch, np.asarray(self.y[rows], dtype=np.float32)
+    
+    def on_epoch_end(self):
+        if self.shuffle:
+            self._rng.shuffle(self._order)
+
+
 
 
 class LSTMPredictor:
@@ -29,6 +97,14 @@ class LSTMPredictor:
         self.features = features or ['close', 'volume', 'rsi', 'ema_20']
         self.model = None
         self.scaler = MinMaxScaler()
+        self.target_index = 0
+        self._forecast_fn = None
+        
+        # Optional TFLite export; predict and evaluate use it when set
+        self.tflite_model: Optional[bytes] = None
+        self.tflite_threads = 2
+        self._interpreter = None
+        self._interpreter_lock = threading.Lock()
     
     def prepare_data(
         self,
@@ -48,20 +124,17 @@ class LSTMPredictor:
         logger.info(f"Preparing data with sequence length {self.sequence_length}")
         
         # Select features
-        data = df[self.features].values
-        
-        # Scale data
-        scaled_data = self.scaler.fit_transform(data)
+        data = df[self.features].to_numpy(dtype=np.float32)
         
-        # Create sequences
-        X, y = [], []
-        for i in range(self.sequence_length, len(scaled_data)):
-            X.append(scaled_data[i-self.sequence_length:i])
-            y.append(scaled_data[i, self.features.index(target_column)])
+        # Scale data (float32 is what the model consumes anyway)
+        scaled_data = self.scaler.fit_transform(data).astype(np.float32, copy=False)
+        self.target_index = self.features.index(target_column)
         
-        X, y = np.array(X), np.array(y)
+        # Sequences ending before row i predict row i; X views scaled_data
+        X = sequence_windows(scaled_data[:-1], self.sequence_length)
+        y = scaled_data[self.sequence_length:, self.target_index]
         
-        # Split train/test (80/20)
+        # Split train/test (80/20, chronological; both halves stay views)
         split = int(0.8 * len(X))
         X_train, X_test = X[:split], X[split:]
         y_train, y_test = y[:split], y[split:]
@@ -95,6 +168,10 @@ class LSTMPredictor:
             metrics=['mae']
         )
         
+        self._forecast_fn = None
+        self.tflite_model = None
+        self._interpreter = None
+        
         logger.info(f"Model built with {self.model.count_params()} parameters")
     
     def train(
@@ -109,6 +186,10 @@ class LSTMPredictor:
         """
         Train LSTM model
         
+        Batches are gathered from the (possibly strided) inputs on demand
+        through `WindowSequence`, shuffled every epoch like Keras does for
+        in-memory arrays.
+        
         Args:
             X_train: Training features
             y_train: Training targets
@@ -128,18 +209,183 @@ class LSTMPredictor:
         
         # Train model
         history = self.model.fit(
-            X_train, y_train,
-            validation_data=(X_val, y_val),
+            WindowSequence(X_train, y_train, batch_size, shuffle=True),
+            validation_data=WindowSequence(X_val, y_val, batch_size),
             epochs=epochs,
-            batch_size=batch_size,
             callbacks=[early_stop],
             verbose=1
         )
         
+        # Any export describes the previous weights
+        self.tflite_model = None
+        self._interpreter = None
+        
         logger.info("Training complete")
         
         return history
     
+    def _build_forecast_fn(self):
+        """
+        Compile the autoregressive loop into a single graph
+        
+        Each step runs the model on the whole batch of windows, then slides
+        every window by one row: the new row repeats the last one with the
+        target feature replaced by the prediction.
+        """
+        model = self.model
+        target_mask = tf.one_hot(self.target_index, len(self.features), dtype=tf.float32)
+        
+        @tf.function(input_signature=[
+            tf.TensorSpec(shape=[None, None, None], dtype=tf.float32),
+            tf.TensorSpec(shape=[], dtype=tf.int32)
+        ])
+        def forecast(windows, n_steps):
+            steps = tf.TensorArray(tf.float32, size=n_steps)
+            for step in tf.range(n_steps):
+                pred = model(windows, training=False)  # (batch, 1)
+                steps = steps.write(step, pred[:, 0])
+                
+                last = windows[:, -1, :]
+                row = last * (1.0 - target_mask) + pred * target_mask
+                windows = tf.concat([windows[:, 1:, :], row[:, None, :]], axis=1)
+            
+            return tf.transpose(steps.stack())  # (batch, n_steps)
+        
+        return forecast
+    
+    def forecast(self, sequences: np.ndarray, n_steps: int = 30) -> np.ndarray:
+        """
+        Forecast several sequences at once
+        
+        One compiled call runs all steps for the whole batch, e.g. the latest
+        window of many backtests sharing this model. With a TFLite export a
+        single window is forecast on the interpreter instead; it runs one
+        window per invoke, so larger batches stay on the compiled loop.
+        
+        Args:
+            sequences: Array of shape (batch, sequence_length, n_features), scaled
+            n_steps: Number of steps to predict ahead
+            
+        Returns:
+            Scaled target predictions, shape (batch, n_steps)
+        """
+        if self.tflite_model is not None and len(sequences) == 1:
+            return self._forecast_tflite(np.asarray(sequences, dtype=np.float32), n_steps)
+        
+        if self._forecast_fn is None:
+            self._forecast_fn = self._build_forecast_fn()
+        
+        windows = tf.convert_to_tensor(np.ascontiguousarray(sequences, dtype=np.float32))
+        return self._forecast_fn(windows, tf.constant(n_steps, dtype=tf.int32)).numpy()
+    
+    def export_tflite(
+        self,
+        quantization: str = 'dynamic',
+        representative: Optional[np.ndarray] = None
+    ) -> bytes:
+        """
+        Convert the trained model for the TFLite CPU runtime
+        
+        The model is traced for a single window: the stacked LSTM layers only
+        become fused TFLite LSTM kernels with a static batch dimension, and
+        those kernels cannot be resized afterwards. Once exported, `forecast`,
+        `predict` and `evaluate` run on the interpreter and `save` stores the
+        flatbuffer next to the weights.
+        
+        Args:
+            quantization: 'none' (float32), 'dynamic' (int8 weights, float
+                activations) or 'int8' (weights and activations, calibrated
+                on `representative`). float16 is not offered: the TF 2.15
+                converter does not finish on the fused LSTM kernels.
+            representative: Training windows for int8 calibration
+        
+        Returns:
+            The TFLite flatbuffer
+        """
+        if quantization not in TFLITE_QUANTIZATIONS:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        
+        run_model = tf.function(lambda windows: self.model(windows, training=False))
+        concrete = run_model.get_concrete_function(
+            tf.TensorSpec([1, *self.model.input_shape[1:]], dtype=tf.float32)
+        )
+        converter = tf.lite.TFLiteConverter.from_concrete_functions([concrete], self.model)
+        if quantization != 'none':
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        
+        if quantization == 'int8':
+            if representative is None or len(representative) == 0:
+                raise ValueError("int8 quantization needs representative windows")
+            
+            rows = np.linspace(0, len(representative) - 1, min(CALIBRATION_SAMPLES, len(representative))).astype(int)
+            
+            def calibration_data():
+                for row in rows:
+                    yield [np.asarray(representative[row:row + 1], dtype=np.float32)]
+            
+            converter.representative_dataset = calibration_data
+        
+        self.tflite_model = converter.convert()
+        self._interpreter = None
+        
+        logger.info(f"Exported TFLite model ({quantization}, {len(self.tflite_model) / 1024:.0f} KB)")
+        
+        return self.tflite_model
+    
+    def _run_tflite(self, batch: np.ndarray) -> np.ndarray:
+        """Run the TFLite model on a batch of windows, one window per invoke"""
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        outputs = np.empty((len(batch), 1), dtype=np.float32)
+        
+        # The interpreter holds its tensors, so calls are serialized
+        with self._interpreter_lock:
+            if self._interpreter is None:
+                self._interpreter = tf.lite.Interpreter(
+                    model_content=self.tflite_model,
+                    num_threads=self.tflite_threads
+                )
+                self._interpreter.allocate_tensors()
+            
+            interpreter = self._interpreter
+            input_index = interpreter.get_input_details()[0]['index']
+            output_index = interpreter.get_output_details()[0]['index']
+            
+            for row in range(len(batch)):
+                # Fused LSTM states are interpreter variables that persist between invokes
+                interpreter.reset_all_variables()
+                interpreter.set_tensor(input_index, batch[row:row + 1])
+                interpreter.invoke()
+                outputs[row] = interpreter.get_tensor(output_index)[0]
+        
+        return outputs
+    
+    def _forecast_tflite(self, sequences: np.ndarray, n_steps: int) -> np.ndarray:
+        """Autoregressive forecast on the interpreter over a preallocated buffer"""
+        batch, sequence_length, _ = sequences.shape
+        
+        # Row t of the buffer is input row t; step s reads rows [s, s + sequence_length)
+        buffer = np.empty((batch, sequence_length + n_steps, sequences.shape[2]), dtype=np.float32)
+        buffer[:, :sequence_length] = sequences
+        predictions = np.empty((batch, n_steps), dtype=np.float32)
+        
+        for step in range(n_steps):
+            pred = self._run_tflite(buffer[:, step:step + sequence_length])[:, 0]
+            predictions[:, step] = pred
+            
+            buffer[:, step + sequence_length] = buffer[:, step + sequence_length - 1]
+            buffer[:, step + sequence_length, self.target_index] = pred
+        
+        return predictions
+    
+    def _predict_windows(self, X: np.ndarray) -> np.ndarray:
+        """One-step predictions for every window, batch by batch"""
+        batches = WindowSequence(X, batch_size=256)
+        if self.tflite_model is None:
+            return self.model.predict(batches, verbose=0).flatten()
+        
+        predictions = [self._run_tflite(batches[i])[:, 0] for i in range(len(batches))]
+        return np.concatenate(predictions) if predictions else np.empty(0, dtype=np.float32)
+    
     def predict(
         self,
         X: np.ndarray,
@@ -149,27 +395,15 @@ class LSTMPredictor:
         Make predictions
         
         Args:
-            X: Input sequences
+            X: Input sequences (the forecast starts after the last one)
             n_steps: Number of steps to predict ahead
-            
+        
         Returns:
             Predictions and confidence intervals
         """
         logger.info(f"Making predictions for {n_steps} steps")
         
-        predictions = []
-        current_sequence = X[-1].copy()
-        
-        for _ in range(n_steps):
-            # Predict next step
-            pred = self.model.predict(current_sequence.reshape(1, *current_sequence.shape), verbose=0)
-            predictions.append(pred[0, 0])
-            
-            # Update sequence (shift and add prediction)
-            current_sequence = np.roll(current_sequence, -1, axis=0)
-            current_sequence[-1, 0] = pred[0, 0]  # Assuming first feature is target
-        
-        predictions = np.array(predictions)
+        predictions = self.forecast(X[-1:], n_steps)[0]
         
         # Calculate confidence intervals (simple approach)
         std = np.std(predictions)
@@ -180,6 +414,92 @@ class LSTMPredictor:
         
         return predictions, confidence_intervals
     
+    def latest_window(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Scale the last `sequence_length` rows with the fitted scaler
+        
+        Args:
+            df: DataFrame with the model's features
+        
+        Returns:
+            Array of shape (1, sequence_length, n_features)
+        """
+        data = df[self.features].iloc[-self.sequence_length:].to_numpy(dtype=np.float32)
+        return self.scaler.transform(data).astype(np.float32)[None, :, :]
+    
+    def inverse_target(self, values: np.ndarray) -> np.ndarray:
+        """Map scaled target values back to the target's original units"""
+        i = self.target_index
+        return (np.asarray(values) - self.scaler.min_[i]) / self.scaler.scale_[i]
+    
+    def save(self, directory: str, metadata: Optional[Dict[str, Any]] = None):
+        """
+        Write weights, scaler and settings to a directory
+        
+        The scaler goes into a .npz and everything else into JSON, so
+        loading never needs pickle.
+        
+        Args:
+            directory: Target directory (created if missing)
+            metadata: Extra JSON-serializable values stored alongside
+        """
+        os.makedirs(directory, exist_ok=True)
+        
+        self.model.save_weights(os.path.join(directory, 'model.weights.h5'))
+        if self.tflite_model is not None:
+            with open(os.path.join(directory, 'model.tflite'), 'wb') as f:
+                f.write(self.tflite_model)
+        np.savez(
+            os.path.join(directory, 'scaler.npz'),
+            **{name: getattr(self.scaler, name) for name in SCALER_ATTRIBUTES}
+        )
+        
+        with open(os.path.join(directory, 'meta.json'), 'w') as f:
+            json.dump({
+                'sequence_length': self.sequence_length,
+                'features': self.features,
+                'target_index': self.target_index,
+                'metadata': metadata or {}
+            }, f)
+    
+    @classmethod
+    def load(cls, directory: str) -> Tuple["LSTMPredictor", Dict[str, Any]]:
+        """
+        Rebuild a predictor written by `save`
+        
+        Args:
+            directory: Directory passed to `save`
+        
+        Returns:
+            The predictor and the stored metadata
+        """
+        with open(os.path.join(directory, 'meta.json')) as f:
+            meta = json.load(f)
+        
+        predictor = cls(sequence_length=meta['sequence_length'], features=meta['features'])
+        predictor.target_index = meta['target_index']
+        
+        with np.load(os.path.join(directory, 'scaler.npz')) as arrays:
+            for name in SCALER_ATTRIBUTES:
+                setattr(predictor.scaler, name, arrays[name])
+        predictor.scaler.n_features_in_ = len(predictor.features)
+        predictor.scaler.n_samples_seen_ = 0
+        
+        predictor.build_model((predictor.sequence_length, len(predictor.features)))
+        predictor.model.load_weights(os.path.join(directory, 'model.weights.h5'))
+        
+        tflite_path = os.path.join(directory, 'model.tflite')
+        if os.path.exists(tflite_path):
+            with open(tflite_path, 'rb') as f:
+                predictor.tflite_model = f.read()
+        
+        return predictor, meta['metadata']
+    
+    def memory_bytes(self) -> int:
+        """Approximate in-memory size of the model weights and TFLite export"""
+        exported = len(self.tflite_model) if self.tflite_model is not None else 0
+        return int(sum(w.nbytes for w in self.model.get_weights())) + exported
+    
     def evaluate(self, X_test: np.ndarray, y_test: np.ndarray) -> Dict[str, float]:
         """
         Evaluate model performance
@@ -191,14 +511,14 @@ class LSTMPredictor:
         Returns:
             Dictionary with metrics
         """
-        predictions = self.model.predict(X_test, verbose=0)
+        predictions = self._predict_windows(X_test)
         
-        mse = np.mean((predictions.flatten() - y_test) ** 2)
-        mae = np.mean(np.abs(predictions.flatten() - y_test))
+        mse = np.mean((predictions - y_test) ** 2)
+        mae = np.mean(np.abs(predictions - y_test))
         rmse = np.sqrt(mse)
         
         # R-squared
-        ss_res = np.sum((y_test - predictions.flatten()) ** 2)
+        ss_res = np.sum((y_test - predictions) ** 2)
         ss_tot = np.sum((y_test - np.mean(y_test)) ** 2)
         r2 = 1 - (ss_res / ss_tot)
         
@@ -0,0 +1,291 @@
+"""
+Pareto utilities - Vectorized non-dominated sorting and Pareto archive
+
+All functions use the maximization convention of the genetic optimizer
+(fitness rows are DEAP `wvalues`: minimized objectives are already negated).
+"""
+from typing import List, Optional, Tuple
+import numpy as np
+
+
+# Upper bound on pairwise comparisons held in memory at once (rows x cols)
+BLOCK_ELEMENTS = 1 << 22
+
+
+
+
+def dominates(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise dominance between two sets of fitness vectors
+    
+    Args:
+        a: Array of shape (n, m)
+        b: Array of shape (k, m)
+    
+    Returns:
+        Boolean array of shape (n, k); [i, j] is True if a[i] dominates b[j]
+    """
+    # One 2-D comparison per objective avoids (n, k, m) temporaries
+    weak = a[:, 0, None] >= b[None, :, 0]
+    strict = a[:, 0, None] > b[None, :, 0]
+    for j in range(1, a.shape[1]):
+        weak &= a[:, j, None] >= b[None, :, j]
+        strict |= a[:, j, None] > b[None, :, j]
+    return weak & strict
+
+
+
+
+def _row_blocks(n_rows: int, n_cols: int):
+    """Yield row slices so that one dominance block stays under BLOCK_ELEMENTS"""
+    step = max(1, BLOCK_ELEMENTS // max(1, n_cols))
+    for start in range(0, n_rows, step):
+        yield slice(start, min(start + step, n_rows))
+
+
+
+
+def dominated_by_count(dominators: np.ndarray, points: np.ndarray) -> np.ndarray:
+    """Number of rows of `dominators` that dominate each row of `points`"""
+    counts = np.zeros(len(points), dtype=np.int64)
+    if len(dominators) == 0 or len(points) == 0:
+        return counts
+    
+    for rows in _row_blocks(len(dominators), len(points)):
+        counts += np.count_nonzero(dominates(dominators[rows], points), axis=0)
+    
+    return counts
+
+
+
+
+def dominance_count(points: np.ndarray, others: np.ndarray) -> np.ndarray:
+    """Number of rows of `others` that each row of `points` dominates"""
+    counts = np.zeros(len(points), dtype=np.int64)
+    if len(points) == 0 or len(others) == 0:
+        return counts
+    
+    for rows in _row_blocks(len(points), len(others)):
+        counts[rows] = np.count_nonzero(dominates(points[rows], others), axis=1)
+    
+    return counts
+
+
+
+
+def non_dominated_sort(fitness: np.ndarray, k: Optional[int] = None) -> List[np.ndarray]:
+    """
+    Sort fitness vectors into Pareto fronts
+    
+    Domination counts are computed once in memory-bounded blocks, then fronts
+    are peeled off by subtracting each front's dominance from the remaining
+    points, so the total work is one pass over all pairs.
+    
+    Args:
+        fitness: Array of shape (n, m)
+        k: Stop once the fronts found hold at least k points
+    
+    Returns:
+        List of index arrays, best front first
+    """
+    fitness = np.asarray(fitness, dtype=np.float64)
+    n = len(fitness)
+    if n == 0:
+        return []
+    
+    counts = dominated_by_count(fitness, fitness)
+    remaining = np.ones(n, dtype=bool)
+    fronts = []
+    selected = 0
+    limit = n if k is None else min(k, n)
+    
+    while selected < limit:
+        front = np.flatnonzero(remaining & (counts == 0))
+        fronts.append(front)
+        remaining[front] = False
+        selected += len(front)
+        
+        if selected >= limit:
+            break
+        
+        rest = np.flatnonzero(remaining)
+        counts[rest] -= dominated_by_count(fitness[front], fitness[rest])
+    
+    return fronts
+
+
+
+
+def crowding_distance(fitness: np.ndarray) -> np.ndarray:
+    """
+    NSGA-II crowding distance of the points in one front
+    
+    Boundary points get infinite distance; objectives with no spread are
+    skipped.
+    
+    Args:
+        fitness: Array of shape (n, m) for a single front
+    
+    Returns:
+        Array of shape (n,)
+    """
+    fitness = np.asarray(fitness, dtype=np.float64)
+    n, m = fitness.shape
+    distance = np.zeros(n)
+    if n <= 2:
+        distance[:] = np.inf
+        return distance
+    
+    for j in range(m):
+        order = np.argsort(fitness[:, j], kind='stable')
+        values = fitness[order, j]
+        span = values[-1] - values[0]
+        
+        distance[order[0]] = np.inf
+        distance[order[-1]] = np.inf
+        if span == 0:
+            continue
+        
+        distance[order[1:-1]] += (values[2:] - values[:-2]) / span
+    
+    return distance
+
+
+
+
+def select_nsga2(fitness: np.ndarray, k: int) -> np.ndarray:
+    """
+    NSGA-II environmental selection
+    
+    Whole fronts are taken in order; the front that overflows is truncated
+    by descending crowding distance (same rule as DEAP's selNSGA2).
+    
+    Args:
+        fitness: Array of shape (n, m)
+        k: Number of points to select
+    
+    Returns:
+        Indices of the selected points
+    """
+    chosen = []
+    fronts = non_dominated_sort(fitness, k)
+    
+    for front in fronts:
+        if len(chosen) + len(front) <= k:
+            chosen.extend(front.tolist())
+        else:
+            distance = crowding_distance(fitness[front])
+            order = np.argsort(-distance, kind='stable')
+            chosen.extend(front[order[:k - len(chosen)]].tolist())
+            break
+    
+    return np.asarray(chosen, dtype=np.int64)
+
+
+
+
+class ParetoArchive:
+    """
+    Incremental archive of the non-dominated solutions seen so far
+    
+    Replaces DEAP's ParetoFront. Every distinct genome passed to `update` is
+    recorded, so each member's `dominated_count` is the number of evaluated
+    solutions it dominates. Members are kept sorted by fitness, best first
+    (lexicographically, like DEAP's hall of fame).
+    """
+    
+    def __init__(self, n_parameters: int, n_objectives: int):
+        self.genomes = np.empty((0, n_parameters))
+        self.fitness = np.empty((0, n_objectives))
+        self.dominated_count = np.empty(0, dtype=np.int64)
+        
+        # Every distinct genome evaluated so far and its fitness
+        self.history_genomes = np.empty((0, n_parameters))
+        self.history = np.empty((0, n_objectives))
+        self._seen = set()
+    
+    def __len__(self) -> int:
+        return len(self.genomes)
+    
+    def update(self, genomes: np.ndarray, fitness: np.ndarray):
+        """
+        Add newly evaluated solutions
+        
+        Args:
+            genomes: Array of shape (n, n_parameters)
+            fitness: Array of shape (n, n_objectives), maximization convention
+        """
+        genomes = np.asarray(genomes, dtype=np.float64)
+        fitness = np.asarray(fitness, dtype=np.float64)
+        
+        # Keep the first occurrence of genomes not seen before
+        fresh = []
+        for i, genome in enumerate(genomes):
+            key = tuple(genome)
+            if key not in self._seen:
+                self._seen.add(key)
+                fresh.append(i)
+        if not fresh:
+            return
+        
+        genomes = genomes[fresh]
+        fitness = fitness[fresh]
+        
+        self.dominated_count = self.dominated_count + dominance_count(self.fitness, fitness)
+        self.history_genomes = np.vstack([self.history_genomes, genomes])
+        self.history = np.vstack([self.history, fitness])
+        
+        # Newcomers that neither the archive nor other newcomers dominate
+        candidates = (
+            (dominated_by_count(self.fitness, fitness) == 0)
+            & (dominated_by_count(fitness, fitness) == 0)
+        )
+        if not candidates.any():
+            return
+        
+        genomes = genomes[candidates]
+        fitness = fitness[candidates]
+        
+        # Drop members the newcomers dominate
+        keep = dominated_by_count(fitness, self.fitness) == 0
+        
+        self.genomes = np.vstack([self.genomes[keep], genomes])
+        self.fitness = np.vstack([self.fitness[keep], fitness])
+        self.dominated_count = np.concatenate([
+            self.dominated_count[keep],
+            dominance_count(fitness, self.history)
+        ])
+        
+        self._sort()
+    
+    def _sort(self):
+        """Order members by fitness, best first"""
+        order = np.lexsort(-self.fitness.T[::-1])
+        self.genomes = self.genomes[order]
+        self.fitness = self.fitness[order]
+        self.dominated_count = self.dominated_count[order]
+    
+    def state(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Members, their dominance counts and the evaluation history (for checkpoints)"""
+        return self.genomes, self.fitness, self.dominated_count, self.history_genomes, self.history
+    
+    @classmethod
+    def from_state(
+        cls,
+        genomes: np.ndarray,
+        fitness: np.ndarray,
+        dominated_count: np.ndarray,
+        history_genomes: np.ndarray,
+        history: np.ndarray
+    ) -> "ParetoArchive":
+        """Rebuild an archive saved with `state`"""
+        n_parameters, n_objectives = history_genomes.shape[1], history.shape[1]
+        
+        archive = cls(n_parameters, n_objectives)
+        archive.genomes = np.asarray(genomes, dtype=np.float64).reshape(-1, n_parameters)
+        archive.fitness = np.asarray(fitness, dtype=np.float64).reshape(-1, n_objectives)
+        archive.dominated_count = np.asarray(dominated_count, dtype=np.int64)
+        archive.history_genomes = np.asarray(history_genomes, dtype=np.float64)
+        archive.history = np.asarray(history, dtype=np.float64)
+        archive._seen = {tuple(genome) for genome in archive.history_genomes}
+        return archive
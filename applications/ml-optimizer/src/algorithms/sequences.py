@@ -0,0 +1,25 @@
+"""
+Sequence windows - Zero-copy sliding windows over time series rows
+"""
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+
+
+def sequence_windows(data: np.ndarray, sequence_length: int) -> np.ndarray:
+    """
+    Every run of `sequence_length` consecutive rows, as a read-only view
+    
+    Window i covers rows [i, i + sequence_length); no data is copied, so the
+    result costs O(rows x features) memory whatever the sequence length.
+    
+    Args:
+        data: Array of shape (rows, features)
+        sequence_length: Rows per window
+    
+    Returns:
+        Array view of shape (rows - sequence_length + 1, sequence_length, features)
+    """
+    # sliding_window_view puts the window axis last; swap it back (still a view)
+    return sliding_window_view(data, sequence_length, axis=0).transpose(0, 2, 1)
@@ -2,20 +2,26 @@
 FastAPI routes for ML optimizer service
 """
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from uuid import UUID
+import asyncio
+import json
 import logging
 
 
-from ..models.database import get_db
+from ..config import settings
+from ..models.database import get_db, SessionLocal
 from ..models.schemas import (
     MLOptimizationRequest,
-    MLOptimizationResponse,
+    MLJobResponse,
+    MLJobStatus,
     FeatureImportanceResponse,
     LSTMPredictionRequest,
     LSTMPredictionResponse
 )
 from ..services.ml_optimization_service import MLOptimizationService
+from ..services.optimization_job_service import OptimizationJobService, TERMINAL_STATUSES
 
 
 logger = logging.getLogger(__name__)
@@ -26,7 +32,7 @@ router = APIRouter(prefix="/api/v1", tags=["ml-optimizer"])
 
 
 
-@router.post("/optimize/genetic", response_model=MLOptimizationResponse)
+@router.post("/optimize/genetic", response_model=MLJobResponse, status_code=202)
 async def run_genetic_optimization(
     request: MLOptimizationRequest,
     db: Session = Depends(get_db)
@@ -34,7 +40,9 @@ async def run_genetic_optimization(
     """
     Run genetic algorithm optimization (NSGA-II)
     
-    Multi-objective optimization that finds Pareto-optimal solutions
+    Multi-objective optimization that finds Pareto-optimal solutions.
+    The run is queued as a background job; poll
+    `/optimize/{optimization_id}/status` or stream `/optimize/{optimization_id}/stream`.
     
     Example:
     ```json
@@ -54,27 +62,11 @@ async def run_genetic_optimization(
     logger.info(f"Genetic optimization request: {request.backtest_id}")
     
     try:
-        service = MLOptimizationService(db)
-        
-        # Define evaluation function (placeholder)
-        def evaluate(params):
-            # TODO: Implement actual backtest evaluation
-            return {
-                'net_profit': 10000,
-                'max_drawdown': 15.0
-            }
-        
-        result = service.run_genetic_optimization(
-            backtest_id=request.backtest_id,
-            parameters=request.parameters,
-            objectives=request.objectives,
-            evaluation_function=evaluate,
-            population_size=request.population_size,
-            generations=request.generations
-        )
-        
-        return MLOptimizationResponse(**result)
+        service = OptimizationJobService(db)
+        result = service.submit('genetic', request.model_dump(mode='json'))
         
+        return MLJobResponse(**result)
+    
     except Exception as e:
         logger.error(f"Error in genetic optimization: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -82,7 +74,7 @@ async def run_genetic_optimization(
 
 
 
-@router.post("/optimize/bayesian")
+@router.post("/optimize/bayesian", response_model=MLJobResponse, status_code=202)
 async def run_bayesian_optimization(
     request: MLOptimizationRequest,
     db: Session = Depends(get_db)
@@ -90,26 +82,17 @@ async def run_bayesian_optimization(
     """
     Run Bayesian optimization
     
-    Efficient single-objective optimization using Gaussian Process
+    Efficient single-objective optimization using Gaussian Process.
+    The run is queued as a background job.
     """
     logger.info(f"Bayesian optimization request: {request.backtest_id}")
     
     try:
-        service = MLOptimizationService(db)
-        
-        # Define evaluation function
-        def evaluate(params):
-            return {'net_profit': 10000}
-        
-        result = service.run_bayesian_optimization(
-            backtest_id=request.backtest_id,
-            parameters=request.parameters,
-            objective=request.objectives[0],  # Single objective
-            evaluation_function=evaluate
-        )
-        
-        return result
+        service = OptimizationJobService(db)
+        result = service.submit('bayesian', request.model_dump(mode='json'))
         
+        return MLJobResponse(**result)
+    
     except Exception as e:
         logger.error(f"Error in Bayesian optimization: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -117,8 +100,149 @@ async def run_bayesian_optimization(
 
 
 
+@router.get("/optimize/{optimization_id}/status", response_model=MLJobStatus)
+async def get_optimization_status(
+    optimization_id: UUID,
+    db: Session = Depends(get_db)
+):
+    """Get status and latest Pareto-front / convergence snapshot of an optimization"""
+    try:
+        service = OptimizationJobService(db)
+        return MLJobStatus(**service.get_status(optimization_id))
+    
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+
+
+@router.get("/optimize/{optimization_id}/results")
+async def get_optimization_results(
+    optimization_id: UUID,
+    db: Session = Depends(get_db)
+):
+    """Get the final result of a completed optimization"""
+    try:
+        service = OptimizationJobService(db)
+        status = service.get_status(optimization_id)
+    
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    if status['status'] != 'completed':
+        raise HTTPException(
+            status_code=409,
+            detail=f"Optimization is {status['status']}"
+        )
+    
+    return service.get_results(optimization_id)
+
+
+
+
+@router.get("/optimize/{optimization_id}/convergence")
+async def get_optimization_convergence(
+    optimization_id: UUID,
+    db: Session = Depends(get_db)
+):
+    """
+    Get per-generation convergence history of a genetic optimization
+    
+    Columnar arrays (generation, evaluations, wall_time, hypervolume,
+    cache_hit_rate and mean/std/min/max per objective), updated as each
+    generation completes.
+    """
+    try:
+        service = OptimizationJobService(db)
+        convergence = service.get_convergence(optimization_id)
+    
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    if convergence is None:
+        raise HTTPException(status_code=404, detail="No convergence data recorded")
+    
+    return convergence
+
+
+
+
+@router.get("/optimize/{optimization_id}/stream")
+async def stream_optimization(optimization_id: UUID):
+    """
+    Stream status snapshots as Server-Sent Events
+    
+    An event is sent whenever the job's snapshot changes; the stream ends
+    when the optimization completes, fails or is cancelled.
+    """
+    def read_status():
+        db = SessionLocal()
+        try:
+            return OptimizationJobService(db).get_status(optimization_id)
+        finally:
+            db.close()
+    
+    try:
+        status = await asyncio.to_thread(read_status)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    async def events():
+        current = status
+        last_update = None
+        
+        while True:
+            if current['updated_at'] != last_update:
+                last_update = current['updated_at']
+                yield f"data: {json.dumps(current, default=str)}\n\n"
+            
+            if current['status'] in TERMINAL_STATUSES:
+                break
+            
+            await asyncio.sleep(settings.ML_JOB_STREAM_INTERVAL)
+            current = await asyncio.to_thread(read_status)
+    
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+
+
+@router.post("/optimize/{optimization_id}/cancel", response_model=MLJobResponse)
+async def cancel_optimization(
+    optimization_id: UUID,
+    db: Session = Depends(get_db)
+):
+    """Cancel an optimization; running jobs stop after the current generation"""
+    try:
+        service = OptimizationJobService(db)
+        return MLJobResponse(**service.cancel(optimization_id))
+    
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+
+
+@router.post("/optimize/{optimization_id}/resume", response_model=MLJobResponse, status_code=202)
+async def resume_optimization(
+    optimization_id: UUID,
+    db: Session = Depends(get_db)
+):
+    """Resume a failed or cancelled genetic optimization from its last generation checkpoint"""
+    try:
+        service = OptimizationJobService(db)
+        return MLJobResponse(**service.resume(optimization_id))
+    
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+
+
 @router.get("/features/{backtest_id}", response_model=FeatureImportanceResponse)
-async def analyze_features(
+def analyze_features(
     backtest_id: UUID,
     db: Session = Depends(get_db)
 ):
@@ -126,38 +250,48 @@ async def analyze_features(
     Analyze feature importance for trading data
     
     Returns most important features for predicting profitability
- """
-try:
+    """
+    try:
         service = MLOptimizationService(db)
         result = service.analyze_feature_importance(backtest_id)
         
         return FeatureImportanceResponse(**result)
-        
+    
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Error analyzing features: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+
+
 @router.post("/predict/lstm", response_model=LSTMPredictionResponse)
-async def predict_with_lstm(
+def predict_with_lstm(
     request: LSTMPredictionRequest,
     db: Session = Depends(get_db)
 ):
     """
     Make predictions using LSTM model
     
-    Predicts future price movements based on historical patterns
+    Predicts future price movements based on historical patterns. The first
+    request for a backtest trains a model; later ones reuse it from the
+    model registry until the backtest's candles change.
     """
     logger.info(f"LSTM prediction request: {request.backtest_id}")
     
     try:
-        # TODO: Implement LSTM prediction
-        return LSTMPredictionResponse(
-            predictions=[],
-            confidence_intervals=[],
-            model_accuracy=0.0
+        service = MLOptimizationService(db)
+        result = service.predict_lstm(
+            request.backtest_id,
+            request.features,
+            prediction_horizon=request.prediction_horizon
         )
         
+        return LSTMPredictionResponse(**result)
+    
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         logger.error(f"Error in LSTM prediction: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -22,15 +22,56 @@ class Settings(BaseSettings):
     GA_GENERATIONS: int = 50
     GA_CROSSOVER_PROB: float = 0.7
     GA_MUTATION_PROB: float = 0.2
+    GA_EVAL_WORKERS: int = 4  # individuals evaluated concurrently per generation
     
     # Bayesian Optimization
     BAYES_N_INITIAL_POINTS: int = 10
     BAYES_N_ITERATIONS: int = 50
+    BAYES_BATCH_SIZE: int = 4  # points proposed and evaluated concurrently per round
+    BAYES_BATCH_STRATEGY: str = "cl_min"  # constant liar: cl_min, cl_mean, cl_max
+    BAYES_WARM_START: bool = True  # seed from persisted evaluation cache results
+    BAYES_WARM_START_LIMIT: int = 500
+    
+    # Evaluation cache
+    EVAL_CACHE_MAX_SIZE: int = 10000
+    EVAL_CACHE_DECIMALS: int = 6
+    EVAL_CACHE_PERSISTENT: bool = False
+    
+    # Backtest evaluation
+    BACKTESTING_URL: str = "http://backtesting.trading-system.svc.cluster.local:8003"
+    BACKTEST_STRATEGY: str = "ema_crossover"  # used by the remote fallback
+    BACKTEST_REMOTE_TIMEOUT: float = 300.0
+    BACKTEST_REMOTE_MAX_CONNECTIONS: int = 8
+    INITIAL_BALANCE: float = 10000.0
+    
+    # Background jobs
+    ML_JOB_WORKERS: int = 2  # concurrent optimizations per pod
+    ML_JOB_STREAM_INTERVAL: float = 2.0  # seconds between stream polls
+    ML_JOB_HEARTBEAT_INTERVAL: int = 30  # seconds between heartbeats of a process's jobs
+    ML_JOB_STALE_AFTER: int = 300  # seconds without a heartbeat before a job counts as interrupted
+    
+    # Feature engineering
+    FEATURE_CACHE_MAX_ENTRIES: int = 32  # feature frames kept per process
+    FEATURE_TIMEFRAME: str = "1h"  # candle resample rule
+    FEATURE_SELECTION_METHOD: str = "permutation"  # permutation, random_forest
+    FEATURE_SELECTION_MAX_ROWS: int = 20000  # row sample for fitting and scoring
+    FEATURE_SELECTION_HOLDOUT: float = 0.2  # latest rows used for scoring
+    FEATURE_SELECTION_REPEATS: int = 5
+    FEATURE_SELECTION_N_JOBS: int = 4
+    FEATURE_SELECTION_MIN_ROWS: int = 100
+    
+    # Walk-forward analysis
+    WALK_FORWARD_WORKERS: int = 1  # window processes; 1 runs windows in-process
     
     # LSTM
     LSTM_EPOCHS: int = 50
     LSTM_BATCH_SIZE: int = 32
     LSTM_SEQUENCE_LENGTH: int = 60
+    LSTM_MODEL_DIR: str = "/tmp/ml-optimizer/models"  # trained weights and scalers
+    LSTM_MODEL_CACHE_MB: int = 256  # model weights kept in memory per process
+    LSTM_INFERENCE_RUNTIME: str = "tflite"  # tflite, keras
+    LSTM_TFLITE_QUANTIZATION: str = "dynamic"  # none, dynamic, int8
+    LSTM_TFLITE_THREADS: int = 2  # interpreter threads per model
     
     # API
     API_HOST: str = "0.0.0.0"
@@ -7,6 +7,8 @@ import logging
 
 from .config import settings
 from .api.routes import router
+from .models.database import init_db, SessionLocal
+from .services.optimization_job_service import OptimizationJobService, shutdown_executor, start_heartbeat
 
 # Configure logging
 logging.basicConfig(
@@ -16,6 +18,9 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Initialize database
+init_db()
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
@@ -39,11 +44,21 @@ app.include_router(router)
 @app.on_event("startup")
 async def startup_event():
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
+    
+    # Jobs whose worker stopped heartbeating can never finish; the
+    # heartbeat keeps this process's jobs fresh and repeats the recovery
+    db = SessionLocal()
+    try:
+        OptimizationJobService(db).recover_interrupted_jobs()
+    finally:
+        db.close()
+    start_heartbeat()
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down ML optimizer service")
+    shutdown_executor()
 
 
 @app.get("/")
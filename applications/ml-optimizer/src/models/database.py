@@ -1,8 +1,12 @@
 """
 Database models for ML optimizer service
 """
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, Column, String, Integer, BigInteger, DECIMAL, TIMESTAMP, Text, Boolean, LargeBinary
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import sessionmaker, deferred
+from datetime import datetime
+import uuid
 
 from ..config import settings
 
@@ -12,6 +16,100 @@ engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
 # Create session
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Base class
+Base = declarative_base()
+
+
+
+
+class EvaluationCacheEntry(Base):
+    """Persisted evaluation result for a (backtest, parameters, objectives) key"""
+    __tablename__ = "ml_evaluation_cache"
+    
+    cache_key = Column(String(64), primary_key=True)  # sha256 of the cache key
+    backtest_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    
+    # Also part of the key; stored so warm starts can select comparable results
+    strategy_name = Column(String(255))
+    evaluator = Column(String(100))  # evaluation path identity, e.g. trade-replay-v3
+    
+    parameters = Column(JSONB, nullable=False)
+    objectives = Column(JSONB, nullable=False)
+    results = Column(JSONB, nullable=False)
+    
+    created_at = Column(TIMESTAMP, default=datetime.utcnow)
+
+
+
+
+class MLOptimizationJob(Base):
+    """Background genetic / Bayesian optimization run"""
+    __tablename__ = "ml_optimization_jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    backtest_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    
+    algorithm = Column(String(50), nullable=False)  # genetic, bayesian
+    request = Column(JSONB, nullable=False)
+    
+    status = Column(String(50), default='pending')  # pending, running, completed, failed, cancelled
+    progress_percent = Column(DECIMAL(5, 2), default=0)
+    cancel_requested = Column(Boolean, default=False)
+    worker_id = Column(String(255))  # hostname of the pod running the job
+    
+    # Latest incremental snapshot, convergence history and final result
+    snapshot = Column(JSONB)
+    convergence = deferred(Column(JSONB))
+    result = Column(JSONB)
+    error_message = Column(Text)
+    
+    # Genetic runs: state after the last completed generation (.npz blob)
+    checkpoint = deferred(Column(LargeBinary))
+    checkpoint_generation = Column(Integer)
+    
+    created_at = Column(TIMESTAMP, default=datetime.utcnow)
+    started_at = Column(TIMESTAMP)
+    updated_at = Column(TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = Column(TIMESTAMP)
+
+
+
+
+class Backtest(Base):
+    """Backtest model (read-only)"""
+    __tablename__ = "backtests"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    initial_balance = Column(DECIMAL(18, 2))
+
+
+
+
+class Trade(Base):
+    """Trade model (read-only)"""
+    __tablename__ = "trades"
+    
+    id = Column(BigInteger, primary_key=True)
+    backtest_id = Column(UUID(as_uuid=True), nullable=False)
+    
+    open_time = Column(TIMESTAMP)
+    close_time = Column(TIMESTAMP)
+    
+    symbol = Column(String(20))
+    direction = Column(String(10))
+    
+    entry_price = Column(DECIMAL(18, 8))
+    exit_price = Column(DECIMAL(18, 8))
+    volume = Column(DECIMAL(18, 8))
+    
+    profit = Column(DECIMAL(18, 8))
+    pips = Column(DECIMAL(10, 2))
+    
+    stop_loss = Column(DECIMAL(18, 8))
+    take_profit = Column(DECIMAL(18, 8))
+
+
+
 
 # Database dependency
 def get_db():
@@ -21,3 +119,14 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+
+
+# Create tables
+def init_db():
+    """Initialize database tables owned by this service"""
+    Base.metadata.create_all(
+        bind=engine,
+        tables=[EvaluationCacheEntry.__table__, MLOptimizationJob.__table__]
+    )
@@ -15,6 +15,7 @@ class MLOptimizationRequest(BaseModel):
     algorithm: str = Field(default="genetic", pattern="^(genetic|bayesian|ensemble)$")
     objectives: List[str] = Field(default=["net_profit", "max_drawdown"])
     parameters: List[Dict[str, Any]]
+    strategy_name: Optional[str] = None  # strategy for parameters the trade replay cannot score
     population_size: Optional[int] = 100
     generations: Optional[int] = 50
     
@@ -54,6 +55,7 @@ class MLOptimizationResponse(BaseModel):
     generations_completed: int
     pareto_front: List[ParetoSolution]
     best_solution: Dict[str, Any]
+    cache_stats: Optional[Dict[str, Any]] = None
     
     class Config:
         json_schema_extra = {
@@ -75,6 +77,34 @@ class MLOptimizationResponse(BaseModel):
 
 
 
+class MLJobResponse(BaseModel):
+    """Response when an optimization job is queued or cancelled"""
+    optimization_id: UUID
+    algorithm: str
+    status: str
+    message: str
+
+
+
+
+class MLJobStatus(BaseModel):
+    """Status of a background optimization job"""
+    optimization_id: UUID
+    backtest_id: UUID
+    algorithm: str
+    status: str
+    progress_percent: float
+    checkpoint_generation: Optional[int] = None
+    snapshot: Optional[Dict[str, Any]] = None
+    error_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+
+
+
+
 class FeatureImportanceResponse(BaseModel):
     """Feature importance analysis"""
     features: List[Dict[str, float]]
@@ -0,0 +1,276 @@
+"""
+Backtest evaluator - Scores candidate parameters for the optimizers
+"""
+from typing import Dict, Any, Optional
+from uuid import UUID
+import logging
+import httpx
+import numpy as np
+from sqlalchemy.orm import Session
+
+
+from ..models.database import Trade, Backtest
+from ..config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+
+
+class BacktestEvaluator:
+    """
+    Evaluation function backed by the backtest's recorded trades
+    
+    Trades are loaded once per optimization into NumPy arrays. Candidates
+    that only tighten trade exits (stop_loss, take_profit in pips, no wider
+    than any trade's recorded levels) are scored by replaying those arrays
+    in-process. Wider levels or any other parameter need the full strategy,
+    so those candidates fall back to the backtesting service over a pooled
+    HTTP client.
+    
+    Remote evaluation is not batched: the backtesting service only exposes
+    single-run POST /api/v1/backtest. Each candidate is one request on the
+    keep-alive pool, and a generation's (GA_EVAL_WORKERS) or round's
+    (BAYES_BATCH_SIZE) candidates are sent concurrently instead.
+    """
+    
+    # Parameters the in-process replay understands
+    FAST_PARAMETERS = {'stop_loss', 'take_profit'}
+    
+    # Evaluation path identities for cache keys; bump the replay version
+    # whenever its results change so persisted entries are not reused
+    REPLAY_IDENTITY = 'trade-replay-v3'
+    REMOTE_IDENTITY = 'remote-backtest-v2'
+    
+    def __init__(
+        self,
+        db: Session,
+        backtest_id: UUID,
+        strategy_name: Optional[str] = None
+    ):
+        self.db = db
+        self.backtest_id = backtest_id
+        self.strategy_name = strategy_name or settings.BACKTEST_STRATEGY
+        
+        # One keep-alive client per optimization; concurrent remote
+        # evaluations (GA workers, Bayesian rounds) share its pool
+        self._client = httpx.Client(
+            base_url=settings.BACKTESTING_URL,
+            timeout=settings.BACKTEST_REMOTE_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=settings.BACKTEST_REMOTE_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.BACKTEST_REMOTE_MAX_CONNECTIONS
+            )
+        )
+        
+        self._load_trades()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _load_trades(self):
+        """Load trades into memory-resident arrays (one query per optimization)"""
+        logger.info(f"Loading trades for backtest {self.backtest_id}")
+        
+        rows = self.db.query(
+            Trade.symbol,
+            Trade.direction,
+            Trade.entry_price,
+            Trade.exit_price,
+            Trade.profit,
+            Trade.pips,
+            Trade.stop_loss,
+            Trade.take_profit
+        ).filter(
+            Trade.backtest_id == self.backtest_id
+        ).order_by(Trade.open_time).all()
+        
+        if not rows:
+            raise ValueError(f"No trades found for backtest {self.backtest_id}")
+        
+        backtest = self.db.query(Backtest.initial_balance).filter(
+            Backtest.id == self.backtest_id
+        ).first()
+        self.initial_balance = float(backtest.initial_balance) if backtest and backtest.initial_balance else settings.INITIAL_BALANCE
+        
+        n = len(rows)
+        self.profit = np.zeros(n)
+        self.pips = np.zeros(n)
+        
+        # Recorded exit levels as distances in pips (inf: no level recorded)
+        stop_pips = np.full(n, np.inf)
+        target_pips = np.full(n, np.inf)
+        
+        for i, (symbol, direction, entry, exit_, profit, pips, stop, target) in enumerate(rows):
+            self.profit[i] = float(profit) if profit is not None else 0.0
+            pip_size = 0.01 if symbol and 'JPY' in symbol.upper() else 0.0001
+            
+            if pips is not None:
+                self.pips[i] = float(pips)
+            elif entry is not None and exit_ is not None:
+                # Derive pips from prices when the export did not include them
+                sign = 1.0 if (direction or '').upper() == 'BUY' else -1.0
+                self.pips[i] = (float(exit_) - float(entry)) * sign / pip_size
+            
+            if entry is not None and stop is not None:
+                stop_pips[i] = abs(float(entry) - float(stop)) / pip_size
+            if entry is not None and target is not None:
+                target_pips[i] = abs(float(target) - float(entry)) / pip_size
+        
+        # Widest levels the replay can score: a level beyond a trade's own
+        # would have kept that trade open past its recorded exit (rounded
+        # like the pips column, so float noise does not exclude the level)
+        self.max_replay_stop = round(float(stop_pips.min()), 2)
+        self.max_replay_target = round(float(target_pips.min()), 2)
+        
+        # Money per pip for each trade (0 where the trade moved no pips)
+        self.profit_per_pip = np.divide(
+            self.profit, self.pips,
+            out=np.zeros(n),
+            where=self.pips != 0
+        )
+        
+        logger.info(f"Loaded {n} trades")
+    
+    def evaluate(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Evaluate a parameter set
+        
+        Args:
+            params: Parameter dictionary
+        
+        Returns:
+            Dictionary of backtest metrics
+        """
+        if self._replayable(params):
+            return self._replay_trades(params)
+        
+        return self._remote_backtest(params)
+    
+    def identity(self, params: Dict[str, Any]) -> str:
+        """Evaluation path params take, for evaluation cache keys"""
+        return self.REPLAY_IDENTITY if self._replayable(params) else self.REMOTE_IDENTITY
+    
+    def _replayable(self, params: Dict[str, Any]) -> bool:
+        """Whether params only tighten exits, so the recorded trades can be replayed"""
+        if not set(params) <= self.FAST_PARAMETERS:
+            return False
+        
+        stop_loss = params.get('stop_loss')
+        take_profit = params.get('take_profit')
+        
+        return (
+            (stop_loss is None or float(stop_loss) <= self.max_replay_stop)
+            and (take_profit is None or float(take_profit) <= self.max_replay_target)
+        )
+    
+    def _replay_trades(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Replay recorded trades with tighter stop loss / take profit levels
+        
+        A trade that finished beyond a level must have crossed it on the way,
+        so its result in pips is clipped to [-stop_loss, take_profit] and
+        converted back to money with the trade's own profit per pip.
+        
+        This is an approximation. Trades store no adverse or favourable
+        excursion, so a trade that crossed a tighter level intra-trade but
+        closed inside it keeps its recorded result. A winner that dipped
+        through a tighter stop still counts as a winner (optimistic). A loser
+        that touched a tighter target still counts as a loser (pessimistic).
+        Only called for levels no wider than any trade's own (`_replayable`).
+        """
+        pips = self.pips
+        
+        if params.get('stop_loss') is not None:
+            pips = np.maximum(pips, -float(params['stop_loss']))
+        if params.get('take_profit') is not None:
+            pips = np.minimum(pips, float(params['take_profit']))
+        
+        profit = np.where(self.pips != 0, pips * self.profit_per_pip, self.profit)
+        
+        return self._calculate_metrics(profit)
+    
+    def _calculate_metrics(self, profit: np.ndarray) -> Dict[str, Any]:
+        """
+        Calculate the metrics the optimizers can use as objectives
+        
+        Drawdown is reported in percent of peak equity (max_drawdown and
+        max_drawdown_percent), the unit the backtesting service uses, so
+        replayed and remote candidates rank on the same scale.
+        """
+        total_trades = len(profit)
+        winning_trades = int(np.count_nonzero(profit > 0))
+        losing_trades = int(np.count_nonzero(profit < 0))
+        
+        gross_profit = float(profit[profit > 0].sum())
+        gross_loss = float(-profit[profit < 0].sum())
+        net_profit = float(profit.sum())
+        
+        # Equity curve and drawdown
+        equity = self.initial_balance + np.cumsum(profit)
+        peak = np.maximum.accumulate(np.concatenate(([self.initial_balance], equity)))[1:]
+        drawdown = peak - equity
+        max_drawdown_percent = float((drawdown / peak).max() * 100) if total_trades else 0.0
+        
+        # Per-trade Sharpe ratio on returns relative to equity before the trade
+        equity_before = equity - profit
+        returns = np.divide(profit, equity_before, out=np.zeros(total_trades), where=equity_before > 0)
+        std = returns.std()
+        sharpe_ratio = float(returns.mean() / std * np.sqrt(total_trades)) if std > 0 else 0.0
+        
+        return {
+            'total_trades': total_trades,
+            'winning_trades': winning_trades,
+            'losing_trades': losing_trades,
+            'win_rate': round(winning_trades / total_trades * 100, 2) if total_trades else 0.0,
+            'gross_profit': round(gross_profit, 2),
+            'gross_loss': round(gross_loss, 2),
+            'net_profit': round(net_profit, 2),
+            'profit_factor': round(gross_profit / gross_loss, 4) if gross_loss > 0 else 0.0,
+            'sharpe_ratio': round(sharpe_ratio, 4),
+            'max_drawdown': round(max_drawdown_percent, 4),
+            'max_drawdown_percent': round(max_drawdown_percent, 4)
+        }
+    
+    def _remote_backtest(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run a full strategy backtest on the backtesting service
+        
+        The backtest starts from the recorded backtest's initial balance. The
+        service's max_drawdown is the backtrader drawdown in percent, which
+        is also the unit of the replay's max_drawdown.
+        """
+        response = self._client.post(
+            "/api/v1/backtest",
+            json={
+                'backtest_id': str(self.backtest_id),
+                'strategy_name': self.strategy_name,
+                'parameters': {k: _to_builtin(v) for k, v in params.items()},
+                'initial_cash': self.initial_balance
+            }
+        )
+        response.raise_for_status()
+        
+        # Optimizers need numbers; the service reports missing metrics as null
+        metrics = {
+            key: (0.0 if value is None else value)
+            for key, value in response.json().items()
+        }
+        metrics['max_drawdown_percent'] = metrics.get('max_drawdown', 0.0)
+        
+        return metrics
+    
+    def close(self):
+        """Release the HTTP connection pool"""
+        self._client.close()
+
+
+
+
+def _to_builtin(value: Any) -> Any:
+    """Convert NumPy scalars proposed by the optimizers to JSON-safe values"""
+    return value.item() if isinstance(value, np.generic) else value
@@ -0,0 +1,260 @@
+"""
+Evaluation cache - Memoizes backtest evaluations across optimizers
+"""
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from uuid import UUID
+import hashlib
+import json
+import logging
+import threading
+
+
+from ..models.database import SessionLocal, EvaluationCacheEntry
+
+
+logger = logging.getLogger(__name__)
+
+
+
+
+class DatabaseEvaluationStore:
+    """Persistent evaluation store backed by the ml_evaluation_cache table"""
+    
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Fetch stored results for a hashed cache key"""
+        db = SessionLocal()
+        try:
+            entry = db.query(EvaluationCacheEntry).filter(
+                EvaluationCacheEntry.cache_key == cache_key
+            ).first()
+            return entry.results if entry else None
+        finally:
+            db.close()
+    
+    def put(
+        self,
+        cache_key: str,
+        backtest_id: UUID,
+        parameters: Dict[str, Any],
+        objectives: List[str],
+        results: Dict[str, Any],
+        strategy_name: str = '',
+        evaluator: str = ''
+    ):
+        """Store results for a hashed cache key"""
+        db = SessionLocal()
+        try:
+            db.merge(EvaluationCacheEntry(
+                cache_key=cache_key,
+                backtest_id=backtest_id,
+                strategy_name=strategy_name,
+                evaluator=evaluator,
+                parameters=parameters,
+                objectives=objectives,
+                results=results
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Could not persist evaluation {cache_key}: {e}")
+        finally:
+            db.close()
+
+
+
+
+class EvaluationLRU:
+    """Thread-safe in-process LRU of evaluation results"""
+    
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple) -> Optional[Dict[str, Any]]:
+        """Return the entry for key and mark it most recently used"""
+        with self._lock:
+            results = self._entries.get(key)
+            if results is not None:
+                self._entries.move_to_end(key)
+            return results
+    
+    def put(self, key: Tuple, results: Dict[str, Any]):
+        """Insert an entry, evicting the least recently used when full"""
+        with self._lock:
+            self._entries[key] = results
+            self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+
+
+_shared_lru: Optional[EvaluationLRU] = None
+
+
+def get_shared_lru(max_size: int = 10000) -> EvaluationLRU:
+    """Process-wide LRU shared by every optimization run"""
+    global _shared_lru
+    if _shared_lru is None:
+        _shared_lru = EvaluationLRU(max_size=max_size)
+    return _shared_lru
+
+
+
+
+class EvaluationCache:
+    """
+    Memoizes evaluation_function results for one optimization run
+    
+    Entries are keyed on (backtest_id, strategy, evaluator, rounded parameter
+    vector, objective set), so GA and Bayesian runs on the same backtest and
+    strategy can share one in-process LRU, while different strategies or
+    evaluation paths never see each other's metrics. Results are optionally
+    mirrored to a persistent store that survives restarts. Hit/miss counters
+    are kept per run.
+    """
+    
+    def __init__(
+        self,
+        backtest_id: UUID,
+        parameters: List[Dict[str, Any]],
+        objectives: List[str],
+        lru: Optional[EvaluationLRU] = None,
+        decimals: int = 6,
+        store: Optional[DatabaseEvaluationStore] = None,
+        strategy_name: Optional[str] = None,
+        evaluator: Optional[Callable[[Dict[str, Any]], str]] = None
+    ):
+        """
+        Args:
+            backtest_id: Backtest the parameters are scored on
+            parameters: Search space (names and types)
+            objectives: Objectives stored with each result
+            lru: In-process LRU, usually the shared one
+            decimals: Rounding of float parameters in the key
+            store: Persistent store mirrored on every put
+            strategy_name: Strategy the parameters belong to
+            evaluator: Returns the identity of the evaluation path a
+                parameter set takes (e.g. trade replay or remote backtest)
+        """
+        self.backtest_id = backtest_id
+        self.parameters = parameters
+        self.objectives = tuple(sorted(objectives))
+        self.lru = lru if lru is not None else EvaluationLRU()
+        self.decimals = decimals
+        self.store = store
+        self.strategy_name = strategy_name or ''
+        self.evaluator = evaluator
+        
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.store_hits = 0
+        self.misses = 0
+    
+    def make_key(self, params: Dict[str, Any]) -> Tuple:
+        """
+        Build the cache key for a parameter dictionary
+        
+        Integer parameters are rounded to whole numbers and floats to
+        `decimals` places, so genomes that differ only by float noise share
+        a key.
+        """
+        vector = []
+        for param in self.parameters:
+            value = params[param['name']]
+            if param['type'] == 'int':
+                vector.append(int(round(value)))
+            else:
+                vector.append(round(float(value), self.decimals))
+        
+        evaluator = self.evaluator(params) if self.evaluator is not None else ''
+        
+        return (str(self.backtest_id), self.strategy_name, evaluator, tuple(vector), self.objectives)
+    
+    def _hash_key(self, key: Tuple) -> str:
+        """Stable hash of a cache key for the persistent store"""
+        backtest_id, strategy_name, evaluator, vector, objectives = key
+        names = [param['name'] for param in self.parameters]
+        payload = json.dumps(
+            [backtest_id, strategy_name, evaluator, dict(zip(names, vector)), list(objectives)],
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def get(self, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return cached results for params, or None"""
+        key = self.make_key(params)
+        
+        results = self.lru.get(key)
+        if results is not None:
+            with self._lock:
+                self.hits += 1
+            return results
+        
+        if self.store is not None:
+            results = self.store.get(self._hash_key(key))
+            if results is not None:
+                with self._lock:
+                    self.store_hits += 1
+                self.lru.put(key, results)
+                return results
+        
+        return None
+    
+    def put(self, params: Dict[str, Any], results: Dict[str, Any]):
+        """Cache results for params"""
+        key = self.make_key(params)
+        self.lru.put(key, results)
+        
+        if self.store is not None:
+            self.store.put(
+                self._hash_key(key),
+                self.backtest_id,
+                dict(zip([p['name'] for p in self.parameters], key[3])),
+                list(self.objectives),
+                results,
+                strategy_name=self.strategy_name,
+                evaluator=key[2]
+            )
+    
+    def evaluate(self, params: Dict[str, Any], evaluation_function: Callable) -> Dict[str, Any]:
+        """
+        Evaluate params through the cache
+        
+        Args:
+            params: Parameter dictionary
+            evaluation_function: Function called on a cache miss
+        
+        Returns:
+            Evaluation results
+        """
+        results = self.get(params)
+        if results is not None:
+            return results
+        
+        with self._lock:
+            self.misses += 1
+        
+        results = evaluation_function(params)
+        self.put(params, results)
+        
+        return results
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the optimization result"""
+        lookups = self.hits + self.store_hits + self.misses
+        
+        return {
+            'lookups': lookups,
+            'hits': self.hits,
+            'persistent_hits': self.store_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.hits + self.store_hits) / lookups, 4) if lookups > 0 else 0.0
+        }
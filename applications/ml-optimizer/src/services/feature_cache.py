@@ -0,0 +1,61 @@
+"""
+Feature cache - Reuses engineered feature frames across requests
+"""
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+import logging
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+
+
+class FeatureCache:
+    """
+    Thread-safe LRU shared by FeatureEngineer
+    
+    Holds feature frames keyed by (backtest_id, timeframe, feature-set hash),
+    stored as CachedFeatures (the frame, a fingerprint of its candles and the
+    incremental state to extend it), and feature importances keyed by
+    dataset hash.
+    """
+    
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple) -> Optional[Any]:
+        """Return the entry for key and mark it most recently used"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+    
+    def put(self, key: Tuple, entry: Any):
+        """Insert an entry, evicting the least recently used when full"""
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+
+
+_shared_cache: Optional[FeatureCache] = None
+
+
+def get_shared_feature_cache(max_entries: int = 32) -> FeatureCache:
+    """Process-wide feature cache shared by every request"""
+    global _shared_cache
+    if _shared_cache is None:
+        _shared_cache = FeatureCache(max_entries=max_entries)
+    return _shared_cache
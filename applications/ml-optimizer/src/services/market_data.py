@@ -0,0 +1,76 @@
+"""
+Market data loader - Builds OHLCV candles from a backtest's trades
+"""
+from typing import Tuple
+from uuid import UUID
+import logging
+import pandas as pd
+from sqlalchemy.orm import Session
+
+
+from ..models.database import Trade
+
+
+logger = logging.getLogger(__name__)
+
+
+
+
+class MarketDataLoader:
+    """Load candles for feature engineering and prediction"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def load_candles(self, backtest_id: UUID, timeframe: str = '1h') -> Tuple[pd.DataFrame, pd.Series]:
+        """
+        Resample a backtest's trade prices into OHLCV candles
+        
+        Args:
+            backtest_id: UUID of backtest
+            timeframe: pandas resample rule, e.g. '1h'
+        
+        Returns:
+            Candles and the profit of trades opened in each candle
+        """
+        logger.info(f"Loading candles for backtest {backtest_id} ({timeframe})")
+        
+        rows = self.db.query(
+            Trade.open_time,
+            Trade.entry_price,
+            Trade.exit_price,
+            Trade.volume,
+            Trade.profit
+        ).filter(
+            Trade.backtest_id == backtest_id,
+            Trade.open_time.isnot(None),
+            Trade.entry_price.isnot(None)
+        ).order_by(Trade.open_time).all()
+        
+        if not rows:
+            raise ValueError(f"No trades found for backtest {backtest_id}")
+        
+        trades = pd.DataFrame(rows, columns=['datetime', 'entry', 'exit', 'volume', 'profit'])
+        trades['datetime'] = pd.to_datetime(trades['datetime'])
+        for column in ['entry', 'exit', 'volume', 'profit']:
+            trades[column] = pd.to_numeric(trades[column], errors='coerce').astype(float)
+        trades['exit'] = trades['exit'].fillna(trades['entry'])
+        trades = trades.set_index('datetime')
+        
+        trades['high'] = trades[['entry', 'exit']].max(axis=1)
+        trades['low'] = trades[['entry', 'exit']].min(axis=1)
+        
+        resampled = trades.resample(timeframe)
+        candles = pd.DataFrame({
+            'open': resampled['entry'].first(),
+            'high': resampled['high'].max(),
+            'low': resampled['low'].min(),
+            'close': resampled['exit'].last(),
+            'volume': resampled['volume'].sum()
+        }).dropna()
+        
+        profit = resampled['profit'].sum().reindex(candles.index)
+        
+        logger.info(f"Created {len(candles)} candles from {len(trades)} trades")
+        
+        return candles, profit
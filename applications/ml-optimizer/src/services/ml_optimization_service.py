@@ -1,7 +1,7 @@
 """
 ML Optimization service - Main service for ML-based optimization
 """
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 from uuid import UUID, uuid4
 import logging
 from sqlalchemy.orm import Session
@@ -9,13 +9,21 @@ from sqlalchemy.orm import Session
 
 from ..algorithms.genetic_algorithm import GeneticOptimizer
 from ..algorithms.bayesian_optimizer import BayesianOptimizer
-from ..algorithms.feature_engineer import FeatureEngineer
+from ..algorithms.feature_engineer import FeatureEngineer, FEATURE_NAMES, data_version
+from ..models.database import EvaluationCacheEntry
+from .evaluation_cache import EvaluationCache, DatabaseEvaluationStore, get_shared_lru
+from .feature_cache import get_shared_feature_cache
+from .market_data import MarketDataLoader
 from ..config import settings
 
 
 logger = logging.getLogger(__name__)
 
 
+# Request shorthands for engineered feature columns
+LSTM_FEATURE_ALIASES = {'rsi': 'rsi_14', 'ema': 'ema_20', 'sma': 'sma_20', 'atr': 'atr_14'}
+
+
 
 
 class MLOptimizationService:
@@ -23,7 +31,9 @@ class MLOptimizationService:
     
     def __init__(self, db: Session):
         self.db = db
-        self.feature_engineer = FeatureEngineer()
+        self.feature_engineer = FeatureEngineer(
+            cache=get_shared_feature_cache(settings.FEATURE_CACHE_MAX_ENTRIES)
+        )
     
     def run_genetic_optimization(
         self,
@@ -32,7 +42,13 @@ class MLOptimizationService:
         objectives: List[str],
         evaluation_function,
         population_size: int = None,
-        generations: int = None
+        generations: int = None,
+        optimization_id: UUID = None,
+        progress_callback=None,
+        checkpoint_callback=None,
+        resume_from: bytes = None,
+        strategy_name: str = None,
+        evaluation_identity=None
     ) -> Dict[str, Any]:
         """
         Run genetic algorithm optimization
@@ -44,7 +60,13 @@ class MLOptimizationService:
             evaluation_function: Function to evaluate individuals
             population_size: Population size
             generations: Number of generations
-            
+            optimization_id: ID of the job running this optimization
+            progress_callback: Called after every generation
+            checkpoint_callback: Called with each generation's checkpoint
+            resume_from: Checkpoint to continue from
+            strategy_name: Strategy the parameters belong to (part of the cache key)
+            evaluation_identity: Maps params to the evaluation path they take (part of the cache key)
+        
         Returns:
             Optimization results
         """
@@ -58,15 +80,22 @@ class MLOptimizationService:
             population_size=population_size or settings.GA_POPULATION_SIZE,
             generations=generations or settings.GA_GENERATIONS,
             crossover_prob=settings.GA_CROSSOVER_PROB,
-            mutation_prob=settings.GA_MUTATION_PROB
+            mutation_prob=settings.GA_MUTATION_PROB,
+            cache=self._create_evaluation_cache(
+                backtest_id, parameters, objectives, strategy_name, evaluation_identity
+            ),
+            n_workers=settings.GA_EVAL_WORKERS
         )
         
         # Run optimization
-        results = optimizer.optimize()
+        results = optimizer.optimize(
+            progress_callback=progress_callback,
+            checkpoint_callback=checkpoint_callback,
+            resume_from=resume_from
+        )
         
-        # Store results in database
-        optimization_id = uuid4()
-        # TODO: Store in database
+        # Results are persisted by the job that runs this optimization
+        optimization_id = optimization_id or uuid4()
         
         return {
             'optimization_id': str(optimization_id),
@@ -81,7 +110,11 @@ class MLOptimizationService:
         parameters: List[Dict[str, Any]],
         objective: str,
         evaluation_function,
-        n_iterations: int = None
+        n_iterations: int = None,
+        optimization_id: UUID = None,
+        progress_callback=None,
+        strategy_name: str = None,
+        evaluation_identity=None
     ) -> Dict[str, Any]:
         """
         Run Bayesian optimization
@@ -92,26 +125,44 @@ class MLOptimizationService:
             objective: Single objective to optimize
             evaluation_function: Function to evaluate parameters
             n_iterations: Number of iterations
-            
+            optimization_id: ID of the job running this optimization
+            progress_callback: Called after every round of evaluations
+            strategy_name: Strategy the parameters belong to (part of the cache key)
+            evaluation_identity: Maps params to the evaluation path they take (part of the cache key)
+        
         Returns:
             Optimization results
         """
         logger.info(f"Starting Bayesian optimization for backtest {backtest_id}")
         
+        # Seed from earlier genetic/Bayesian evaluations of the same backtest and strategy
+        x0, y0 = [], []
+        if settings.BAYES_WARM_START:
+            x0, y0 = self._load_prior_evaluations(
+                backtest_id, parameters, objective, strategy_name, evaluation_identity
+            )
+        
         # Create optimizer
         optimizer = BayesianOptimizer(
             parameters=parameters,
             objective=objective,
             evaluation_function=evaluation_function,
             n_initial_points=settings.BAYES_N_INITIAL_POINTS,
-            n_iterations=n_iterations or settings.BAYES_N_ITERATIONS
+            n_iterations=n_iterations or settings.BAYES_N_ITERATIONS,
+            cache=self._create_evaluation_cache(
+                backtest_id, parameters, [objective], strategy_name, evaluation_identity
+            ),
+            batch_size=settings.BAYES_BATCH_SIZE,
+            batch_strategy=settings.BAYES_BATCH_STRATEGY,
+            x0=x0,
+            y0=y0
         )
         
         # Run optimization
-        results = optimizer.optimize()
+        results = optimizer.optimize(progress_callback=progress_callback)
         
-        # Store results
-        optimization_id = uuid4()
+        # Results are persisted by the job that runs this optimization
+        optimization_id = optimization_id or uuid4()
         
         return {
             'optimization_id': str(optimization_id),
@@ -120,6 +171,87 @@ class MLOptimizationService:
             **results
         }
     
+    def _load_prior_evaluations(
+        self,
+        backtest_id: UUID,
+        parameters: List[Dict[str, Any]],
+        objective: str,
+        strategy_name: str = None,
+        evaluation_identity=None
+    ) -> Tuple[List[List[Any]], List[float]]:
+        """
+        Load scored parameter sets from the persistent evaluation cache
+        
+        Only results this run's evaluator would reproduce are used: same
+        backtest and strategy, parameter names matching the search space
+        exactly, and a stored evaluation path equal to the one the point
+        would take now (a bumped replay version or another path is skipped).
+        Other stores of scored parameters (e.g. optimization_results, which
+        include simulated metrics and drawdown in money) are not comparable.
+        
+        Args:
+            backtest_id: UUID of backtest
+            parameters: Parameters being optimized
+            objective: Objective being optimized
+            strategy_name: Strategy the parameters belong to
+            evaluation_identity: Maps params to the evaluation path they take
+        
+        Returns:
+            Points in parameter order and their objective values
+        """
+        names = [param['name'] for param in parameters]
+        
+        rows = self.db.query(
+            EvaluationCacheEntry.parameters,
+            EvaluationCacheEntry.evaluator,
+            EvaluationCacheEntry.results
+        ).filter(
+            EvaluationCacheEntry.backtest_id == backtest_id,
+            EvaluationCacheEntry.strategy_name == (strategy_name or '')
+        ).order_by(
+            EvaluationCacheEntry.created_at.desc()
+        ).limit(settings.BAYES_WARM_START_LIMIT).all()
+        
+        x0, y0 = [], []
+        for row_parameters, evaluator, results in rows:
+            if not row_parameters or set(row_parameters) != set(names):
+                continue
+            
+            identity = evaluation_identity(row_parameters) if evaluation_identity is not None else ''
+            if evaluator != identity:
+                continue
+            
+            value = (results or {}).get(objective)
+            if value is None:
+                continue
+            
+            x0.append([row_parameters[name] for name in names])
+            y0.append(float(value))
+        
+        logger.info(f"Found {len(x0)} prior evaluations for backtest {backtest_id}")
+        
+        return x0, y0
+    
+    def _create_evaluation_cache(
+        self,
+        backtest_id: UUID,
+        parameters: List[Dict[str, Any]],
+        objectives: List[str],
+        strategy_name: str = None,
+        evaluation_identity=None
+    ) -> EvaluationCache:
+        """Create the evaluation cache for one optimization run"""
+        return EvaluationCache(
+            backtest_id=backtest_id,
+            parameters=parameters,
+            objectives=objectives,
+            lru=get_shared_lru(settings.EVAL_CACHE_MAX_SIZE),
+            decimals=settings.EVAL_CACHE_DECIMALS,
+            store=DatabaseEvaluationStore() if settings.EVAL_CACHE_PERSISTENT else None,
+            strategy_name=strategy_name,
+            evaluator=evaluation_identity
+        )
+    
     def analyze_feature_importance(
         self,
         backtest_id: UUID,
@@ -131,23 +263,144 @@ class MLOptimizationService:
         Args:
             backtest_id: UUID of backtest
             target: Target variable to predict
-            
+        
         Returns:
             Feature importance analysis
         """
         logger.info(f"Analyzing feature importance for backtest {backtest_id}")
         
         # Load data from database
-        # TODO: Implement data loading
+        candles, profit = MarketDataLoader(self.db).load_candles(backtest_id, settings.FEATURE_TIMEFRAME)
         
         # Create features
-        # df_features = self.feature_engineer.create_features(df)
+        df_features = self.feature_engineer.create_features(
+            candles,
+            backtest_id=backtest_id,
+            timeframe=settings.FEATURE_TIMEFRAME
+        )
+        
+        # Target: profit of trades opened in the candle, or the next value of a feature
+        if target == 'profit':
+            y = profit.reindex(df_features.index).fillna(0.0)
+        elif target in df_features.columns:
+            y = df_features[target].shift(-1)
+        else:
+            raise ValueError(f"Unknown target: {target}")
+        
+        valid = y.notna()
+        X = df_features.loc[valid, FEATURE_NAMES]
+        y = y[valid]
+        
+        if len(X) < settings.FEATURE_SELECTION_MIN_ROWS:
+            raise ValueError(f"Not enough candles for feature analysis ({len(X)})")
         
         # Select important features
-        # top_features = self.feature_engineer.select_features(X, y, top_n=20)
+        top_features = self.feature_engineer.select_features(
+            X,
+            y,
+            top_n=20,
+            method=settings.FEATURE_SELECTION_METHOD,
+            max_rows=settings.FEATURE_SELECTION_MAX_ROWS,
+            holdout=settings.FEATURE_SELECTION_HOLDOUT,
+            n_repeats=settings.FEATURE_SELECTION_REPEATS,
+            n_jobs=settings.FEATURE_SELECTION_N_JOBS
+        )
+        
+        importance = self.feature_engineer.feature_importance
+        
+        return {
+            'features': [
+                {name: round(float(importance[name]), 6)}
+                for name in sorted(importance, key=importance.get, reverse=True)
+            ],
+            'top_features': top_features,
+            'model_score': self.feature_engineer.model_score
+        }
+    
+    def predict_lstm(
+        self,
+        backtest_id: UUID,
+        features: List[str],
+        prediction_horizon: int = 30
+    ) -> Dict[str, Any]:
+        """
+        Forecast close prices with an LSTM trained on the backtest's candles
+        
+        Trained models are looked up in the model registry by (backtest,
+        features, sequence length, data version) and only trained on a miss,
+        so repeated requests on unchanged data skip training.
+        
+        Args:
+            backtest_id: UUID of backtest
+            features: Model inputs (candle columns, engineered features or aliases)
+            prediction_horizon: Number of candles to forecast
+        
+        Returns:
+            Predictions, confidence intervals and the model's holdout R2
+        """
+        # TensorFlow is only loaded once an LSTM prediction is requested
+        from ..algorithms.lstm_predictor import LSTMPredictor
+        from .model_registry import ModelKey, get_shared_model_registry
+        
+        logger.info(f"LSTM prediction for backtest {backtest_id}")
+        
+        candles, _ = MarketDataLoader(self.db).load_candles(backtest_id, settings.FEATURE_TIMEFRAME)
+        df_features = self.feature_engineer.create_features(
+            candles,
+            backtest_id=backtest_id,
+            timeframe=settings.FEATURE_TIMEFRAME
+        )
+        
+        # Close is the target, so it is always the first input
+        columns = [LSTM_FEATURE_ALIASES.get(name, name) for name in features]
+        unknown = [name for name in columns if name not in df_features.columns]
+        if unknown:
+            raise ValueError(f"Unknown LSTM features: {unknown}")
+        columns = ['close'] + [name for name in dict.fromkeys(columns) if name != 'close']
+        
+        data = df_features[columns].dropna()
+        sequence_length = settings.LSTM_SEQUENCE_LENGTH
+        if len(data) < 2 * sequence_length:
+            raise ValueError(f"Not enough candles for LSTM prediction ({len(data)})")
+        
+        def train():
+            predictor = LSTMPredictor(sequence_length=sequence_length, features=columns)
+            X_train, y_train, X_test, y_test = predictor.prepare_data(data, target_column='close')
+            predictor.build_model((sequence_length, len(columns)))
+            predictor.train(
+                X_train, y_train, X_test, y_test,
+                epochs=settings.LSTM_EPOCHS,
+                batch_size=settings.LSTM_BATCH_SIZE
+            )
+            metrics = predictor.evaluate(X_test, y_test)
+            
+            # Serve from the CPU runtime; metrics describe the exported model
+            if settings.LSTM_INFERENCE_RUNTIME == 'tflite':
+                keras_r2 = metrics['r2']
+                predictor.export_tflite(settings.LSTM_TFLITE_QUANTIZATION, representative=X_train)
+                metrics = predictor.evaluate(X_test, y_test)
+                metrics.update(keras_r2=keras_r2, quantization=settings.LSTM_TFLITE_QUANTIZATION)
+            
+            return predictor, metrics
+        
+        registry = get_shared_model_registry(
+            settings.LSTM_MODEL_DIR,
+            settings.LSTM_MODEL_CACHE_MB * 1024 * 1024
+        )
+        key = ModelKey(str(backtest_id), tuple(columns), sequence_length, data_version(candles))
+        model = registry.get_or_train(key, train)
+        predictor = model.predictor
+        predictor.tflite_threads = settings.LSTM_TFLITE_THREADS
+        
+        scaled, intervals = predictor.predict(predictor.latest_window(data), n_steps=prediction_horizon)
+        predictions = predictor.inverse_target(scaled)
+        intervals = predictor.inverse_target(intervals)
         
         return {
-            'features': [],  # TODO: Implement
-            'top_features': [],
-            'model_score': 0.0
+            'predictions': [float(value) for value in predictions],
+            'confidence_intervals': [
+                {'lower': float(lower), 'upper': float(upper)}
+                for lower, upper in intervals
+            ],
+            'model_accuracy': float(model.metadata.get('r2', 0.0))
         }
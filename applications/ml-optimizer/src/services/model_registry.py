@@ -0,0 +1,218 @@
+"""
+Model registry - Persists trained LSTM predictors and keeps hot ones in memory
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import hashlib
+import logging
+import os
+import shutil
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+
+
+class ModelKey(NamedTuple):
+    """Identity of a trained model"""
+    backtest_id: str
+    features: Tuple[str, ...]
+    sequence_length: int
+    data_version: str
+    
+    def family(self) -> str:
+        """Directory name shared by every data version of this model"""
+        spec = '|'.join(self.features) + f'|{self.sequence_length}'
+        return hashlib.sha256(spec.encode('utf-8')).hexdigest()[:16]
+
+
+
+
+class RegisteredModel(NamedTuple):
+    """A loaded predictor and what was recorded when it was trained"""
+    predictor: Any  # LSTMPredictor
+    metadata: Dict[str, Any]
+    nbytes: int
+
+
+
+
+class ModelRegistry:
+    """
+    Trained LSTM predictors on local disk with an in-process LRU in front
+    
+    Models live under `root/<backtest_id>/<features+sequence hash>/<data version>/`
+    and are loaded lazily. The LRU is bounded by the size of the model
+    weights rather than the number of models.
+    
+    Nothing is invalidated explicitly: callers key models by a hash of the
+    candles they train on, so new data for a backtest shows up as a new
+    data version on the next request. The older versions of that model are
+    then dropped from memory and disk.
+    """
+    
+    def __init__(
+        self,
+        root: str,
+        max_bytes: int = 256 * 1024 * 1024,
+        loader: Optional[Callable[[str], Tuple[Any, Dict[str, Any]]]] = None
+    ):
+        """
+        Args:
+            root: Directory holding the saved models
+            max_bytes: Budget for models held in memory (`memory_bytes()` of each)
+            loader: Reads a saved model directory into (predictor, metadata);
+                defaults to `LSTMPredictor.load`
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self.loader = loader or _load_lstm
+        self._entries: "OrderedDict[ModelKey, RegisteredModel]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        
+        # Per-model training locks with their number of holders and waiters
+        self._key_locks: Dict[ModelKey, Tuple[threading.Lock, int]] = {}
+    
+    def _path(self, key: ModelKey) -> str:
+        return os.path.join(self.root, key.backtest_id, key.family(), key.data_version)
+    
+    def get(self, key: ModelKey) -> Optional[RegisteredModel]:
+        """Return the model for key from memory or disk, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        
+        path = self._path(key)
+        if not os.path.isdir(path):
+            return None
+        
+        try:
+            predictor, metadata = self.loader(path)
+        except Exception as e:
+            logger.warning(f"Discarding unreadable model at {path}: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+        
+        logger.info(f"Loaded model {key.backtest_id}/{key.family()}/{key.data_version} from disk")
+        entry = RegisteredModel(predictor, metadata, predictor.memory_bytes())
+        self._remember(key, entry)
+        return entry
+    
+    def put(self, key: ModelKey, predictor: Any, metadata: Optional[Dict[str, Any]] = None) -> RegisteredModel:
+        """Persist a trained predictor and cache it"""
+        predictor.save(self._path(key), metadata)
+        entry = RegisteredModel(predictor, metadata or {}, predictor.memory_bytes())
+        self._remember(key, entry)
+        return entry
+    
+    def get_or_train(
+        self,
+        key: ModelKey,
+        train: Callable[[], Tuple[Any, Dict[str, Any]]]
+    ) -> RegisteredModel:
+        """
+        Return the model for key, training it at most once per process
+        
+        Older data versions of the same model are dropped first.
+        
+        Args:
+            key: Model identity
+            train: Called on a miss; returns the trained predictor and metadata
+        
+        Returns:
+            The registered model
+        """
+        self._drop_stale(key)
+        
+        with self._lock:
+            key_lock, users = self._key_locks.get(key, (threading.Lock(), 0))
+            self._key_locks[key] = (key_lock, users + 1)
+        
+        # Concurrent requests for one model wait for a single training run
+        try:
+            with key_lock:
+                entry = self.get(key)
+                if entry is None:
+                    logger.info(f"Training model for backtest {key.backtest_id} (data version {key.data_version})")
+                    predictor, metadata = train()
+                    entry = self.put(key, predictor, metadata)
+        finally:
+            # The last user removes the lock, so the map only holds models in flight
+            with self._lock:
+                key_lock, users = self._key_locks[key]
+                if users == 1:
+                    del self._key_locks[key]
+                else:
+                    self._key_locks[key] = (key_lock, users - 1)
+        
+        return entry
+    
+    def _drop_stale(self, key: ModelKey):
+        """Remove other data versions of key's model from memory and disk"""
+        with self._lock:
+            stale = [
+                other for other in self._entries
+                if other[:3] == key[:3] and other.data_version != key.data_version
+            ]
+            for other in stale:
+                self._forget(other)
+        
+        family = os.path.join(self.root, key.backtest_id, key.family())
+        if os.path.isdir(family):
+            for version in os.listdir(family):
+                if version != key.data_version:
+                    logger.info(f"Removing stale model {key.backtest_id}/{key.family()}/{version}")
+                    shutil.rmtree(os.path.join(family, version), ignore_errors=True)
+    
+    def _remember(self, key: ModelKey, entry: RegisteredModel):
+        """Insert into the LRU, evicting least recently used models over the byte budget"""
+        with self._lock:
+            if key in self._entries:
+                self._forget(key)
+            self._entries[key] = entry
+            self._bytes += entry.nbytes
+            
+            # Always keep the newest entry, even if it alone exceeds the budget
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                self._forget(next(iter(self._entries)))
+    
+    def _forget(self, key: ModelKey):
+        """Remove key from memory (caller holds the lock)"""
+        entry = self._entries.pop(key)
+        self._bytes -= entry.nbytes
+    
+    def keys(self) -> List[ModelKey]:
+        """Models currently in memory, least recently used first"""
+        with self._lock:
+            return list(self._entries)
+    
+    @property
+    def memory_bytes(self) -> int:
+        return self._bytes
+
+
+
+
+def _load_lstm(path: str) -> Tuple[Any, Dict[str, Any]]:
+    """Default loader; imports TensorFlow on first use"""
+    from ..algorithms.lstm_predictor import LSTMPredictor
+    
+    return LSTMPredictor.load(path)
+
+
+
+
+_shared_registry: Optional[ModelRegistry] = None
+
+
+def get_shared_model_registry(root: str, max_bytes: int) -> ModelRegistry:
+    """Process-wide model registry shared by every request"""
+    global _shared_registry
+    if _shared_registry is None:
+        _shared_registry = ModelRegistry(root, max_bytes=max_bytes)
+    return _shared_registry
@@ -0,0 +1,456 @@
+"""
+Optimization job service - Runs ML optimizations as background jobs
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional
+from uuid import UUID, uuid4
+from datetime import datetime, timedelta
+import logging
+import socket
+import threading
+import numpy as np
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+
+from ..models.database import SessionLocal, MLOptimizationJob
+from .backtest_evaluator import BacktestEvaluator
+from .ml_optimization_service import MLOptimizationService
+from ..config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# Jobs run on a small per-process pool; state lives in ml_optimization_jobs
+_executor = ThreadPoolExecutor(max_workers=settings.ML_JOB_WORKERS, thread_name_prefix="ml-job")
+
+# Owner token of this process; a restarted or replacement pod gets a new one
+WORKER_ID = f"{socket.gethostname()}-{uuid4().hex[:8]}"
+
+ACTIVE_STATUSES = ('pending', 'running')
+
+TERMINAL_STATUSES = ('completed', 'failed', 'cancelled')
+
+
+
+
+class OptimizationCancelled(Exception):
+    """Raised from the progress callback when a job was cancelled"""
+
+
+
+
+class OwnershipLost(Exception):
+    """Raised from the progress callback when another worker claimed the job"""
+
+
+
+
+class OptimizationJobService:
+    """Service for submitting and tracking background optimizations"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def submit(self, algorithm: str, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Persist a new job and queue it for execution
+        
+        Args:
+            algorithm: 'genetic' or 'bayesian'
+            request: JSON-serialized MLOptimizationRequest
+        
+        Returns:
+            Job information
+        """
+        job = MLOptimizationJob(
+            backtest_id=UUID(request['backtest_id']),
+            algorithm=algorithm,
+            request=request,
+            status='pending',
+            worker_id=WORKER_ID
+        )
+        
+        self.db.add(job)
+        self.db.commit()
+        self.db.refresh(job)
+        
+        _executor.submit(_run_job, job.id)
+        
+        logger.info(f"Queued {algorithm} optimization {job.id} for backtest {job.backtest_id}")
+        
+        return {
+            'optimization_id': str(job.id),
+            'algorithm': algorithm,
+            'status': job.status,
+            'message': f'{algorithm.capitalize()} optimization queued'
+        }
+    
+    def _get_job(self, optimization_id: UUID) -> MLOptimizationJob:
+        job = self.db.query(MLOptimizationJob).filter(
+            MLOptimizationJob.id == optimization_id
+        ).first()
+        
+        if not job:
+            raise ValueError(f"Optimization {optimization_id} not found")
+        
+        return job
+    
+    def get_status(self, optimization_id: UUID) -> Dict[str, Any]:
+        """Get status and latest snapshot of a job"""
+        job = self._get_job(optimization_id)
+        
+        return {
+            'optimization_id': str(job.id),
+            'backtest_id': str(job.backtest_id),
+            'algorithm': job.algorithm,
+            'status': job.status,
+            'progress_percent': float(job.progress_percent or 0),
+            'checkpoint_generation': job.checkpoint_generation,
+            'snapshot': job.snapshot,
+            'error_message': job.error_message,
+            'created_at': job.created_at,
+            'started_at': job.started_at,
+            'updated_at': job.updated_at,
+            'completed_at': job.completed_at
+        }
+    
+    def get_results(self, optimization_id: UUID) -> Dict[str, Any]:
+        """Get the final result of a completed job"""
+        job = self._get_job(optimization_id)
+        return job.result
+    
+    def get_convergence(self, optimization_id: UUID) -> Optional[Dict[str, Any]]:
+        """Get the per-generation convergence history recorded so far"""
+        job = self._get_job(optimization_id)
+        return job.convergence
+    
+    def cancel(self, optimization_id: UUID) -> Dict[str, Any]:
+        """Request cancellation; running jobs stop after the current generation/round"""
+        job = self._get_job(optimization_id)
+        
+        if job.status not in TERMINAL_STATUSES:
+            job.cancel_requested = True
+            if job.status == 'pending':
+                job.status = 'cancelled'
+                job.completed_at = datetime.utcnow()
+            self.db.commit()
+        
+        return {
+            'optimization_id': str(job.id),
+            'algorithm': job.algorithm,
+            'status': job.status,
+            'message': 'Cancellation requested' if job.status != 'cancelled' else 'Optimization cancelled'
+        }
+    
+    def resume(self, optimization_id: UUID) -> Dict[str, Any]:
+        """
+        Re-queue a failed or cancelled genetic run from its last checkpoint
+        
+        Raises:
+            ValueError: If the job does not exist
+            RuntimeError: If the job cannot be resumed
+        """
+        job = self._get_job(optimization_id)
+        
+        # A 'running' job that stopped heartbeating lost its worker
+        stale = (
+            job.status == 'running'
+            and job.updated_at is not None
+            and datetime.utcnow() - job.updated_at > timedelta(seconds=settings.ML_JOB_STALE_AFTER)
+        )
+        
+        if job.status not in ('failed', 'cancelled') and not stale:
+            raise RuntimeError(f"Optimization is {job.status}")
+        if job.checkpoint is None:
+            raise RuntimeError("Optimization has no checkpoint to resume from")
+        
+        # Claim the job only if nobody changed it since it was read, so two
+        # resume calls (or a late heartbeat) cannot start it twice
+        claimed = self.db.query(MLOptimizationJob).filter(
+            MLOptimizationJob.id == job.id,
+            MLOptimizationJob.status == job.status,
+            MLOptimizationJob.updated_at == job.updated_at
+        ).update({
+            'status': 'pending',
+            'cancel_requested': False,
+            'error_message': None,
+            'completed_at': None,
+            'worker_id': WORKER_ID,
+            'updated_at': datetime.utcnow()
+        }, synchronize_session=False)
+        self.db.commit()
+        
+        if not claimed:
+            raise RuntimeError("Optimization changed while resuming; try again")
+        
+        self.db.refresh(job)
+        _executor.submit(_run_job, job.id)
+        
+        logger.info(f"Resuming optimization {job.id} from generation {job.checkpoint_generation}")
+        
+        return {
+            'optimization_id': str(job.id),
+            'algorithm': job.algorithm,
+            'status': job.status,
+            'message': f'Resuming from generation {job.checkpoint_generation}'
+        }
+    
+    def recover_interrupted_jobs(self) -> int:
+        """
+        Fail jobs whose worker stopped heartbeating
+        
+        Every process bumps updated_at on its pending and running jobs every
+        ML_JOB_HEARTBEAT_INTERVAL seconds, so a job not updated for
+        ML_JOB_STALE_AFTER seconds lost its worker (pod evicted, restarted or
+        scaled down), whichever pod that was. One conditional UPDATE fails
+        them, so replicas recovering concurrently never handle a job twice.
+        
+        Returns:
+            Number of jobs marked failed
+        """
+        now = datetime.utcnow()
+        cutoff = now - timedelta(seconds=settings.ML_JOB_STALE_AFTER)
+        message = 'Interrupted: worker stopped heartbeating'
+        
+        count = self.db.query(MLOptimizationJob).filter(
+            MLOptimizationJob.status.in_(ACTIVE_STATUSES),
+            MLOptimizationJob.updated_at < cutoff
+        ).update({
+            'status': 'failed',
+            'error_message': case(
+                (MLOptimizationJob.checkpoint_generation.is_(None), message),
+                else_=func.concat(
+                    f'{message}; resumable from generation ',
+                    MLOptimizationJob.checkpoint_generation
+                )
+            ),
+            'completed_at': now,
+            'updated_at': now
+        }, synchronize_session=False)
+        self.db.commit()
+        
+        if count:
+            logger.warning(f"Marked {count} interrupted optimizations as failed")
+        
+        return count
+
+
+
+
+class _ProgressWriter:
+    """
+    Progress callback that persists snapshots and honours cancellation
+    
+    Every write is conditional on this process still owning the running
+    job. If the job was resumed elsewhere (or recovered as failed) the
+    write matches no row and the run stops with OwnershipLost, so two
+    workers never write the same row and checkpoint.
+    """
+    
+    def __init__(self, db: Session, job: MLOptimizationJob):
+        self.db = db
+        self.job = job
+    
+    def __call__(self, progress: Dict[str, Any]):
+        self.db.refresh(self.job)
+        if self.job.worker_id != WORKER_ID or self.job.status != 'running':
+            raise OwnershipLost()
+        if self.job.cancel_requested:
+            raise OptimizationCancelled()
+        
+        if 'generation' in progress:
+            percent = progress['generation'] / max(progress['generations'], 1) * 100
+        else:
+            percent = progress['evaluated'] / max(progress['n_iterations'], 1) * 100
+        
+        # Full convergence history goes to its own column; the snapshot
+        # keeps only the latest generation's row
+        progress = dict(progress)
+        convergence = progress.pop('convergence', None)
+        
+        fields = {
+            'progress_percent': round(percent, 2),
+            'snapshot': to_jsonable(progress)
+        }
+        if convergence is not None:
+            fields['convergence'] = to_jsonable(convergence)
+        
+        self._write(fields)
+    
+    def checkpoint(self, generation: int, data: bytes):
+        """Persist the checkpoint of a completed generation"""
+        self._write({'checkpoint': data, 'checkpoint_generation': generation})
+    
+    def _write(self, fields: Dict[str, Any]):
+        if not _write_owned(self.db, self.job.id, fields):
+            raise OwnershipLost()
+
+
+
+
+def _write_owned(db: Session, optimization_id: UUID, fields: Dict[str, Any]) -> bool:
+    """Update a running job only while this process owns it; False if it does not"""
+    written = db.query(MLOptimizationJob).filter(
+        MLOptimizationJob.id == optimization_id,
+        MLOptimizationJob.worker_id == WORKER_ID,
+        MLOptimizationJob.status == 'running'
+    ).update({**fields, 'updated_at': datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+    return bool(written)
+
+
+
+
+def _run_job(optimization_id: UUID):
+    """Execute a queued job in a worker thread"""
+    db = SessionLocal()
+    
+    try:
+        # Start only a pending job still assigned to this process
+        claimed = db.query(MLOptimizationJob).filter(
+            MLOptimizationJob.id == optimization_id,
+            MLOptimizationJob.status == 'pending',
+            MLOptimizationJob.worker_id == WORKER_ID
+        ).update({
+            'status': 'running',
+            'started_at': datetime.utcnow(),
+            'updated_at': datetime.utcnow()
+        }, synchronize_session=False)
+        db.commit()
+        
+        if not claimed:
+            return
+        
+        job = db.query(MLOptimizationJob).filter(MLOptimizationJob.id == optimization_id).first()
+        
+        request = job.request
+        service = MLOptimizationService(db)
+        callback = _ProgressWriter(db, job)
+        
+        with BacktestEvaluator(db, job.backtest_id, request.get('strategy_name')) as evaluator:
+            if job.algorithm == 'genetic':
+                result = service.run_genetic_optimization(
+                    backtest_id=job.backtest_id,
+                    parameters=request['parameters'],
+                    objectives=request['objectives'],
+                    evaluation_function=evaluator.evaluate,
+                    population_size=request.get('population_size'),
+                    generations=request.get('generations'),
+                    optimization_id=job.id,
+                    progress_callback=callback,
+                    checkpoint_callback=callback.checkpoint,
+                    resume_from=job.checkpoint,
+                    strategy_name=evaluator.strategy_name,
+                    evaluation_identity=evaluator.identity
+                )
+            else:
+                result = service.run_bayesian_optimization(
+                    backtest_id=job.backtest_id,
+                    parameters=request['parameters'],
+                    objective=request['objectives'][0],  # Single objective
+                    evaluation_function=evaluator.evaluate,
+                    optimization_id=job.id,
+                    progress_callback=callback,
+                    strategy_name=evaluator.strategy_name,
+                    evaluation_identity=evaluator.identity
+                )
+        
+        # checkpoint is only needed while the run can still resume
+        _finish(db, optimization_id, {
+            'result': to_jsonable(result),
+            'status': 'completed',
+            'progress_percent': 100,
+            'checkpoint': None
+        })
+    
+    except OptimizationCancelled:
+        logger.info(f"Optimization {optimization_id} cancelled")
+        db.rollback()
+        _finish(db, optimization_id, {'status': 'cancelled'})
+    
+    except OwnershipLost:
+        logger.warning(f"Optimization {optimization_id} was claimed elsewhere; stopping this run")
+        db.rollback()
+    
+    except Exception as e:
+        logger.error(f"Optimization {optimization_id} failed: {e}")
+        db.rollback()
+        _finish(db, optimization_id, {'status': 'failed', 'error_message': str(e)})
+    
+    finally:
+        db.close()
+
+
+
+
+def _finish(db: Session, optimization_id: UUID, fields: Dict[str, Any]):
+    """Record a terminal state, unless another worker owns the job by now"""
+    if not _write_owned(db, optimization_id, {**fields, 'completed_at': datetime.utcnow()}):
+        logger.warning(f"Optimization {optimization_id} is no longer owned here; final state not written")
+
+
+
+
+def to_jsonable(value: Any) -> Any:
+    """Recursively convert NumPy values so results can be stored as JSONB"""
+    if isinstance(value, dict):
+        return {str(k): to_jsonable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, UUID):
+        return str(value)
+    return value
+
+
+
+
+def _heartbeat():
+    """Mark this process's jobs alive and fail those of dead workers"""
+    db = SessionLocal()
+    try:
+        db.query(MLOptimizationJob).filter(
+            MLOptimizationJob.worker_id == WORKER_ID,
+            MLOptimizationJob.status.in_(ACTIVE_STATUSES)
+        ).update({'updated_at': datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+        
+        OptimizationJobService(db).recover_interrupted_jobs()
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Job heartbeat failed: {e}")
+    finally:
+        db.close()
+
+
+
+
+_heartbeat_stop = threading.Event()
+_heartbeat_thread: Optional[threading.Thread] = None
+
+
+def start_heartbeat():
+    """Start the per-process job heartbeat (called on application startup)"""
+    global _heartbeat_thread
+    if _heartbeat_thread is not None:
+        return
+    
+    def loop():
+        while not _heartbeat_stop.wait(settings.ML_JOB_HEARTBEAT_INTERVAL):
+            _heartbeat()
+    
+    _heartbeat_thread = threading.Thread(target=loop, name="ml-job-heartbeat", daemon=True)
+    _heartbeat_thread.start()
+
+
+
+
+def shutdown_executor():
+    """Stop accepting jobs and heartbeating on application shutdown"""
+    _heartbeat_stop.set()
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -2,14 +2,105 @@
 Walk-forward analysis service
 """
 import pandas as pd
-from typing import Dict, Any, List, Tuple
-from datetime import datetime, timedelta
+from typing import Dict, Any, List, Tuple, Callable, Optional, NamedTuple
+from concurrent.futures import ProcessPoolExecutor
 import logging
 
 
+from ..algorithms.genetic_algorithm import GeneticOptimizer
+from ..algorithms.bayesian_optimizer import BayesianOptimizer, MAXIMIZE_OBJECTIVES
+from ..config import settings
+
+
 logger = logging.getLogger(__name__)
 
 
+# rolling: fixed-length training window; anchored: training always starts at the first row
+WALK_FORWARD_MODES = ['rolling', 'anchored']
+
+
+# Set in each pool worker by _init_worker: the data and callbacks shared by all its windows
+_worker_context: Optional[Tuple[pd.DataFrame, Callable, Callable]] = None
+
+
+
+
+class WindowOptimization(NamedTuple):
+    """
+    What an optimization_function may return instead of bare parameters
+    
+    `state` is handed to the next window's optimization_function as
+    `warm_start` (e.g. the Pareto front to seed a GA population, or the
+    observations to seed a Bayesian surrogate).
+    """
+    parameters: Dict[str, Any]
+    evaluations: Optional[int] = None
+    state: Any = None
+
+
+
+
+def _run_window(
+    data: pd.DataFrame,
+    window: Dict[str, Any],
+    bounds: Tuple[int, int, int, int],
+    optimization_function: Callable,
+    backtest_function: Callable,
+    warm_start: bool = False,
+    previous: Optional[WindowOptimization] = None
+) -> Tuple[Dict[str, Any], WindowOptimization]:
+    """
+    Optimize on one window's training data and backtest on its test data
+    
+    `bounds` are row positions (train_lo, train_hi, test_lo, test_hi), so both
+    frames are positional slices of `data` (views, no masks or copies).
+    
+    Returns:
+        The window's result and its (normalized) optimization outcome
+    """
+    train_lo, train_hi, test_lo, test_hi = bounds
+    train_data = data.iloc[train_lo:train_hi]
+    test_data = data.iloc[test_lo:test_hi]
+    
+    # Optimize on training data
+    if warm_start:
+        optimization = optimization_function(train_data, warm_start=previous)
+    else:
+        optimization = optimization_function(train_data)
+    if not isinstance(optimization, WindowOptimization):
+        optimization = WindowOptimization(optimization)
+    
+    # Test on out-of-sample data
+    test_results = backtest_function(test_data, optimization.parameters)
+    
+    result = {
+        **window,
+        'optimal_parameters': optimization.parameters,
+        'test_performance': test_results,
+        'evaluations': optimization.evaluations,
+        'warm_started': previous is not None
+    }
+    
+    return result, optimization
+
+
+
+
+def _init_worker(data: pd.DataFrame, optimization_function: Callable, backtest_function: Callable):
+    """Pool initializer: keep one copy of the data per worker process"""
+    global _worker_context
+    _worker_context = (data, optimization_function, backtest_function)
+
+
+
+
+def _run_window_in_worker(task: Tuple[Dict[str, Any], Tuple[int, int, int, int]]) -> Dict[str, Any]:
+    data, optimization_function, backtest_function = _worker_context
+    window, bounds = task
+    result, _ = _run_window(data, window, bounds, optimization_function, backtest_function)
+    return result
+
+
 
 
 class WalkForwardService:
@@ -17,11 +108,13 @@ class WalkForwardService:
     Walk-forward analysis for strategy validation
     
     Splits data into training and testing windows, optimizes on training,
-    tests on out-of-sample data, then rolls forward
+    tests on out-of-sample data, then rolls forward. Windows are independent,
+    so with more than one worker they run in a process pool.
     """
     
-    def __init__(self):
+    def __init__(self, n_workers: Optional[int] = None):
         self.results = []
+        self.n_workers = n_workers if n_workers is not None else settings.WALK_FORWARD_WORKERS
     
     def run_walk_forward(
         self,
@@ -30,7 +123,9 @@ class WalkForwardService:
         backtest_function,
         train_period_days: int = 365,
         test_period_days: int = 90,
-        step_days: int = 90
+        step_days: int = 90,
+        mode: str = 'rolling',
+        warm_start: bool = False
     ) -> Dict[str, Any]:
         """
         Run walk-forward analysis
@@ -42,70 +137,142 @@ class WalkForwardService:
             train_period_days: Training period in days
             test_period_days: Testing period in days
             step_days: Step size in days
+            mode: 'rolling' (train on the last train_period_days) or
+                'anchored' (train on everything before the test window)
+            warm_start: Call optimization_function(train_data, warm_start=previous)
+                with the previous window's WindowOptimization (None for the
+                first); windows then run in order in this process
             
+        optimization_function returns parameters or a WindowOptimization;
+        the latter's evaluation count is reported per window. With
+        `n_workers` > 1 the callbacks and data must be picklable
+        (module-level functions), as they are sent to worker processes.
+        
         Returns:
             Walk-forward results
         """
-        logger.info(f"Starting walk-forward analysis")
-        logger.info(f"Train: {train_period_days} days, Test: {test_period_days} days, Step: {step_days} days")
+        if mode not in WALK_FORWARD_MODES:
+            raise ValueError(f"Unknown walk-forward mode: {mode}")
         
-        results = []
+        logger.info(f"Starting {mode} walk-forward analysis")
+        logger.info(f"Train: {train_period_days} days, Test: {test_period_days} days, Step: {step_days} days")
         
-        # Get date range
-        start_date = data.index.min()
-        end_date = data.index.max()
+        if not data.index.is_monotonic_increasing:
+            logger.warning("Walk-forward data is not sorted by time; sorting once")
+            data = data.sort_index()
         
-        current_date = start_date + timedelta(days=train_period_days)
+        windows = self._windows(data, train_period_days, test_period_days, step_days, mode)
+        n_workers = min(self.n_workers, len(windows))
         
-        iteration = 0
-        while current_date + timedelta(days=test_period_days) <= end_date:
-            iteration += 1
+        if warm_start:
+            # Each window seeds the next, so they run in order
+            results, previous = [], None
+            for window, bounds in windows:
+                result, previous = _run_window(
+                    data, window, bounds, optimization_function, backtest_function,
+                    warm_start=True, previous=previous
+                )
+                results.append(result)
+        elif n_workers > 1:
+            logger.info(f"Running {len(windows)} windows on {n_workers} worker processes")
             
-            # Define windows
-            train_start = current_date - timedelta(days=train_period_days)
-            train_end = current_date
-            test_start = current_date
-            test_end = current_date + timedelta(days=test_period_days)
-            
-            logger.info(f"Iteration {iteration}: Train {train_start.date()} to {train_end.date()}, Test {test_start.date()} to {test_end.date()}")
-            
-            # Split data
-            train_data = data[(data.index >= train_start) & (data.index < train_end)]
-            test_data = data[(data.index >= test_start) & (data.index < test_end)]
-            
-            # Optimize on training data
-            optimal_params = optimization_function(train_data)
-            
-            # Test on out-of-sample data
-            test_results = backtest_function(test_data, optimal_params)
-            
-            results.append({
-                'iteration': iteration,
-                'train_start': train_start,
-                'train_end': train_end,
-                'test_start': test_start,
-                'test_end': test_end,
-                'optimal_parameters': optimal_params,
-                'test_performance': test_results
-            })
-            
-            # Move forward
-            current_date += timedelta(days=step_days)
+            # Each worker receives the data once (inherited, not pickled, under
+            # fork) and then only window boundaries; map keeps window order
+            with ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=_init_worker,
+                initargs=(data, optimization_function, backtest_function)
+            ) as pool:
+                results = list(pool.map(_run_window_in_worker, windows))
+        else:
+            results = [
+                _run_window(data, window, bounds, optimization_function, backtest_function)[0]
+                for window, bounds in windows
+            ]
         
         # Aggregate results
         total_profit = sum(r['test_performance'].get('net_profit', 0) for r in results)
         avg_profit = total_profit / len(results) if results else 0
         
-        logger.info(f"Walk-forward complete: {len(results)} iterations, Total profit: {total_profit}")
+        counts = [r['evaluations'] for r in results if r['evaluations'] is not None]
+        total_evaluations = sum(counts) if counts else None
+        
+        logger.info(
+            f"Walk-forward complete: {len(results)} iterations, Total profit: {total_profit}, "
+            f"Evaluations: {total_evaluations}"
+        )
         
         return {
+            'mode': mode,
+            'warm_start': warm_start,
             'iterations': results,
             'total_iterations': len(results),
+            'total_evaluations': total_evaluations,
             'total_profit': total_profit,
             'average_profit': avg_profit,
             'consistency': self._calculate_consistency(results)
         }
     
+    def _windows(
+        self,
+        data: pd.DataFrame,
+        train_period_days: int,
+        test_period_days: int,
+        step_days: int,
+        mode: str = 'rolling'
+    ) -> List[Tuple[Dict[str, Any], Tuple[int, int, int, int]]]:
+        """
+        Every window's dates and row positions, in order
+        
+        Positions come from one `searchsorted` per boundary over the sorted
+        index (half-open [start, end) like the date ranges), instead of a
+        boolean mask over the whole index per window.
+        
+        Returns:
+            (window, (train_lo, train_hi, test_lo, test_hi)) pairs
+        """
+        if len(data) == 0:
+            return []
+        
+        # Get date range
+        start_date = data.index.min()
+        end_date = data.index.max()
+        
+        train = pd.Timedelta(days=train_period_days)
+        test = pd.Timedelta(days=test_period_days)
+        
+        # Split points between each training and test window
+        first = start_date + train
+        if first + test > end_date:
+            return []
+        count = int((end_date - test - first) // pd.Timedelta(days=step_days)) + 1
+        splits = pd.DatetimeIndex([first + i * pd.Timedelta(days=step_days) for i in range(count)])
+        
+        # Anchored windows all train from the first row
+        train_starts = splits - train if mode == 'rolling' else pd.DatetimeIndex([start_date] * count)
+        train_lo = data.index.searchsorted(train_starts, side='left')
+        split_pos = data.index.searchsorted(splits, side='left')
+        test_hi = data.index.searchsorted(splits + test, side='left')
+        
+        windows = []
+        for i, split in enumerate(splits):
+            window = {
+                'iteration': i + 1,
+                'train_start': train_starts[i],
+                'train_end': split,
+                'test_start': split,
+                'test_end': split + test
+            }
+            bounds = (int(train_lo[i]), int(split_pos[i]), int(split_pos[i]), int(test_hi[i]))
+            windows.append((window, bounds))
+            
+            logger.info(
+                f"Iteration {window['iteration']}: Train {window['train_start'].date()} to {window['train_end'].date()}, "
+                f"Test {window['test_start'].date()} to {window['test_end'].date()}"
+            )
+        
+        return windows
+    
     def _calculate_consistency(self, results: List[Dict[str, Any]]) -> float:
         """
         Calculate consistency score (% of profitable periods)
@@ -125,3 +292,147 @@ class WalkForwardService:
         )
         
         return profitable / len(results)
+
+
+
+
+class GeneticWindowOptimizer:
+    """
+    Walk-forward optimization_function running NSGA-II on each window
+    
+    When warm-started, the previous window's Pareto front seeds the initial
+    population and only `warm_generations` generations are run, since
+    consecutive training windows share most of their data.
+    """
+    
+    def __init__(
+        self,
+        parameters: List[Dict[str, Any]],
+        objectives: List[str],
+        evaluation_factory: Callable[[pd.DataFrame], Callable],
+        population_size: int = 100,
+        generations: int = 50,
+        warm_generations: Optional[int] = None,
+        crossover_prob: float = 0.7,
+        mutation_prob: float = 0.2,
+        seed_fraction: float = 0.5,
+        seed: Optional[int] = None
+    ):
+        """
+        Args:
+            parameters: Parameters to optimize
+            objectives: Objectives to optimize
+            evaluation_factory: Builds the evaluation function for a window's training data
+            population_size: Population size
+            generations: Generations for a cold start
+            warm_generations: Generations when seeded (default: half of generations)
+            crossover_prob: Crossover probability
+            mutation_prob: Mutation probability
+            seed_fraction: Largest share of the population taken from seeds
+            seed: RNG seed for each window's run (None: nondeterministic)
+        """
+        self.parameters = parameters
+        self.objectives = objectives
+        self.evaluation_factory = evaluation_factory
+        self.population_size = population_size
+        self.generations = generations
+        self.warm_generations = warm_generations if warm_generations is not None else max(1, generations // 2)
+        self.crossover_prob = crossover_prob
+        self.mutation_prob = mutation_prob
+        self.seed_fraction = seed_fraction
+        self.seed = seed
+    
+    def __call__(self, train_data: pd.DataFrame, warm_start: Optional[WindowOptimization] = None) -> WindowOptimization:
+        seeds = warm_start.state if warm_start is not None and warm_start.state else []
+        seeds = seeds[:int(self.seed_fraction * self.population_size)]
+        
+        optimizer = GeneticOptimizer(
+            parameters=self.parameters,
+            objectives=self.objectives,
+            evaluation_function=self.evaluation_factory(train_data),
+            population_size=self.population_size,
+            generations=self.warm_generations if seeds else self.generations,
+            crossover_prob=self.crossover_prob,
+            mutation_prob=self.mutation_prob,
+            initial_population=seeds,
+            seed=self.seed
+        )
+        result = optimizer.optimize()
+        
+        best = result['best_solution']
+        return WindowOptimization(
+            parameters=best['parameters'] if best else {},
+            evaluations=result['total_evaluations'],
+            state=[solution['parameters'] for solution in result['pareto_front']]
+        )
+
+
+
+
+class BayesianWindowOptimizer:
+    """
+    Walk-forward optimization_function running Bayesian optimization on each window
+    
+    When warm-started, the previous window's observations seed the
+    surrogate (they were measured on mostly the same data) and only
+    `warm_iterations` new points are evaluated.
+    """
+    
+    def __init__(
+        self,
+        parameters: List[Dict[str, Any]],
+        objective: str,
+        evaluation_factory: Callable[[pd.DataFrame], Callable],
+        n_initial_points: int = 10,
+        n_iterations: int = 50,
+        warm_iterations: Optional[int] = None,
+        batch_size: int = 1
+    ):
+        """
+        Args:
+            parameters: Parameters to optimize
+            objective: Objective to optimize
+            evaluation_factory: Builds the evaluation function for a window's training data
+            n_initial_points: Random points before the surrogate is used
+            n_iterations: Evaluations for a cold start (at least 1)
+            warm_iterations: Evaluations when seeded (default: half of
+                n_iterations); with 0 the previous window's best point is reused
+            batch_size: Points evaluated concurrently per round
+        """
+        if n_iterations < 1:
+            raise ValueError("n_iterations must be at least 1")
+        
+        self.parameters = parameters
+        self.objective = objective
+        self.evaluation_factory = evaluation_factory
+        self.n_initial_points = n_initial_points
+        self.n_iterations = n_iterations
+        self.warm_iterations = warm_iterations if warm_iterations is not None else max(1, n_iterations // 2)
+        self.batch_size = batch_size
+    
+    def __call__(self, train_data: pd.DataFrame, warm_start: Optional[WindowOptimization] = None) -> WindowOptimization:
+        observations = warm_start.state if warm_start is not None and warm_start.state else []
+        
+        optimizer = BayesianOptimizer(
+            parameters=self.parameters,
+            objective=self.objective,
+            evaluation_function=self.evaluation_factory(train_data),
+            n_initial_points=self.n_initial_points,
+            n_iterations=self.warm_iterations if observations else self.n_iterations,
+            batch_size=self.batch_size,
+            x0=[point for point, _ in observations],
+            y0=[value for _, value in observations]
+        )
+        result = optimizer.optimize()
+        
+        # Seed values were measured on the previous window, so pick the best
+        # new point; without new points, keep the previous window's best
+        candidates = optimizer.observations or observations
+        sign = 1 if self.objective in MAXIMIZE_OBJECTIVES else -1
+        point, _ = max(candidates, key=lambda observation: sign * observation[1])
+        
+        return WindowOptimization(
+            parameters=dict(zip(optimizer.param_names, point)),
+            evaluations=result['iterations_completed'],
+            state=candidates
+        )
@@ -0,0 +1,39 @@
+"""
+Database fixtures
+
+Tests that use them need a scratch Postgres database given by
+TEST_DATABASE_URL (its tables are dropped and recreated) and are skipped
+without one.
+"""
+import os
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from src.models.database import Base
+
+
+
+
+@pytest.fixture(scope='session')
+def engine():
+    url = os.environ.get('TEST_DATABASE_URL')
+    if not url:
+        pytest.skip('TEST_DATABASE_URL is not set')
+    
+    engine = create_engine(url)
+    yield engine
+    engine.dispose()
+
+
+
+
+@pytest.fixture
+def session_factory(engine):
+    """Session factory on freshly created tables of this service's models"""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    
+    yield sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    
+    Base.metadata.drop_all(engine)
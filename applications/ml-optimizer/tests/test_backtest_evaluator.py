@@ -0,0 +1,111 @@
+from decimal import Decimal
+from types import SimpleNamespace
+from uuid import uuid4
+
+from src.services.backtest_evaluator import BacktestEvaluator
+
+
+# symbol, direction, entry, exit, profit, pips, stop_loss, take_profit
+TRADES = [
+    ('EURUSD', 'BUY', Decimal('1.1000'), Decimal('1.1050'), Decimal('50'), Decimal('50'), Decimal('1.0950'), Decimal('1.1060')),
+    ('EURUSD', 'SELL', Decimal('1.1000'), Decimal('1.1040'), Decimal('-40'), Decimal('-40'), Decimal('1.1040'), Decimal('1.0900')),
+    ('EURUSD', 'BUY', Decimal('1.1000'), Decimal('1.1020'), Decimal('20'), Decimal('20'), None, None)
+]
+
+
+
+
+class FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+    
+    def filter(self, *args):
+        return self
+    
+    def order_by(self, *args):
+        return self
+    
+    def all(self):
+        return self.rows
+    
+    def first(self):
+        return self.rows[0] if self.rows else None
+
+
+
+
+class FakeSession:
+    def query(self, *columns):
+        if len(columns) == 1:
+            return FakeQuery([SimpleNamespace(initial_balance=Decimal('10000'))])
+        return FakeQuery(TRADES)
+
+
+
+
+def make_evaluator():
+    return BacktestEvaluator(FakeSession(), uuid4(), 'ema_crossover')
+
+
+
+
+def test_replay_only_for_tightening_levels():
+    """Levels wider than a recorded stop or target are not replayed"""
+    with make_evaluator() as evaluator:
+        # Tightest recorded stop is 40 pips, tightest target 60 pips
+        assert evaluator.max_replay_stop == 40
+        assert evaluator.max_replay_target == 60
+        
+        assert evaluator.identity({'stop_loss': 30, 'take_profit': 60}) == BacktestEvaluator.REPLAY_IDENTITY
+        assert evaluator.identity({'stop_loss': 45}) == BacktestEvaluator.REMOTE_IDENTITY
+        assert evaluator.identity({'take_profit': 80}) == BacktestEvaluator.REMOTE_IDENTITY
+        assert evaluator.identity({'fast_period': 10}) == BacktestEvaluator.REMOTE_IDENTITY
+
+
+
+
+def test_replay_clips_results_to_tighter_levels():
+    """Results beyond the new levels are cut at them"""
+    with make_evaluator() as evaluator:
+        metrics = evaluator.evaluate({'stop_loss': 30, 'take_profit': 30})
+    
+    # 50 -> 30, -40 -> -30, 20 unchanged
+    assert metrics['net_profit'] == 20
+    assert metrics['winning_trades'] == 2
+
+
+
+
+def test_remote_and_replay_report_drawdown_in_percent():
+    """Remote candidates get the initial balance and rank on the replay's drawdown scale"""
+    requests = []
+    
+    class FakeResponse:
+        def raise_for_status(self):
+            pass
+        
+        def json(self):
+            return {'net_profit': 120.0, 'max_drawdown': 3.5, 'sharpe_ratio': None}
+    
+    class FakeClient:
+        def post(self, url, json):
+            requests.append(json)
+            return FakeResponse()
+        
+        def close(self):
+            pass
+    
+    with make_evaluator() as evaluator:
+        replayed = evaluator.evaluate({'stop_loss': 40})
+        
+        evaluator._client.close()
+        evaluator._client = FakeClient()
+        remote = evaluator.evaluate({'fast_period': 10})
+    
+    # Equity 10000 -> 10050 -> 10010: 40 below a 10050 peak
+    assert replayed['max_drawdown'] == round(40 / 10050 * 100, 4)
+    assert replayed['max_drawdown_percent'] == replayed['max_drawdown']
+    
+    assert requests[0]['initial_cash'] == 10000.0
+    assert remote['max_drawdown'] == remote['max_drawdown_percent'] == 3.5
+    assert remote['sharpe_ratio'] == 0.0
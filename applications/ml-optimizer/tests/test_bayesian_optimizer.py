@@ -0,0 +1,120 @@
+import threading
+import time
+import pytest
+
+from src.algorithms.bayesian_optimizer import BayesianOptimizer
+
+
+PARAMETERS = [
+    {"name": "stop_loss", "min": 20, "max": 80, "type": "int"},
+    {"name": "risk", "min": 0.01, "max": 0.05, "type": "float"}
+]
+
+
+
+
+def evaluate(params):
+    return {
+        'net_profit': 1000 - (params['stop_loss'] - 50) ** 2 - ((params['risk'] - 0.03) * 1000) ** 2,
+        'max_drawdown': params['stop_loss'] * 2.5
+    }
+
+
+
+
+def test_warm_start_points_are_filtered_and_signed():
+    x0 = [
+        [40.4, 0.02],     # kept, int parameter rounded
+        [40, 0.02],       # duplicate of the first after rounding
+        [90, 0.02],       # stop_loss outside the space
+        [50, 0.5],        # risk outside the space
+        [60, 0.03],       # non-finite value
+        [61, 0.03],       # missing value
+        [70, 0.04]        # kept
+    ]
+    y0 = [100.0, 999.0, 50.0, 50.0, float('nan'), None, -20.0]
+    
+    maximize = BayesianOptimizer(PARAMETERS, 'net_profit', evaluate, x0=x0, y0=y0)
+    points, values = maximize._warm_start_points()
+    
+    assert points == [[40, 0.02], [70, 0.04]]
+    assert isinstance(points[0][0], int)
+    assert values == [-100.0, 20.0]  # maximized objective negated for skopt
+    
+    minimize = BayesianOptimizer(PARAMETERS, 'max_drawdown', evaluate, x0=x0, y0=y0)
+    assert minimize._warm_start_points()[1] == [100.0, -20.0]
+
+
+
+
+def test_rounds_are_proposed_in_batches_and_evaluated_concurrently():
+    active, peak = [0], [0]
+    lock = threading.Lock()
+    
+    def slow_evaluate(params):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return evaluate(params)
+    
+    rounds = []
+    optimizer = BayesianOptimizer(
+        PARAMETERS, 'net_profit', slow_evaluate,
+        n_initial_points=3, n_iterations=7, batch_size=3
+    )
+    result = optimizer.optimize(progress_callback=lambda progress: rounds.append(progress))
+    
+    assert [progress['evaluated'] for progress in rounds] == [3, 6, 7]
+    assert peak[0] == 3
+    assert result['iterations_completed'] == 7
+    assert len(result['convergence_data']) == 7
+    assert len(optimizer.observations) == 7
+    
+    # Constant liar keeps the points of a round apart
+    for start, end in [(0, 3), (3, 6)]:
+        round_points = [tuple(point) for point, _ in optimizer.observations[start:end]]
+        assert len(set(round_points)) == 3
+    
+    # Natural units: best is the highest profit seen, and matches the evaluator
+    values = [value for _, value in optimizer.observations]
+    assert result['best_objective_value'] == max(values)
+    assert evaluate(result['best_parameters'])['net_profit'] == pytest.approx(result['best_objective_value'])
+
+
+
+
+def test_best_point_comes_from_this_run():
+    """A warm-start point is not reported as best unless evaluated again"""
+    optimizer = BayesianOptimizer(
+        PARAMETERS, 'net_profit', evaluate,
+        n_initial_points=2, n_iterations=4,
+        x0=[[20, 0.01]], y0=[1e9]  # implausible stored value
+    )
+    result = optimizer.optimize()
+    
+    assert result['warm_start_points'] == 1
+    assert result['best_objective_value'] < 1e9
+    assert result['best_objective_value'] == max(value for _, value in optimizer.observations)
+
+
+
+
+def test_zero_iterations_evaluate_nothing():
+    calls = []
+    optimizer = BayesianOptimizer(
+        PARAMETERS, 'net_profit', lambda params: calls.append(params) or evaluate(params),
+        n_iterations=0
+    )
+    result = optimizer.optimize()
+    
+    assert calls == []
+    assert result['best_parameters'] is None
+    assert result['best_objective_value'] is None
+    assert result['iterations_completed'] == 0
+    assert optimizer.observations == []
+    
+    with pytest.raises(ValueError):
+        BayesianOptimizer(PARAMETERS, 'net_profit', evaluate, n_iterations=-1)
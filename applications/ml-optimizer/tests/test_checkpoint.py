@@ -0,0 +1,100 @@
+import random
+import numpy as np
+
+from src.algorithms.genetic_algorithm import GeneticOptimizer
+
+
+PARAMETERS = [
+    {"name": "stop_loss", "min": 20, "max": 80, "type": "int"},
+    {"name": "risk", "min": 0.01, "max": 0.05, "type": "float"}
+]
+
+OBJECTIVES = ["net_profit", "max_drawdown"]
+
+
+
+
+def evaluate(params):
+    return {
+        'net_profit': params['stop_loss'] * params['risk'] * 1000 - (params['stop_loss'] - 50) ** 2,
+        'max_drawdown': params['stop_loss'] * 2.5
+    }
+
+
+
+
+def make_optimizer(generations=6, seed=7):
+    return GeneticOptimizer(
+        PARAMETERS, OBJECTIVES, evaluate, population_size=16, generations=generations, seed=seed
+    )
+
+
+
+
+def test_resume_matches_uninterrupted_run():
+    """A run resumed from a mid-run checkpoint ends where the full run does"""
+    full = make_optimizer().optimize()
+    
+    # Interrupted run: keep the checkpoint of generation 3
+    checkpoints = {}
+    make_optimizer(generations=3).optimize(
+        checkpoint_callback=lambda gen, data: checkpoints.__setitem__(gen, data)
+    )
+    assert sorted(checkpoints) == [0, 1, 2, 3]
+    
+    resumed = make_optimizer(seed=12345).optimize(resume_from=checkpoints[3])
+    
+    assert resumed['resumed_from_generation'] == 3
+    assert resumed['total_evaluations'] == full['total_evaluations']
+    assert resumed['pareto_front'] == full['pareto_front']
+    assert resumed['convergence']['generation'] == full['convergence']['generation']
+    assert np.allclose(resumed['convergence']['hypervolume'], full['convergence']['hypervolume'])
+
+
+
+
+
+def test_runs_do_not_share_the_global_rng():
+    """Seeded runs are reproducible regardless of the global RNG state"""
+    random.seed(1)
+    np.random.seed(1)
+    python_state = random.getstate()
+    numpy_state = np.random.get_state()[1].copy()
+    first = make_optimizer().optimize()
+    
+    # Neither global RNG was drawn from
+    assert random.getstate() == python_state
+    assert np.array_equal(np.random.get_state()[1], numpy_state)
+    
+    random.seed(2)
+    np.random.seed(2)
+    second = make_optimizer().optimize()
+    
+    assert first['pareto_front'] == second['pareto_front']
+
+
+
+
+def test_optimizers_do_not_share_individual_classes():
+    """A GA built with another objective count breaks neither a resume nor a seeded run"""
+    full = make_optimizer().optimize()
+    checkpoints = {}
+    make_optimizer(generations=3).optimize(
+        checkpoint_callback=lambda gen, data: checkpoints.__setitem__(gen, data)
+    )
+    
+    resuming = make_optimizer()
+    # Warm-started walk-forward windows seed generation 0 like this
+    seeded = GeneticOptimizer(
+        PARAMETERS, OBJECTIVES, evaluate, population_size=16, generations=2,
+        initial_population=[{'stop_loss': 50, 'risk': 0.05}], seed=7
+    )
+    
+    # Built (and run) after the others, as by a second job worker
+    GeneticOptimizer(PARAMETERS, ['net_profit'], evaluate, population_size=8, generations=1).optimize()
+    
+    assert resuming.optimize(resume_from=checkpoints[3])['pareto_front'] == full['pareto_front']
+    
+    front = seeded.optimize()['pareto_front']
+    assert all(set(solution['objectives']) == set(OBJECTIVES) for solution in front)
+    assert {'stop_loss': 50, 'risk': 0.05} in [solution['parameters'] for solution in front]
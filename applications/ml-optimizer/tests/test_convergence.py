@@ -0,0 +1,56 @@
+import numpy as np
+
+from src.algorithms.convergence import ConvergenceRecorder, hypervolume
+
+
+
+
+def monte_carlo_hypervolume(points, reference, samples=200000):
+    rng = np.random.default_rng(0)
+    upper = points.max(axis=0)
+    box = rng.uniform(reference, upper, size=(samples, len(reference)))
+    covered = (points[None, :, :] >= box[:, None, :]).all(axis=-1).any(axis=1)
+    return covered.mean() * np.prod(upper - reference)
+
+
+
+
+def test_hypervolume_two_objectives_exact():
+    """Staircase area of a 2-D front"""
+    points = np.array([[3.0, 1.0], [2.0, 2.0], [1.0, 3.0], [1.0, 1.0]])
+    
+    assert hypervolume(points, np.zeros(2)) == 6.0
+    assert hypervolume(points, np.array([5.0, 5.0])) == 0.0
+
+
+
+
+def test_hypervolume_three_objectives():
+    """Slicing recursion agrees with a Monte Carlo estimate"""
+    rng = np.random.default_rng(3)
+    points = rng.random((30, 3))
+    reference = np.zeros(3)
+    
+    assert abs(hypervolume(points, reference) - monte_carlo_hypervolume(points, reference)) < 0.01
+
+
+
+
+def test_recorder_round_trip_and_hit_rate():
+    """Columnar history survives to_dict/from_dict; hit rate is per generation"""
+    signs = np.array([1.0, -1.0])
+    recorder = ConvergenceRecorder(['net_profit', 'max_drawdown'], signs, capacity=1)
+    
+    fitness = np.array([[10.0, -5.0], [20.0, -8.0]])
+    recorder.record(0, fitness, fitness, 2, {'lookups': 2, 'hits': 0, 'persistent_hits': 0})
+    row = recorder.record(1, fitness + 1, fitness + 1, 2, {'lookups': 6, 'hits': 3, 'persistent_hits': 0})
+    
+    assert row['cache_hit_rate'] == 0.75
+    assert row['total_evaluations'] == 4
+    assert row['objectives']['max_drawdown']['max'] == 7.0
+    
+    data = recorder.to_dict()
+    restored = ConvergenceRecorder.from_dict(data, signs)
+    
+    assert restored.to_dict() == data
+    assert len(restored) == 2
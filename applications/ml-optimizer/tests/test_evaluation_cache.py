@@ -0,0 +1,101 @@
+import pytest
+from uuid import uuid4
+
+from src.services.evaluation_cache import EvaluationCache, EvaluationLRU
+
+
+PARAMETERS = [
+    {"name": "stop_loss", "min": 20, "max": 80, "type": "int"},
+    {"name": "risk", "min": 0.01, "max": 0.05, "type": "float"}
+]
+
+
+
+
+def test_duplicate_genomes_evaluated_once():
+    """Rounded duplicates hit the cache instead of the evaluator"""
+    calls = []
+    
+    def evaluate(params):
+        calls.append(params)
+        return {'net_profit': params['stop_loss'] * 10}
+    
+    cache = EvaluationCache(uuid4(), PARAMETERS, ['net_profit'])
+    
+    first = cache.evaluate({'stop_loss': 40, 'risk': 0.02}, evaluate)
+    second = cache.evaluate({'stop_loss': 40.0000001, 'risk': 0.0200000001}, evaluate)
+    
+    assert first == second
+    assert len(calls) == 1
+    
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['hit_rate'] == 0.5
+
+
+
+
+def test_key_includes_backtest_and_objectives():
+    """Different backtests or objective sets never share entries"""
+    lru = EvaluationLRU()
+    backtest_id = uuid4()
+    
+    a = EvaluationCache(backtest_id, PARAMETERS, ['net_profit', 'max_drawdown'], lru=lru)
+    b = EvaluationCache(backtest_id, PARAMETERS, ['max_drawdown', 'net_profit'], lru=lru)
+    c = EvaluationCache(backtest_id, PARAMETERS, ['net_profit'], lru=lru)
+    d = EvaluationCache(uuid4(), PARAMETERS, ['net_profit'], lru=lru)
+    
+    params = {'stop_loss': 30, 'risk': 0.03}
+    a.put(params, {'net_profit': 1})
+    
+    assert b.get(params) == {'net_profit': 1}
+    assert c.get(params) is None
+    assert d.get(params) is None
+
+
+
+
+def test_key_includes_strategy_and_evaluator():
+    """Identical params on different strategies or evaluation paths never share entries"""
+    lru = EvaluationLRU()
+    backtest_id = uuid4()
+    params = {'stop_loss': 30, 'risk': 0.03}
+    
+    ema = EvaluationCache(backtest_id, PARAMETERS, ['net_profit'], lru=lru, strategy_name='ema_crossover')
+    rsi = EvaluationCache(backtest_id, PARAMETERS, ['net_profit'], lru=lru, strategy_name='rsi_reversal')
+    
+    ema.put(params, {'net_profit': 1})
+    
+    assert rsi.get(params) is None
+    assert ema.get(params) == {'net_profit': 1}
+    assert ema._hash_key(ema.make_key(params)) != rsi._hash_key(rsi.make_key(params))
+    
+    replay = EvaluationCache(
+        backtest_id, PARAMETERS, ['net_profit'], lru=lru,
+        strategy_name='ema_crossover', evaluator=lambda p: 'trade-replay-v1'
+    )
+    remote = EvaluationCache(
+        backtest_id, PARAMETERS, ['net_profit'], lru=lru,
+        strategy_name='ema_crossover', evaluator=lambda p: 'remote-backtest'
+    )
+    
+    replay.put(params, {'net_profit': 2})
+    
+    assert remote.get(params) is None
+    assert replay.get(params) == {'net_profit': 2}
+
+
+
+
+def test_lru_evicts_least_recently_used():
+    """LRU keeps at most max_size entries"""
+    lru = EvaluationLRU(max_size=2)
+    lru.put('a', {'v': 1})
+    lru.put('b', {'v': 2})
+    lru.get('a')
+    lru.put('c', {'v': 3})
+    
+    assert len(lru) == 2
+    assert lru.get('b') is None
+    assert lru.get('a') == {'v': 1}
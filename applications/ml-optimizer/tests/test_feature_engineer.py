@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+
+from src.algorithms.feature_engineer import FeatureEngineer, FeatureState, FEATURE_NAMES, WARMUP_ROWS
+from src.services.feature_cache import FeatureCache
+
+
+
+
+def make_candles(n=600, seed=0):
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    open_ = close + rng.normal(0, 0.1, n)
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(close, open_) + rng.random(n),
+        'low': np.minimum(close, open_) - rng.random(n),
+        'close': close,
+        'volume': rng.integers(100, 1000, n).astype(float)
+    }, index=pd.date_range('2024-01-01', periods=n, freq='h'))
+
+
+
+
+def test_features_match_pandas_reference():
+    """Vectorized indicators equal the pandas rolling/ewm definitions"""
+    df = make_candles()
+    features = FeatureEngineer().create_features(df)
+    
+    close = df['close']
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(14).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(14).mean()
+    macd = close.ewm(span=12).mean() - close.ewm(span=26).mean()
+    
+    expected = pd.DataFrame({
+        'sma_200': close.rolling(200).mean(),
+        'ema_50': close.ewm(span=50).mean(),
+        'volatility_20': close.pct_change().rolling(20).std(),
+        'rsi_14': 100 - 100 / (1 + gain / loss),
+        'macd_signal': macd.ewm(span=9).mean(),
+        'bb_upper': close.rolling(20).mean() + 2 * close.rolling(20).std()
+    }).loc[features.index]
+    
+    assert list(features.columns) == list(df.columns) + FEATURE_NAMES
+    assert len(features) == len(df) - 199  # sma_200 warm-up
+    assert features[FEATURE_NAMES].dtypes.eq(np.float32).all()
+    np.testing.assert_allclose(features[expected.columns].to_numpy(np.float64), expected.to_numpy(), rtol=1e-5)
+
+
+
+
+def test_features_cached_per_backtest_and_timeframe():
+    """Same candles reuse the cached frame; appended candles extend it"""
+    cache = FeatureCache(max_entries=4)
+    engineer = FeatureEngineer(cache=cache)
+    candles = make_candles(650)
+    df = candles.iloc[:600]
+    
+    first = engineer.create_features(df, backtest_id='bt-1', timeframe='H1')
+    first['close'] = 0.0  # callers get their own copy
+    
+    second = engineer.create_features(df, backtest_id='bt-1', timeframe='H1')
+    assert len(cache) == 1
+    assert (second['close'] != 0).all()
+    
+    longer = engineer.create_features(candles, backtest_id='bt-1', timeframe='H1')
+    assert len(longer) == len(second) + 50
+    pd.testing.assert_frame_equal(longer, FeatureEngineer().create_features(candles), check_exact=True)
+
+
+
+
+def test_incremental_append_matches_batch_exactly():
+    """Appending candles in chunks reproduces the batch rows bit for bit"""
+    df = make_candles(900, seed=1)
+    batch = FeatureEngineer().create_features(df)
+    
+    state = FeatureState()
+    parts = [state.append(df.iloc[start:stop]) for start, stop in [(0, 150), (150, 420), (420, 421), (421, 900)]]
+    incremental = pd.concat(parts)
+    
+    assert state.rows == len(df)
+    assert len(state.tail['close']) == WARMUP_ROWS
+    pd.testing.assert_frame_equal(incremental, batch, check_exact=True)
+
+
+
+
+def test_select_features_permutation_cached():
+    """Held-out permutation importance finds the signal and is cached by dataset"""
+    df = FeatureEngineer().create_features(make_candles(2000, seed=2))
+    X = df[FEATURE_NAMES]
+    y = X['rsi_14'] * 2 + np.random.default_rng(0).normal(0, 1, len(X))
+    
+    cache = FeatureCache()
+    engineer = FeatureEngineer(cache=cache)
+    top = engineer.select_features(X, y, top_n=5, n_jobs=1)
+    
+    assert top[0] == 'rsi_14'
+    assert len(cache) == 1
+    
+    engineer.select_features(X, y, top_n=5, n_jobs=1)
+    assert len(cache) == 1
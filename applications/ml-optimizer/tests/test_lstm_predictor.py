@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+
+from src.algorithms.sequences import sequence_windows
+
+
+SEQUENCE_LENGTH = 8
+FEATURES = 3
+TARGET_INDEX = 0
+
+
+
+
+def make_series(rows=50, seed=0):
+    return np.random.default_rng(seed).random((rows, FEATURES)).astype(np.float32)
+
+
+
+
+def loop_sequences(scaled_data, sequence_length, target_index):
+    """The list-building loop prepare_data used before strided windows"""
+    X, y = [], []
+    for i in range(sequence_length, len(scaled_data)):
+        X.append(scaled_data[i - sequence_length:i])
+        y.append(scaled_data[i, target_index])
+    return np.array(X), np.array(y)
+
+
+
+
+def test_sequence_windows_match_loop():
+    """Windows over rows [:-1] with targets from row sequence_length on match the loop"""
+    data = make_series()
+    expected_X, expected_y = loop_sequences(data, SEQUENCE_LENGTH, TARGET_INDEX)
+    
+    X = sequence_windows(data[:-1], SEQUENCE_LENGTH)
+    y = data[SEQUENCE_LENGTH:, TARGET_INDEX]
+    
+    assert X.shape == expected_X.shape == (len(data) - SEQUENCE_LENGTH, SEQUENCE_LENGTH, FEATURES)
+    assert np.array_equal(X, expected_X)
+    assert np.array_equal(y, expected_y)
+    
+    # Train/test halves line up as well
+    split = int(0.8 * len(X))
+    assert np.array_equal(X[split:], expected_X[split:])
+
+
+
+
+def test_sequence_windows_are_read_only_views():
+    data = make_series()
+    X = sequence_windows(data, SEQUENCE_LENGTH)
+    
+    assert len(X) == len(data) - SEQUENCE_LENGTH + 1
+    assert np.shares_memory(X, data)
+    assert not X.flags.writeable
+    
+    data[SEQUENCE_LENGTH - 1, 1] = -1.0
+    assert X[0, -1, 1] == -1.0
+    assert X[SEQUENCE_LENGTH - 1, 0, 1] == -1.0
+
+
+
+
+def make_predictor():
+    """Untrained three-feature LSTM; random weights are enough for parity checks"""
+    from src.algorithms.lstm_predictor import LSTMPredictor
+    
+    predictor = LSTMPredictor(sequence_length=SEQUENCE_LENGTH, features=['close', 'volume', 'rsi'])
+    predictor.target_index = TARGET_INDEX
+    predictor.build_model((SEQUENCE_LENGTH, FEATURES))
+    return predictor
+
+
+
+
+def step_forecast(predictor, window, n_steps):
+    """One model call per step for a single window"""
+    window = window.copy()
+    predictions = []
+    for _ in range(n_steps):
+        pred = float(predictor.model(window[None], training=False).numpy()[0, 0])
+        predictions.append(pred)
+        
+        row = window[-1].copy()
+        row[predictor.target_index] = pred
+        window = np.concatenate([window[1:], row[None]])
+    return np.array(predictions)
+
+
+
+
+def test_batched_forecast_matches_per_sequence():
+    pytest.importorskip('tensorflow')
+    predictor = make_predictor()
+    windows = np.stack([make_series(SEQUENCE_LENGTH, seed) for seed in range(4)])
+    
+    batched = predictor.forecast(windows, n_steps=5)
+    
+    assert batched.shape == (4, 5)
+    for window, row in zip(windows, batched):
+        assert np.allclose(row, predictor.forecast(window[None], n_steps=5)[0], atol=1e-5)
+        assert np.allclose(row, step_forecast(predictor, window, 5), atol=1e-5)
+
+
+
+
+def test_tflite_forecast_matches_keras():
+    pytest.importorskip('tensorflow')
+    predictor = make_predictor()
+    windows = np.stack([make_series(SEQUENCE_LENGTH, seed) for seed in range(3)])
+    X = sequence_windows(make_series(40, seed=9), SEQUENCE_LENGTH)
+    y = np.zeros(len(X), dtype=np.float32)
+    
+    keras_forecast = predictor.forecast(windows, n_steps=5)
+    keras_metrics = predictor.evaluate(X, y)
+    
+    predictor.export_tflite(quantization='none')
+    
+    # Single windows run on the interpreter, batches on the compiled Keras loop
+    tflite_forecast = np.concatenate([predictor.forecast(window[None], n_steps=5) for window in windows])
+    assert np.allclose(tflite_forecast, keras_forecast, atol=1e-4)
+    assert np.allclose(predictor._forecast_tflite(windows, 5), keras_forecast, atol=1e-4)
+    assert np.allclose(predictor.forecast(windows, n_steps=5), keras_forecast, atol=1e-5)
+    assert np.isclose(predictor.evaluate(X, y)['mae'], keras_metrics['mae'], atol=1e-4)
+    
+    # int8 weights stay close to the float32 model
+    predictor.export_tflite(quantization='dynamic')
+    assert np.allclose(predictor.forecast(windows[:1], n_steps=5), keras_forecast[:1], atol=1e-2)
@@ -0,0 +1,55 @@
+from uuid import uuid4
+
+from src.services import evaluation_cache
+from src.services.evaluation_cache import DatabaseEvaluationStore, EvaluationCache, EvaluationLRU
+from src.services.ml_optimization_service import MLOptimizationService
+
+
+PARAMETERS = [
+    {"name": "stop_loss", "min": 10, "max": 80, "type": "int"},
+    {"name": "take_profit", "min": 10, "max": 120, "type": "int"}
+]
+
+
+
+
+def identity(params):
+    """Replay up to a 50 pip stop, remote backtests beyond"""
+    return 'trade-replay-v3' if params['stop_loss'] <= 50 else 'remote-backtest-v2'
+
+
+
+
+def test_warm_start_uses_only_comparable_evaluations(session_factory, monkeypatch):
+    monkeypatch.setattr(evaluation_cache, 'SessionLocal', session_factory)
+    backtest_id = uuid4()
+    
+    def store(results, params, backtest=backtest_id, strategy='ema_crossover', evaluator=identity,
+              parameters=PARAMETERS):
+        cache = EvaluationCache(
+            backtest, parameters, ['net_profit'], lru=EvaluationLRU(),
+            store=DatabaseEvaluationStore(), strategy_name=strategy, evaluator=evaluator
+        )
+        cache.put(params, results)
+    
+    # Comparable: same backtest, strategy and the path each point takes now
+    store({'net_profit': 100.0}, {'stop_loss': 30, 'take_profit': 60})
+    store({'net_profit': 250.0}, {'stop_loss': 70, 'take_profit': 90})
+    
+    # Another strategy or backtest
+    store({'net_profit': 1.0}, {'stop_loss': 31, 'take_profit': 60}, strategy='rsi_reversal')
+    store({'net_profit': 2.0}, {'stop_loss': 32, 'take_profit': 60}, backtest=uuid4())
+    # An older replay version, and a remote result for a point that replays now
+    store({'net_profit': 3.0}, {'stop_loss': 33, 'take_profit': 60}, evaluator=lambda p: 'trade-replay-v2')
+    store({'net_profit': 4.0}, {'stop_loss': 34, 'take_profit': 60}, evaluator=lambda p: 'remote-backtest-v2')
+    # Stored without an evaluation path, another search space, no objective
+    store({'net_profit': 5.0}, {'stop_loss': 35, 'take_profit': 60}, evaluator=None)
+    store({'net_profit': 6.0}, {'stop_loss': 36}, parameters=PARAMETERS[:1])
+    store({'sharpe_ratio': 1.5}, {'stop_loss': 37, 'take_profit': 60})
+    
+    with session_factory() as db:
+        x0, y0 = MLOptimizationService(db)._load_prior_evaluations(
+            backtest_id, PARAMETERS, 'net_profit', 'ema_crossover', identity
+        )
+    
+    assert sorted(zip(y0, map(tuple, x0))) == [(100.0, (30, 60)), (250.0, (70, 90))]
@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+
+from src.services.model_registry import ModelKey, ModelRegistry
+
+
+class StubPredictor:
+    """Stands in for LSTMPredictor: a fixed size and a JSON file on disk"""
+    
+    def __init__(self, nbytes=100, name='model'):
+        self.nbytes = nbytes
+        self.name = name
+    
+    def memory_bytes(self):
+        return self.nbytes
+    
+    def save(self, directory, metadata=None):
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, 'stub.json'), 'w') as f:
+            json.dump({'nbytes': self.nbytes, 'name': self.name, 'metadata': metadata or {}}, f)
+    
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, 'stub.json')) as f:
+            state = json.load(f)
+        return cls(state['nbytes'], state['name']), state['metadata']
+
+
+
+
+def make_key(backtest_id='bt-1', data_version='v1'):
+    return ModelKey(backtest_id, ('close', 'volume'), 60, data_version)
+
+
+
+
+def make_registry(tmp_path, max_bytes=1000):
+    return ModelRegistry(str(tmp_path), max_bytes=max_bytes, loader=StubPredictor.load)
+
+
+
+
+def test_miss_trains_then_hits(tmp_path):
+    registry = make_registry(tmp_path)
+    calls = []
+    
+    def train():
+        calls.append(1)
+        return StubPredictor(), {'r2': 0.9}
+    
+    first = registry.get_or_train(make_key(), train)
+    second = registry.get_or_train(make_key(), train)
+    
+    assert len(calls) == 1
+    assert second.predictor is first.predictor
+    assert second.metadata == {'r2': 0.9}
+    assert registry.get(make_key(data_version='v2')) is None
+
+
+
+
+def test_concurrent_misses_train_once(tmp_path):
+    registry = make_registry(tmp_path)
+    calls = []
+    started = threading.Event()
+    
+    def train():
+        calls.append(1)
+        started.wait(1)
+        return StubPredictor(), {}
+    
+    threads = [threading.Thread(target=registry.get_or_train, args=(make_key(), train)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    started.set()
+    for thread in threads:
+        thread.join()
+    
+    assert len(calls) == 1
+    assert registry._key_locks == {}
+
+
+
+
+def test_eviction_is_bounded_by_bytes(tmp_path):
+    registry = make_registry(tmp_path, max_bytes=250)
+    
+    for name in ['a', 'b', 'c']:
+        registry.put(make_key(backtest_id=name), StubPredictor(100, name))
+    
+    # 300 bytes > 250: the least recently used model leaves memory, not disk
+    assert [key.backtest_id for key in registry.keys()] == ['b', 'c']
+    assert registry.memory_bytes == 200
+    assert os.path.isdir(os.path.join(str(tmp_path), 'a'))
+    
+    # Touching b makes c the next one out
+    registry.get(make_key(backtest_id='b'))
+    registry.put(make_key(backtest_id='d'), StubPredictor(100, 'd'))
+    assert [key.backtest_id for key in registry.keys()] == ['b', 'd']
+    
+    # A model larger than the budget is still kept on its own
+    registry.put(make_key(backtest_id='e'), StubPredictor(400, 'e'))
+    assert [key.backtest_id for key in registry.keys()] == ['e']
+
+
+
+
+def test_reload_from_disk(tmp_path):
+    make_registry(tmp_path).put(make_key(), StubPredictor(100, 'saved'), {'r2': 0.8})
+    
+    # A new process (fresh registry) finds the model without training
+    registry = make_registry(tmp_path)
+    
+    def train():
+        raise AssertionError("retrained a saved model")
+    
+    entry = registry.get_or_train(make_key(), train)
+    
+    assert entry.predictor.name == 'saved'
+    assert entry.metadata == {'r2': 0.8}
+    assert registry.keys() == [make_key()]
+
+
+
+
+def test_new_data_version_drops_stale_models(tmp_path):
+    registry = make_registry(tmp_path)
+    registry.get_or_train(make_key(data_version='v1'), lambda: (StubPredictor(), {}))
+    registry.get_or_train(make_key(data_version='v2'), lambda: (StubPredictor(), {}))
+    
+    assert registry.keys() == [make_key(data_version='v2')]
+    family = os.path.join(str(tmp_path), 'bt-1', make_key().family())
+    assert os.listdir(family) == ['v2']
@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta
+from uuid import uuid4
+import pytest
+
+from src.config import settings
+from src.models.database import MLOptimizationJob
+from src.services import optimization_job_service as jobs
+from src.services.optimization_job_service import OptimizationJobService
+
+
+REQUEST = {
+    'backtest_id': None,
+    'parameters': [{"name": "stop_loss", "min": 20, "max": 80, "type": "int"}],
+    'objectives': ['net_profit']
+}
+
+
+
+
+class RecordingExecutor:
+    def __init__(self):
+        self.submitted = []
+    
+    def submit(self, fn, *args):
+        self.submitted.append(args)
+
+
+
+
+@pytest.fixture
+def db(session_factory, monkeypatch):
+    monkeypatch.setattr(jobs, 'SessionLocal', session_factory)
+    monkeypatch.setattr(jobs, '_executor', RecordingExecutor())
+    with session_factory() as session:
+        yield session
+
+
+
+
+def add_job(db, status='running', worker_id=None, age=0, checkpoint=b'checkpoint'):
+    """Insert a job last heartbeated `age` seconds ago"""
+    updated_at = datetime.utcnow() - timedelta(seconds=age)
+    job = MLOptimizationJob(
+        backtest_id=uuid4(),
+        algorithm='genetic',
+        request={**REQUEST, 'backtest_id': str(uuid4())},
+        status=status,
+        worker_id=worker_id or jobs.WORKER_ID,
+        checkpoint=checkpoint,
+        checkpoint_generation=3 if checkpoint else None,
+        updated_at=updated_at
+    )
+    db.add(job)
+    db.commit()
+    
+    # updated_at is also bumped on update; pin it to the intended age
+    db.query(MLOptimizationJob).filter(MLOptimizationJob.id == job.id).update(
+        {'updated_at': updated_at}, synchronize_session=False
+    )
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+
+
+def reload(db, job):
+    db.expire_all()
+    return db.query(MLOptimizationJob).filter(MLOptimizationJob.id == job.id).one()
+
+
+
+
+def test_owned_job_cannot_be_claimed_by_another_worker(db):
+    job = add_job(db, worker_id='other-pod')
+    
+    # A heartbeating running job cannot be resumed here
+    with pytest.raises(RuntimeError):
+        OptimizationJobService(db).resume(job.id)
+    
+    # Nor written or started by a worker that does not own it
+    assert not jobs._write_owned(db, job.id, {'progress_percent': 50})
+    
+    pending = add_job(db, status='pending', worker_id='other-pod')
+    jobs._run_job(pending.id)
+    
+    assert reload(db, job).worker_id == 'other-pod'
+    assert reload(db, job).progress_percent == 0
+    assert reload(db, pending).status == 'pending'
+    assert jobs._executor.submitted == []
+
+
+
+
+def test_stale_job_is_reclaimed_and_its_old_worker_locked_out(db, monkeypatch):
+    stale_after = settings.ML_JOB_STALE_AFTER
+    job = add_job(db, worker_id='dead-pod', age=stale_after + 60)
+    fresh = add_job(db, worker_id='other-pod', age=0)
+    
+    result = OptimizationJobService(db).resume(job.id)
+    
+    assert result['status'] == 'pending'
+    assert jobs._executor.submitted == [(job.id,)]
+    claimed = reload(db, job)
+    assert claimed.worker_id == jobs.WORKER_ID
+    assert claimed.status == 'pending'
+    
+    # The old owner's late writes no longer match the row
+    monkeypatch.setattr(jobs, 'WORKER_ID', 'dead-pod')
+    assert not jobs._write_owned(db, job.id, {'progress_percent': 99})
+    
+    # A second resume of the same job loses
+    with pytest.raises(RuntimeError):
+        OptimizationJobService(db).resume(job.id)
+    assert reload(db, fresh).status == 'running'
+
+
+
+
+def test_recovery_fails_only_jobs_without_heartbeat(db):
+    stale = add_job(db, worker_id='dead-pod', age=settings.ML_JOB_STALE_AFTER + 60)
+    own = add_job(db, age=settings.ML_JOB_STALE_AFTER + 60)
+    fresh = add_job(db, worker_id='other-pod', age=0, checkpoint=None)
+    
+    # This process heartbeats its own job before recovering others'
+    jobs._heartbeat()
+    
+    assert reload(db, stale).status == 'failed'
+    assert reload(db, stale).error_message.endswith('resumable from generation 3')
+    assert reload(db, own).status == 'running'
+    assert reload(db, fresh).status == 'running'
+
+
+
+
+def test_cancelled_job_stops_after_current_generation(db, monkeypatch):
+    job = add_job(db, status='pending', checkpoint=None)
+    generations = []
+    
+    class Evaluator:
+        strategy_name = 'ema_crossover'
+        
+        def __init__(self, *args):
+            pass
+        
+        def __enter__(self):
+            return self
+        
+        def __exit__(self, *exc):
+            pass
+        
+        def evaluate(self, params):
+            return {'net_profit': 0.0}
+        
+        def identity(self, params):
+            return ''
+    
+    class Service:
+        def __init__(self, session):
+            pass
+        
+        def run_genetic_optimization(self, progress_callback, **kwargs):
+            for generation in range(10):
+                generations.append(generation)
+                progress_callback({
+                    'generation': generation,
+                    'generations': 10,
+                    'pareto_front': []
+                })
+                if generation == 1:
+                    # As a cancel request served by another session
+                    with jobs.SessionLocal() as other:
+                        OptimizationJobService(other).cancel(job.id)
+            return {'pareto_front': []}
+    
+    monkeypatch.setattr(jobs, 'BacktestEvaluator', Evaluator)
+    monkeypatch.setattr(jobs, 'MLOptimizationService', Service)
+    
+    jobs._run_job(job.id)
+    
+    assert generations == [0, 1, 2]
+    stopped = reload(db, job)
+    assert stopped.status == 'cancelled'
+    assert stopped.completed_at is not None
+    assert stopped.result is None
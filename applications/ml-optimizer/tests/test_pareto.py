@@ -0,0 +1,91 @@
+import numpy as np
+from deap import base, creator, tools
+
+from src.algorithms.pareto import (
+    ParetoArchive,
+    crowding_distance,
+    dominates,
+    non_dominated_sort,
+    select_nsga2
+)
+
+
+if not hasattr(creator, "FitnessPareto"):
+    creator.create("FitnessPareto", base.Fitness, weights=(1.0, 1.0, 1.0))
+    creator.create("IndividualPareto", list, fitness=creator.FitnessPareto)
+
+
+
+
+def deap_population(fitness):
+    population = []
+    for i, values in enumerate(fitness):
+        ind = creator.IndividualPareto([i])
+        ind.fitness.values = tuple(values)
+        population.append(ind)
+    return population
+
+
+
+
+def test_fronts_match_deap():
+    """Fronts equal DEAP's sortNondominated, including duplicate points"""
+    rng = np.random.default_rng(0)
+    fitness = rng.integers(0, 8, size=(300, 3)).astype(float)
+    
+    fronts = non_dominated_sort(fitness)
+    expected = tools.sortNondominated(deap_population(fitness), len(fitness))
+    
+    assert len(fronts) == len(expected)
+    for front, deap_front in zip(fronts, expected):
+        assert set(front.tolist()) == {ind[0] for ind in deap_front}
+
+
+
+
+def test_crowding_and_selection_match_deap():
+    """Crowding distance ordering and NSGA-II selection agree with DEAP"""
+    rng = np.random.default_rng(1)
+    fitness = rng.random((200, 3))
+    
+    population = deap_population(fitness)
+    front = tools.sortNondominated(population, len(population), first_front_only=True)[0]
+    tools.emo.assignCrowdingDist(front)
+    
+    indices = [ind[0] for ind in front]
+    distance = crowding_distance(fitness[indices])
+    
+    # DEAP divides by the number of objectives
+    assert np.allclose(distance / 3, [ind.fitness.crowding_dist for ind in front])
+    
+    selected = select_nsga2(fitness, 120)
+    expected = tools.selNSGA2(population, 120)
+    assert set(selected.tolist()) == {ind[0] for ind in expected}
+
+
+
+
+def test_archive_tracks_front_and_dominated_counts():
+    """Incremental updates give the brute-force front and dominance counts"""
+    rng = np.random.default_rng(2)
+    genomes = rng.integers(0, 50, size=(400, 2)).astype(float)
+    fitness = np.column_stack([genomes[:, 0] - genomes[:, 1] ** 0.5, -genomes[:, 0] + rng.random(400)])
+    
+    archive = ParetoArchive(2, 2)
+    for batch in np.array_split(np.arange(400), 8):
+        archive.update(genomes[batch], fitness[batch])
+    
+    # Brute force over distinct genomes (first occurrence wins)
+    _, first = np.unique(genomes, axis=0, return_index=True)
+    unique_fitness = fitness[np.sort(first)]
+    front = unique_fitness[~dominates(unique_fitness, unique_fitness).any(axis=0)]
+    
+    assert sorted(map(tuple, archive.fitness)) == sorted(map(tuple, front))
+    assert np.array_equal(
+        archive.dominated_count,
+        dominates(archive.fitness, unique_fitness).sum(axis=1)
+    )
+    
+    restored = ParetoArchive.from_state(*archive.state())
+    restored.update(genomes[:10], fitness[:10])  # already seen: no change
+    assert np.array_equal(restored.dominated_count, archive.dominated_count)
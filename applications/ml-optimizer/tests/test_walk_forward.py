@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.services.walk_forward_service import (
+    BayesianWindowOptimizer,
+    GeneticWindowOptimizer,
+    WalkForwardService,
+    WindowOptimization
+)
+
+
+
+
+def make_data(days=1000):
+    index = pd.date_range('2020-01-01', periods=days * 24, freq='h')
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({'close': 100 + np.cumsum(rng.normal(0, 0.1, len(index)))}, index=index)
+
+
+
+
+def optimize(train):
+    """Module level so worker processes can unpickle it"""
+    return {'mean': float(train['close'].mean()), 'rows': len(train)}
+
+
+
+
+def backtest(test, params):
+    return {'net_profit': float(test['close'].iloc[-1] - test['close'].iloc[0]), 'rows': len(test)}
+
+
+
+
+def test_windows_cover_train_and_test_periods():
+    result = WalkForwardService(n_workers=1).run_walk_forward(
+        make_data(), optimize, backtest,
+        train_period_days=365, test_period_days=90, step_days=90
+    )
+    
+    assert result['total_iterations'] == 7
+    for i, window in enumerate(result['iterations']):
+        assert window['iteration'] == i + 1
+        assert window['optimal_parameters']['rows'] == 365 * 24
+        assert window['test_performance']['rows'] == 90 * 24
+        assert window['test_start'] == window['train_end']
+
+
+
+
+def test_parallel_matches_sequential_in_order():
+    data = make_data()
+    sequential = WalkForwardService(n_workers=1).run_walk_forward(data, optimize, backtest)
+    parallel = WalkForwardService(n_workers=3).run_walk_forward(data, optimize, backtest)
+    
+    assert parallel['iterations'] == sequential['iterations']
+    assert parallel['total_profit'] == sequential['total_profit']
+
+
+
+
+def test_positional_windows_match_date_masks():
+    """searchsorted bounds select the same rows as the old boolean masks, gaps and all"""
+    data = make_data(400)
+    rng = np.random.default_rng(1)
+    data = data.iloc[np.sort(rng.choice(len(data), len(data) // 3, replace=False))]
+    
+    service = WalkForwardService(n_workers=1)
+    windows = service._windows(data, 100, 30, 20)
+    assert len(windows) == 14
+    
+    for window, (train_lo, train_hi, test_lo, test_hi) in windows:
+        train = data[(data.index >= window['train_start']) & (data.index < window['train_end'])]
+        test = data[(data.index >= window['test_start']) & (data.index < window['test_end'])]
+        assert data.iloc[train_lo:train_hi].equals(train)
+        assert data.iloc[test_lo:test_hi].equals(test)
+    
+    # Unsorted input is sorted once and gives the same result
+    shuffled = data.sample(frac=1.0, random_state=0)
+    expected = service.run_walk_forward(data, optimize, backtest, 100, 30, 20)
+    assert service.run_walk_forward(shuffled, optimize, backtest, 100, 30, 20) == expected
+
+
+
+
+def optimize_warm(train, warm_start=None):
+    return WindowOptimization(
+        {'rows': len(train), 'seeded': warm_start is not None},
+        evaluations=5 if warm_start is not None else 10,
+        state=len(train)
+    )
+
+
+
+
+def test_anchored_warm_start_reports_evaluations():
+    result = WalkForwardService(n_workers=4).run_walk_forward(
+        make_data(), optimize_warm, backtest,
+        train_period_days=365, test_period_days=90, step_days=90,
+        mode='anchored', warm_start=True
+    )
+    
+    iterations = result['iterations']
+    first = iterations[0]['train_start']
+    assert all(window['train_start'] == first for window in iterations)
+    assert [window['optimal_parameters']['rows'] for window in iterations] == [
+        (365 + 90 * i) * 24 for i in range(len(iterations))
+    ]
+    assert [window['warm_started'] for window in iterations] == [False] + [True] * (len(iterations) - 1)
+    assert result['total_evaluations'] == 10 + 5 * (len(iterations) - 1)
+
+
+
+
+
+WINDOW_PARAMETERS = [
+    {"name": "level", "min": 50.0, "max": 150.0, "type": "float"},
+    {"name": "width", "min": 1, "max": 20, "type": "int"}
+]
+
+
+
+
+def quadratic_factory(train):
+    """Profit peaks at level = the window's mean close and width = 10"""
+    target = float(train['close'].mean())
+    
+    def evaluate(params):
+        return {'net_profit': -(params['level'] - target) ** 2 - (params['width'] - 10) ** 2}
+    
+    return evaluate
+
+
+
+
+def window_error(window, data):
+    train = data[(data.index >= window['train_start']) & (data.index < window['train_end'])]
+    return abs(window['optimal_parameters']['level'] - train['close'].mean())
+
+
+
+
+@pytest.mark.parametrize('optimizer', [
+    GeneticWindowOptimizer(
+        WINDOW_PARAMETERS, ['net_profit'], quadratic_factory,
+        population_size=30, generations=16, seed=3
+    ),
+    BayesianWindowOptimizer(
+        WINDOW_PARAMETERS, 'net_profit', quadratic_factory,
+        n_initial_points=8, n_iterations=20
+    )
+], ids=['genetic', 'bayesian'])
+def test_warm_started_windows_need_fewer_evaluations(optimizer):
+    data = make_data(700)
+    service = WalkForwardService(n_workers=1)
+    
+    cold = service.run_walk_forward(data, optimizer, backtest, 365, 90, 90)
+    warm = service.run_walk_forward(data, optimizer, backtest, 365, 90, 90, warm_start=True)
+    
+    assert warm['total_iterations'] == cold['total_iterations'] > 1
+    assert warm['iterations'][0]['evaluations'] == cold['iterations'][0]['evaluations']
+    for cold_window, warm_window in zip(cold['iterations'][1:], warm['iterations'][1:]):
+        assert warm_window['warm_started']
+        assert warm_window['evaluations'] < cold_window['evaluations']
+    assert warm['total_evaluations'] < cold['total_evaluations']
+    
+    # Seeded windows still land near the (moving) optimum: within 5% of the range
+    for window in warm['iterations']:
+        assert window_error(window, data) < 5.0
+
+
+
+
+def test_bayesian_window_without_new_points_keeps_previous_best():
+    data = make_data(700)
+    optimizer = BayesianWindowOptimizer(
+        WINDOW_PARAMETERS, 'net_profit', quadratic_factory,
+        n_initial_points=5, n_iterations=10, warm_iterations=0
+    )
+    
+    result = WalkForwardService(n_workers=1).run_walk_forward(
+        data, optimizer, backtest, 365, 90, 90, warm_start=True
+    )
+    
+    first, *rest = result['iterations']
+    assert first['evaluations'] == 10
+    for window in rest:
+        assert window['evaluations'] == 0
+        assert window['optimal_parameters'] == first['optimal_parameters']
+    
+    with pytest.raises(ValueError):
+        BayesianWindowOptimizer(WINDOW_PARAMETERS, 'net_profit', quadratic_factory, n_iterations=0)
@@ -69,7 +69,8 @@ class OptimizationService:
         task = optimize_parameters.delay(
             str(backtest_id),
             parameter_ranges,
-            optimization_type
+            optimization_type,
+            str(job.id)
         )
         
         # Update job with task ID
@@ -20,7 +20,8 @@ logger = logging.getLogger(__name__)
 def optimize_parameters(
     backtest_id: str,
     parameter_ranges: List[Dict[str, Any]],
-    optimization_type: str = 'grid_search'
+    optimization_type: str = 'grid_search',
+    optimization_id: str = None
 ) -> str:
     """
     Orchestrate parameter optimization
@@ -29,13 +30,14 @@ def optimize_parameters(
         backtest_id: UUID of the backtest
         parameter_ranges: List of parameter ranges to optimize
         optimization_type: Type of optimization (grid_search, random_search, genetic)
+        optimization_id: ID of the OptimizationJob the results belong to
         
     Returns:
         Optimization job ID
     """
     logger.info(f"Starting optimization for backtest {backtest_id}")
     
-    optimization_id = str(uuid4())
+    optimization_id = optimization_id or str(uuid4())
     
     # Generate parameter combinations
     combinations = _generate_combinations(parameter_ranges, optimization_type)
@@ -0,0 +1,97 @@
+"""
+Benchmark - Embedding encode throughput on PyTorch vs ONNX Runtime
+
+Encodes query-size batches (single texts, as `/query` sees them) and a
+bulk batch (daily summaries, as embedding generation sees them) with the
+PyTorch sentence-transformer and the ONNX export in fp32 and int8. Parity
+is the cosine similarity to the PyTorch vectors. Run from the service
+directory:
+
+    python -m benchmarks.bench_embedding_backends --bulk 512 --threads 2
+"""
+import argparse
+import tempfile
+import time
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+
+from src.config import settings
+from src.services.onnx_embedder import OnnxEmbedder, cosine_parity
+
+
+
+
+def make_texts(n: int, seed: int = 42) -> list:
+    """Synthetic daily summaries shaped like the RAG chunks"""
+    rng = np.random.default_rng(seed)
+    symbols = ['EURUSD', 'GBPUSD', 'USDJPY', 'XAUUSD', 'AUDUSD']
+    texts = []
+    for i in range(n):
+        trades = int(rng.integers(1, 40))
+        wins = int(rng.integers(0, trades + 1))
+        profit = float(rng.normal(0, 300))
+        texts.append(
+            f"Trading Summary for 2024-{1 + i % 12:02d}-{1 + i % 28:02d}:\n"
+            f"- Total trades: {trades}\n- Winning trades: {wins} ({wins / trades * 100:.1f}%)\n"
+            f"- Net profit: ${profit:.2f}\n- Symbols traded: {', '.join(rng.choice(symbols, 2, replace=False))}"
+        )
+    return texts
+
+
+
+
+def throughput(encode, texts: list, batch_size: int, repeat: int) -> float:
+    """Best texts per second over `repeat` runs"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        encode(texts, batch_size)
+        best = min(best, time.perf_counter() - start)
+    return len(texts) / best
+
+
+
+
+def run(bulk: int, queries: int, batch_size: int, repeat: int, threads: int):
+    """Print a throughput / parity table"""
+    model = SentenceTransformer(settings.EMBEDDING_MODEL)
+    texts = make_texts(bulk)
+    query_texts = ["What days should I avoid trading?"] * queries
+    reference = model.encode(texts, batch_size=batch_size)
+    
+    export_dir = tempfile.mkdtemp()
+    backends = [
+        ('torch', lambda t, b: model.encode(t, batch_size=b)),
+        ('onnx-fp32', OnnxEmbedder(model, settings.EMBEDDING_MODEL, export_dir, quantize=False, threads=threads).encode),
+        ('onnx-int8', OnnxEmbedder(model, settings.EMBEDDING_MODEL, export_dir, quantize=True, threads=threads).encode)
+    ]
+    
+    print(f"{'backend':<10} {'query (texts/s)':>16} {'bulk (texts/s)':>15} {'min cos':>8} {'mean cos':>9}")
+    
+    for name, encode in backends:
+        encode(texts[:batch_size], batch_size)
+        
+        # Queries one at a time, bulk in batches
+        query_rate = throughput(lambda t, b: [encode([text], 1) for text in t], query_texts, 1, repeat)
+        bulk_rate = throughput(encode, texts, batch_size, repeat)
+        parity = cosine_parity(reference, np.asarray(encode(texts, batch_size)))
+        
+        print(
+            f"{name:<10} {query_rate:>16.1f} {bulk_rate:>15.1f} "
+            f"{parity['min_cosine']:>8.4f} {parity['mean_cosine']:>9.4f}"
+        )
+
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bulk", type=int, default=512, help="texts in the bulk batch")
+    parser.add_argument("--queries", type=int, default=64, help="single-text encodes")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threads", type=int, default=0, help="ONNX intra-op threads (0: CPU limit)")
+    args = parser.parse_args()
+    
+    run(args.bulk, args.queries, args.batch_size, args.repeat, args.threads)
@@ -2,6 +2,7 @@
 FastAPI routes for RAG service
 """
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 from uuid import UUID
 import logging
@@ -14,7 +15,9 @@ from ..models.schemas import (
     EmbeddingRequest,
     EmbeddingResponse
 )
-from ..services.rag_service import RAGService
+from ..services.rag_service import RAGService, embedding_progress, services_ready, warm_up_error
+from ..services.embedding_service import get_embedding_service
+from ..services.chromadb_service import get_chromadb_service
 
 
 logger = logging.getLogger(__name__)
@@ -33,7 +36,9 @@ async def generate_embeddings(
     """
     Generate embeddings for a backtest
     
-    This creates vector embeddings from trade data and stores them in ChromaDB
+    This creates vector embeddings from trade data and stores them in ChromaDB.
+    With `incremental`, only days whose trades changed since the last run are
+    re-embedded and days without trades are removed.
     """
     logger.info(f"Generating embeddings for backtest: {request.backtest_id}")
     
@@ -41,7 +46,8 @@ async def generate_embeddings(
         service = RAGService(db)
         result = await service.generate_embeddings_for_backtest(
             backtest_id=request.backtest_id,
-            force_regenerate=request.force_regenerate
+            force_regenerate=request.force_regenerate,
+            incremental=request.incremental
         )
         
         return EmbeddingResponse(
@@ -103,40 +109,42 @@ async def get_embedding_status(
     backtest_id: UUID,
     db: Session = Depends(get_db)
 ):
-    """Get embedding status for a backtest"""
-    service = RAGService(db)
+    """
+    Get embedding status for a backtest
     
-    exists = service.chromadb_service.collection_exists(backtest_id)
+    While a generation run is going (status `generating`), `progress` shows
+    trades processed and chunks written so far; `count` grows as batches land.
+    Runs are recorded in Postgres, so any replica reports them.
+    """
+    # ChromaDB only; constructing RAGService would load the embedding model
+    chromadb_service = get_chromadb_service()
     
-    if not exists:
-        return {
-            'backtest_id': str(backtest_id),
-            'exists': False,
-            'count': 0,
-            'status': 'not_created'
-        }
+    exists = chromadb_service.collection_exists(backtest_id)
+    count = chromadb_service.get_collection_count(backtest_id) if exists else 0
+    progress = embedding_progress(db, backtest_id)
     
-    count = service.chromadb_service.get_collection_count(backtest_id)
+    if progress is not None and progress['status'] == 'running':
+        status = 'generating'
+    elif progress is not None and progress['status'] == 'failed':
+        status = 'failed'
+    else:
+        status = 'ready' if exists else 'not_created'
     
     return {
         'backtest_id': str(backtest_id),
-        'exists': True,
+        'exists': exists,
         'count': count,
-        'status': 'ready'
+        'status': status,
+        'progress': progress
     }
 
 
 
 
 @router.delete("/embeddings/{backtest_id}")
-async def delete_embeddings(
-    backtest_id: UUID,
-    db: Session = Depends(get_db)
-):
+async def delete_embeddings(backtest_id: UUID):
     """Delete embeddings for a backtest"""
-    service = RAGService(db)
-    
-    success = service.chromadb_service.delete_collection(backtest_id)
+    success = get_chromadb_service().delete_collection(backtest_id)
     
     if not success:
         raise HTTPException(
@@ -155,9 +163,36 @@ async def delete_embeddings(
 
 @router.get("/health")
 def health_check():
-    """Health check endpoint"""
+    """Liveness check: 503 once every warm-up attempt has failed"""
+    error = warm_up_error()
+    if error is not None:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "warm_up_failed", "service": "rag-engine", "error": error}
+        )
+    
     return {
         "status": "healthy",
         "service": "rag-engine"
     }
 
+
+
+
+@router.get("/ready")
+def readiness_check():
+    """Readiness check: 503 until the embedding model is loaded and warmed up"""
+    if not services_ready():
+        return JSONResponse(
+            status_code=503,
+            content={"status": "warming_up", "service": "rag-engine"}
+        )
+    
+    embedding_service = get_embedding_service()
+    
+    return {
+        "status": "ready",
+        "service": "rag-engine",
+        "embedding_backend": embedding_service.backend,
+        "embedding_parity": embedding_service.parity
+    }
@@ -29,6 +29,23 @@ class Settings(BaseSettings):
     # Embeddings
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
     EMBEDDING_DIMENSION: int = 384
+    EMBEDDING_BACKEND: str = "torch"  # torch, onnx
+    EMBEDDING_ONNX_DIR: str = "/tmp/rag-engine/onnx"  # exported models
+    EMBEDDING_ONNX_QUANTIZE: bool = True  # dynamic int8 weights
+    EMBEDDING_ONNX_THREADS: int = 0  # 0 = container CPU limit
+    EMBEDDING_ONNX_MIN_COSINE: float = 0.99  # parity below this keeps PyTorch
+    EMBEDDING_BATCH_MAX_SIZE: int = 32  # query encodes per micro-batch
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0  # longest a query waits for its batch to fill
+    EMBEDDING_CACHE_PATH: str = "/tmp/rag-engine/embedding_cache.sqlite"  # empty disables the cache
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 100000  # least recently used entries evicted beyond this (0 = unbounded)
+    EMBEDDING_STREAM_ROWS: int = 2000  # daily summary rows fetched per server-side cursor round trip
+    EMBEDDING_UPSERT_BATCH: int = 64  # chunks encoded and upserted together
+    EMBEDDING_RUN_HEARTBEAT_INTERVAL: int = 30  # seconds between heartbeats of a running embedding run
+    EMBEDDING_RUN_STALE_AFTER: int = 300  # seconds without a heartbeat before a run counts as interrupted
+    
+    # Startup
+    WARM_UP_ATTEMPTS: int = 5  # model/ChromaDB load attempts before reporting unhealthy
+    WARM_UP_RETRY_SECONDS: float = 10.0  # pause between attempts
     
     # RAG settings
     CHUNK_SIZE: int = 500
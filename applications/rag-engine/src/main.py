@@ -3,11 +3,15 @@ FastAPI application entry point for RAG service
 """
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
 import logging
 
 
 from .config import settings
 from .api.routes import router
+from .models.database import init_db
+from .services.rag_service import warm_up_services
+from .services.embedding_batcher import close_embedding_batcher
 
 
 # Configure logging
@@ -20,6 +24,10 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+# Initialize database
+init_db()
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.APP_NAME,
@@ -50,6 +58,10 @@ async def startup_event():
     logger.info(f"ChromaDB: {settings.CHROMADB_HOST}:{settings.CHROMADB_PORT}")
     logger.info(f"Ollama: {settings.OLLAMA_HOST}:{settings.OLLAMA_PORT}")
     logger.info(f"Embedding Model: {settings.EMBEDDING_MODEL}")
+    
+    # Load and warm the shared model off the event loop; /api/v1/ready reports
+    # when done, /api/v1/health fails if every attempt failed
+    app.state.warm_up = asyncio.create_task(asyncio.to_thread(warm_up_services))
 
 
 
@@ -57,6 +69,7 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down RAG service")
+    await close_embedding_batcher()
 
 
 
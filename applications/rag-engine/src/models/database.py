@@ -48,7 +48,7 @@ class Trade(Base):
     profit = Column(DECIMAL(18, 8))
     pips = Column(DECIMAL(10, 2))
     
-    metadata = Column(JSONB)
+    extra_data = Column(JSONB)
 
 
 
@@ -70,6 +70,29 @@ class Backtest(Base):
 
 
 
+class EmbeddingRun(Base):
+    """Latest embedding run of a backtest, shared by all replicas"""
+    __tablename__ = "embedding_runs"
+    
+    backtest_id = Column(UUID(as_uuid=True), primary_key=True)
+    
+    status = Column(String(50), nullable=False)  # running, completed, failed
+    worker_id = Column(String(255))  # process running (or last ran) the embedding
+    
+    trades_total = Column(Integer)
+    trades_processed = Column(Integer, default=0)
+    chunks_written = Column(Integer, default=0)
+    chunks_unchanged = Column(Integer, default=0)
+    chunks_deleted = Column(Integer, default=0)
+    error = Column(Text)
+    
+    started_at = Column(TIMESTAMP)
+    updated_at = Column(TIMESTAMP, default=datetime.utcnow)  # heartbeat of a running run
+    finished_at = Column(TIMESTAMP)
+
+
+
+
 # Database dependency
 def get_db():
     """Get database session"""
@@ -78,3 +101,11 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+
+
+# Create tables
+def init_db():
+    """Initialize database tables owned by this service"""
+    Base.metadata.create_all(bind=engine, tables=[EmbeddingRun.__table__])
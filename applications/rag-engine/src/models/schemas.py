@@ -59,6 +59,7 @@ class EmbeddingRequest(BaseModel):
     """Request to generate embeddings"""
     backtest_id: UUID
     force_regenerate: bool = False
+    incremental: bool = Field(False, description="Re-embed only days whose trades changed")
 
 
 
@@ -67,5 +68,7 @@ class EmbeddingResponse(BaseModel):
     """Embedding generation response"""
     backtest_id: UUID
     chunks_created: int
+    chunks_unchanged: int = 0
+    chunks_deleted: int = 0
     status: str
     message: str
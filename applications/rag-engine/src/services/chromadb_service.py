@@ -6,6 +6,7 @@ from chromadb.config import Settings as ChromaSettings
 from typing import List, Dict, Any, Optional
 from uuid import UUID
 import logging
+import threading
 
 
 from ..config import settings
@@ -75,6 +76,44 @@ class ChromaDBService:
         logger.info(f"Successfully added {len(embeddings)} embeddings")
         return len(embeddings)
     
+    def upsert_embeddings(
+        self,
+        backtest_id: UUID,
+        embeddings: List[List[float]],
+        documents: List[str],
+        metadatas: List[Dict[str, Any]],
+        ids: List[str]
+    ) -> int:
+        """Insert embeddings, replacing any with the same ids"""
+        collection = self.get_or_create_collection(backtest_id)
+        
+        collection.upsert(
+            embeddings=embeddings,
+            documents=documents,
+            metadatas=metadatas,
+            ids=ids
+        )
+        
+        logger.info(f"Upserted {len(embeddings)} embeddings")
+        return len(embeddings)
+    
+    def get_metadatas(self, backtest_id: UUID) -> Dict[str, Dict[str, Any]]:
+        """Metadata of every item in a collection, by id (no embeddings or documents)"""
+        collection = self.get_or_create_collection(backtest_id)
+        items = collection.get(include=['metadatas'])
+        return dict(zip(items['ids'], items['metadatas']))
+    
+    def delete_embeddings(self, backtest_id: UUID, ids: List[str]) -> int:
+        """Delete items by id"""
+        if not ids:
+            return 0
+        
+        collection = self.get_or_create_collection(backtest_id)
+        collection.delete(ids=ids)
+        
+        logger.info(f"Deleted {len(ids)} embeddings")
+        return len(ids)
+    
     def query(
         self,
         backtest_id: UUID,
@@ -124,3 +163,19 @@ class ChromaDBService:
             return collection.count()
         except:
             return 0
+
+
+
+
+_shared_service: Optional[ChromaDBService] = None
+_shared_lock = threading.Lock()
+
+
+def get_chromadb_service() -> ChromaDBService:
+    """Process-wide ChromaDB client shared by every request"""
+    global _shared_service
+    if _shared_service is None:
+        with _shared_lock:
+            if _shared_service is None:
+                _shared_service = ChromaDBService()
+    return _shared_service
@@ -0,0 +1,144 @@
+"""
+Embedding batcher - Micro-batches concurrent query encodes off the event loop
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional, Tuple
+import asyncio
+import logging
+import threading
+import numpy as np
+
+
+from ..config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+
+
+class EmbeddingBatcher:
+    """
+    Collects concurrent single-text encode requests into micro-batches
+    
+    The first request of a batch waits at most `max_wait_ms` for others (or
+    until `max_batch_size` are queued). The batch is then encoded in one
+    model call on a worker thread, so the event loop keeps serving, and each
+    caller's future gets its own vector. Requests arriving during an encode
+    form the next batch, so batches grow with load instead of requests
+    queuing one by one.
+    """
+    
+    def __init__(
+        self,
+        encode: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0
+    ):
+        """
+        Args:
+            encode: Encodes a list of texts into an array of vectors
+            max_batch_size: Most texts per model call
+            max_wait_ms: Longest a request waits for a batch to fill
+        """
+        self.encode = encode
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding")
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+    
+    async def embed(self, text: str) -> List[float]:
+        """Encode one text as part of the next micro-batch"""
+        loop = asyncio.get_running_loop()
+        
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        
+        future = loop.create_future()
+        self._queue.put_nowait((text, future))
+        return await future
+    
+    async def _collect(self) -> List[Tuple[str, asyncio.Future]]:
+        """Wait for a request, then gather more until the batch is full or the wait is over"""
+        loop = asyncio.get_running_loop()
+        
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        
+        while len(batch) < self.max_batch_size:
+            # Take whatever is already queued without waiting
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        
+        return batch
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        
+        while True:
+            batch = await self._collect()
+            texts = [text for text, _ in batch]
+            
+            try:
+                vectors = await loop.run_in_executor(self._executor, self.encode, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(np.asarray(vector).tolist())
+    
+    async def close(self):
+        """Stop the batching task and the encode thread"""
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False)
+
+
+
+
+_shared_batcher: Optional[EmbeddingBatcher] = None
+_shared_lock = threading.Lock()
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """Process-wide batcher over the shared embedding model"""
+    global _shared_batcher
+    if _shared_batcher is None:
+        with _shared_lock:
+            if _shared_batcher is None:
+                from .embedding_service import get_embedding_service
+                
+                _shared_batcher = EmbeddingBatcher(
+                    get_embedding_service().encode_queries,
+                    max_batch_size=settings.EMBEDDING_BATCH_MAX_SIZE,
+                    max_wait_ms=settings.EMBEDDING_BATCH_MAX_WAIT_MS
+                )
+    return _shared_batcher
+
+
+
+
+async def close_embedding_batcher():
+    """Stop the shared batcher, if one was created"""
+    if _shared_batcher is not None:
+        await _shared_batcher.close()
@@ -0,0 +1,148 @@
+"""
+Embedding cache - Content-addressed store of chunk embeddings on local disk
+"""
+from typing import Dict, List, Optional
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import numpy as np
+
+
+logger = logging.getLogger(__name__)
+
+
+# Keys per SQL statement (SQLite's default variable limit is 999)
+LOOKUP_BATCH = 500
+
+
+
+
+class EmbeddingCache:
+    """
+    SQLite table of float32 vectors keyed by sha256(model name + text)
+    
+    Unchanged chunk texts map to the same key, so re-embedding a backtest
+    only encodes new or edited chunks. Vectors are stored as raw float32
+    bytes; the model name in the key keeps vectors of different models apart.
+    
+    With `max_entries` set, every read or write stamps the entry's
+    `last_used`, and writes that grow the table past the bound delete the
+    least recently used entries.
+    """
+    
+    def __init__(self, path: str, model_name: str, max_entries: int = 0):
+        """
+        Args:
+            path: SQLite file, created with its directory if missing
+            model_name: Model whose vectors this cache holds
+            max_entries: Most entries kept (0 = unbounded)
+        """
+        self.path = path
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._clock = 0
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used INTEGER NOT NULL DEFAULT 0)"
+        )
+        
+        # Caches written before eviction existed lack last_used; their
+        # entries count as least recently used
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(embeddings)")]
+        if 'last_used' not in columns:
+            self._conn.execute("ALTER TABLE embeddings ADD COLUMN last_used INTEGER NOT NULL DEFAULT 0")
+        
+        self._conn.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self._conn.commit()
+        
+        logger.info(f"Embedding cache at {path}")
+    
+    def key(self, text: str) -> str:
+        """Cache key of a text for this cache's model"""
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode('utf-8')).hexdigest()
+    
+    def _tick(self) -> int:
+        """Strictly increasing use stamp (nanoseconds), so the order survives restarts"""
+        self._clock = max(time.time_ns(), self._clock + 1)
+        return self._clock
+    
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        """Vectors found for the given keys (marked as used when the cache is bounded)"""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), LOOKUP_BATCH):
+                batch = keys[start:start + LOOKUP_BATCH]
+                placeholders = ','.join('?' * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float32)
+            
+            if found and self.max_entries:
+                now = self._tick()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+        return found
+    
+    def put_many(self, vectors: Dict[str, np.ndarray]):
+        """Store vectors by key (existing keys are overwritten), then evict past max_entries"""
+        with self._lock:
+            now = self._tick()
+            rows = [
+                (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                for key, vector in vectors.items()
+            ]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                rows
+            )
+            
+            if self.max_entries:
+                excess = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    self._conn.execute(
+                        "DELETE FROM embeddings WHERE key IN "
+                        "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+                        (excess,)
+                    )
+                    logger.info(f"Evicted {excess} least recently used embeddings")
+            
+            self._conn.commit()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+
+
+def open_embedding_cache(path: Optional[str], model_name: str, max_entries: int = 0) -> Optional[EmbeddingCache]:
+    """Open the cache, or return None (caching off) if path is empty or unusable"""
+    if not path:
+        return None
+    
+    try:
+        return EmbeddingCache(path, model_name, max_entries)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"Embedding cache disabled, cannot open {path}: {e}")
+        return None
@@ -2,12 +2,15 @@
 Embedding generation service
 """
 from sentence_transformers import SentenceTransformer
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import logging
+import threading
 from uuid import UUID
+import numpy as np
 
 
 from ..config import settings
+from .embedding_cache import open_embedding_cache
 
 
 logger = logging.getLogger(__name__)
@@ -22,68 +25,125 @@ class EmbeddingService:
         logger.info(f"Loading embedding model: {settings.EMBEDDING_MODEL}")
         self.model = SentenceTransformer(settings.EMBEDDING_MODEL)
         logger.info("Embedding model loaded successfully")
+        
+        self.backend = 'torch'
+        self.parity: Optional[Dict[str, float]] = None
+        if settings.EMBEDDING_BACKEND == 'onnx':
+            self._use_onnx()
+        
+        # Vectors of other backends differ slightly, so they are cached apart
+        cache_model = settings.EMBEDDING_MODEL if self.backend == 'torch' else f"{settings.EMBEDDING_MODEL}#{self.backend}"
+        self.cache = open_embedding_cache(
+            settings.EMBEDDING_CACHE_PATH, cache_model, settings.EMBEDDING_CACHE_MAX_ENTRIES
+        )
+    
+    def _use_onnx(self):
+        """
+        Switch encoding to the ONNX Runtime backend if it matches PyTorch
+        
+        The exported model's embeddings of a fixed sample are compared with
+        the PyTorch ones; below EMBEDDING_ONNX_MIN_COSINE the PyTorch model
+        is kept. The comparison is kept in `parity`.
+        """
+        try:
+            # onnxruntime is only needed when this backend is selected
+            from .onnx_embedder import OnnxEmbedder, PARITY_TEXTS, cosine_parity
+            
+            embedder = OnnxEmbedder(
+                self.model,
+                settings.EMBEDDING_MODEL,
+                settings.EMBEDDING_ONNX_DIR,
+                quantize=settings.EMBEDDING_ONNX_QUANTIZE,
+                threads=settings.EMBEDDING_ONNX_THREADS
+            )
+        except Exception as e:
+            logger.error(f"ONNX embedding backend unavailable, using PyTorch: {e}")
+            return
+        
+        self.parity = cosine_parity(self.model.encode(PARITY_TEXTS), embedder.encode(PARITY_TEXTS))
+        logger.info(f"ONNX/PyTorch embedding parity: {self.parity}")
+        
+        if self.parity['min_cosine'] < settings.EMBEDDING_ONNX_MIN_COSINE:
+            logger.warning("ONNX embeddings diverge from PyTorch, keeping PyTorch backend")
+            return
+        
+        self.model = embedder
+        self.backend = 'onnx-int8' if settings.EMBEDDING_ONNX_QUANTIZE else 'onnx'
+    
+    def warm_up(self):
+        """Run one encode so the first request does not pay for lazy initialization"""
+        self.model.encode(["warm-up"], convert_to_tensor=False)
+        logger.info("Embedding model warmed up")
     
     def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding for a single text"""
         embedding = self.model.encode(text, convert_to_tensor=False)
         return embedding.tolist()
     
+    def encode_queries(self, texts: List[str]) -> np.ndarray:
+        """Encode a micro-batch of query texts (uncached, no progress bar)"""
+        return self.model.encode(texts, convert_to_tensor=False, batch_size=len(texts))
+    
     def generate_embeddings_batch(self, texts: List[str]) -> List[List[float]]:
-        """Generate embeddings for multiple texts"""
-        logger.info(f"Generating embeddings for {len(texts)} texts")
-        embeddings = self.model.encode(
+        """
+        Generate embeddings for multiple texts
+        
+        With the embedding cache enabled, only texts not embedded before (by
+        this model) are encoded; duplicates within the batch are encoded once.
+        """
+        if self.cache is None:
+            logger.info(f"Generating embeddings for {len(texts)} texts")
+            return [emb.tolist() for emb in self._encode(texts)]
+        
+        keys = [self.cache.key(text) for text in texts]
+        vectors = self.cache.get_many(list(set(keys)))
+        
+        missing = {key: text for key, text in zip(keys, texts) if key not in vectors}
+        logger.info(f"Generating embeddings for {len(texts)} texts ({len(missing)} not cached)")
+        
+        if missing:
+            encoded = dict(zip(missing, self._encode(list(missing.values()))))
+            self.cache.put_many(encoded)
+            vectors.update(encoded)
+        
+        return [vectors[key].tolist() for key in keys]
+    
+    def _encode(self, texts: List[str]) -> np.ndarray:
+        """Run the model over texts in batches"""
+        return self.model.encode(
             texts,
             convert_to_tensor=False,
             show_progress_bar=True,
             batch_size=32
         )
-        return [emb.tolist() for emb in embeddings]
     
-    def create_trade_chunks(self, trades: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def create_daily_chunk(self, summary: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Create text chunks from trade data
+        Create the text chunk of one trading day
         
-        Groups trades by day and creates descriptive text chunks
+        Args:
+            summary: The day's aggregates: date, total_trades, winning_trades,
+                net_profit, avg_profit, symbols, best_symbol, best_profit,
+                worst_symbol and worst_profit; `content_hash`, if present, is
+                kept in the metadata to detect changed days
         """
-        logger.info(f"Creating chunks from {len(trades)} trades")
-        
-        chunks = []
-        
-        # Group trades by date
-        from collections import defaultdict
-        trades_by_date = defaultdict(list)
-        
-        for trade in trades:
-            date = trade['open_time'].date() if hasattr(trade['open_time'], 'date') else trade['open_time'][:10]
-            trades_by_date[date].append(trade)
-        
-        # Create chunks for each day
-        for date, day_trades in trades_by_date.items():
-            chunk_text = self._create_daily_summary_text(date, day_trades)
-            
-            chunks.append({
-                'text': chunk_text,
-                'metadata': {
-                    'date': str(date),
-                    'trade_count': len(day_trades),
-                    'type': 'daily_summary'
-                }
-            })
-        
-        logger.info(f"Created {len(chunks)} chunks")
-        return chunks
+        return {
+            'text': self._create_daily_summary_text(summary),
+            'metadata': {
+                'date': str(summary['date']),
+                'trade_count': summary['total_trades'],
+                'type': 'daily_summary',
+                'content_hash': summary.get('content_hash', '')
+            }
+        }
     
-    def _create_daily_summary_text(self, date: str, trades: List[Dict[str, Any]]) -> str:
-        """Create descriptive text for a day's trades"""
+    def _create_daily_summary_text(self, summary: Dict[str, Any]) -> str:
+        """Create descriptive text for a day's aggregates"""
         
-        total_trades = len(trades)
-        winning_trades = sum(1 for t in trades if t.get('profit', 0) > 0)
+        date = summary['date']
+        total_trades = summary['total_trades']
+        winning_trades = summary['winning_trades']
         losing_trades = total_trades - winning_trades
-        total_profit = sum(t.get('profit', 0) for t in trades)
-        
-        # Calculate additional metrics
-        symbols = list(set(t.get('symbol', 'UNKNOWN') for t in trades))
-        avg_profit = total_profit / total_trades if total_trades > 0 else 0
         
         # Day of week
         from datetime import datetime
@@ -99,16 +159,29 @@ Trading Summary for {date} ({day_name}):
 - Total trades: {total_trades}
 - Winning trades: {winning_trades} ({winning_trades/total_trades*100:.1f}%)
 - Losing trades: {losing_trades}
-- Net profit: ${total_profit:.2f}
-- Average profit per trade: ${avg_profit:.2f}
-- Symbols traded: {', '.join(symbols)}
+- Net profit: ${summary['net_profit']:.2f}
+- Average profit per trade: ${summary['avg_profit']:.2f}
+- Symbols traded: {', '.join(summary['symbols'])}
 """
         
         # Add notable events
-        max_profit_trade = max(trades, key=lambda t: t.get('profit', 0))
-        max_loss_trade = min(trades, key=lambda t: t.get('profit', 0))
-        
-        text += f"\nBest trade: {max_profit_trade.get('symbol')} ${max_profit_trade.get('profit', 0):.2f}"
-        text += f"\nWorst trade: {max_loss_trade.get('symbol')} ${max_loss_trade.get('profit', 0):.2f}"
+        text += f"\nBest trade: {summary['best_symbol']} ${summary['best_profit']:.2f}"
+        text += f"\nWorst trade: {summary['worst_symbol']} ${summary['worst_profit']:.2f}"
         
         return text.strip()
+
+
+
+
+_shared_service: Optional[EmbeddingService] = None
+_shared_lock = threading.Lock()
+
+
+def get_embedding_service() -> EmbeddingService:
+    """Process-wide embedding service; the model is loaded once and shared by every request"""
+    global _shared_service
+    if _shared_service is None:
+        with _shared_lock:
+            if _shared_service is None:
+                _shared_service = EmbeddingService()
+    return _shared_service
@@ -0,0 +1,203 @@
+"""
+ONNX Runtime embedding backend - Exported, int8-quantized sentence-transformer for CPU
+"""
+from typing import List, Optional, Union
+import inspect
+import logging
+import os
+import numpy as np
+import onnxruntime as ort
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
+
+
+logger = logging.getLogger(__name__)
+
+
+# Part of the export file names; bump when the export itself changes so
+# files written by an older version are not reused
+EXPORT_VERSION = 2
+
+# Fixed sample used to compare ONNX and PyTorch embeddings at startup
+PARITY_TEXTS = [
+    "warm-up",
+    "What days should I avoid trading?",
+    "Show me the best performing symbols",
+    "Trading Summary for 2024-03-15 (Friday): Total trades: 12, Winning trades: 7 (58.3%), Net profit: $412.50",
+    "Worst trade: EURUSD $-120.00"
+]
+
+
+
+
+def cpu_limit() -> int:
+    """CPUs available to this container (cgroup quota, else affinity mask)"""
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return max(1, int(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+
+
+class OnnxEmbedder:
+    """
+    Drop-in `encode` for a SentenceTransformer, run on ONNX Runtime
+    
+    The transformer is exported once to ONNX (dynamic batch and sequence
+    axes), optionally quantized with dynamic int8 weights, and cached under
+    `export_dir`. Pooling (attention-masked mean) and L2 normalization
+    follow the sentence-transformer's own pipeline.
+    """
+    
+    def __init__(
+        self,
+        model,
+        model_name: str,
+        export_dir: str,
+        quantize: bool = True,
+        threads: int = 0
+    ):
+        """
+        Args:
+            model: Loaded SentenceTransformer to export (tokenizer and settings are reused)
+            model_name: Name used for the export file names
+            export_dir: Directory for the .onnx files
+            quantize: Apply dynamic int8 quantization to the weights
+            threads: Intra-op threads; 0 uses the container CPU limit
+        """
+        pooling = model[1] if len(model) > 1 else None
+        if not getattr(pooling, 'pooling_mode_mean_tokens', False):
+            raise ValueError("Only mean-pooling sentence-transformers are supported")
+        
+        self.tokenizer = model.tokenizer
+        self.max_seq_length = model.max_seq_length
+        self.normalize = any(type(module).__name__ == 'Normalize' for module in model)
+        self.threads = threads or cpu_limit()
+        self.quantize = quantize
+        
+        path = self._export(model, model_name, export_dir)
+        
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.intra_op_num_threads = self.threads
+        options.inter_op_num_threads = 1
+        
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        
+        logger.info(f"ONNX embedder ready: {path} ({self.threads} threads)")
+    
+    def _export(self, model, model_name: str, export_dir: str) -> str:
+        """Export (and quantize) the transformer unless a previous export exists"""
+        os.makedirs(export_dir, exist_ok=True)
+        base = os.path.join(export_dir, f"{model_name.replace('/', '__')}.v{EXPORT_VERSION}")
+        fp32_path = f"{base}.onnx"
+        int8_path = f"{base}.int8.onnx"
+        target = int8_path if self.quantize else fp32_path
+        
+        if os.path.exists(target):
+            return target
+        
+        if not os.path.exists(fp32_path):
+            logger.info(f"Exporting {model_name} to ONNX")
+            transformer = model[0].auto_model.eval()
+            sample = self.tokenizer(["warm-up"], padding=True, truncation=True, return_tensors='pt')
+            
+            # Graph inputs follow forward()'s parameter order, not the
+            # tokenizer's key order (BERT: input_ids, attention_mask,
+            # token_type_ids), so inputs are passed by keyword and named in
+            # that order
+            names = [name for name in inspect.signature(transformer.forward).parameters if name in sample]
+            
+            with torch.no_grad():
+                torch.onnx.export(
+                    transformer,
+                    ({name: sample[name] for name in names},),
+                    fp32_path,
+                    input_names=names,
+                    output_names=['last_hidden_state'],
+                    dynamic_axes={
+                        **{name: {0: 'batch', 1: 'sequence'} for name in names},
+                        'last_hidden_state': {0: 'batch', 1: 'sequence'}
+                    },
+                    opset_version=14
+                )
+        
+        if self.quantize:
+            logger.info(f"Quantizing {fp32_path} (dynamic int8)")
+            quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+        
+        return target
+    
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        convert_to_tensor: bool = False,
+        show_progress_bar: bool = False
+    ) -> np.ndarray:
+        """
+        Embed texts like SentenceTransformer.encode
+        
+        Args:
+            sentences: One text or a list of texts
+            batch_size: Texts per session run
+            convert_to_tensor: Accepted for compatibility; arrays are always returned
+            show_progress_bar: Accepted for compatibility
+        
+        Returns:
+            Array of shape (dimension,) for one text, else (n, dimension)
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        
+        # Sort by length so each batch pads to similar lengths
+        order = np.argsort([-len(text) for text in texts], kind='stable')
+        embeddings: List[Optional[np.ndarray]] = [None] * len(texts)
+        
+        for start in range(0, len(texts), batch_size):
+            rows = order[start:start + batch_size]
+            encoded = self.tokenizer(
+                [texts[i] for i in rows],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors='np'
+            )
+            inputs = {name: encoded[name].astype(np.int64) for name in self.input_names}
+            hidden = self.session.run(None, inputs)[0]
+            
+            # Mean over real tokens
+            mask = inputs['attention_mask'][:, :, None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            
+            for i, vector in zip(rows, pooled):
+                embeddings[i] = vector
+        
+        result = np.vstack(embeddings).astype(np.float32) if embeddings else np.empty((0, 0), dtype=np.float32)
+        return result[0] if single else result
+
+
+
+
+def cosine_parity(reference: np.ndarray, candidate: np.ndarray) -> dict:
+    """Row-wise cosine similarity between two embedding matrices (min and mean)"""
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    similarity = (reference * candidate).sum(axis=1)
+    return {
+        'min_cosine': round(float(similarity.min()), 6),
+        'mean_cosine': round(float(similarity.mean()), 6)
+    }
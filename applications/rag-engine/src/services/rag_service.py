@@ -1,21 +1,213 @@
 """
 RAG (Retrieval Augmented Generation) service
 """
+from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
-from uuid import UUID
+from uuid import UUID, uuid4
+import asyncio
 import logging
+import socket
+import threading
+import time
 import httpx
+from sqlalchemy import distinct, func, literal_column, or_
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg, insert
 from sqlalchemy.orm import Session
 
 
 from ..config import settings
-from .embedding_service import EmbeddingService
-from .chromadb_service import ChromaDBService
+from .embedding_service import get_embedding_service
+from .embedding_batcher import get_embedding_batcher
+from .chromadb_service import get_chromadb_service
 
 
 logger = logging.getLogger(__name__)
 
 
+# Set once the shared model and client are loaded and warmed up
+_ready = threading.Event()
+
+# Last warm-up error once every attempt has failed
+_warm_up_error: Optional[str] = None
+
+
+
+
+def warm_up_services():
+    """
+    Load the shared embedding model and ChromaDB client, run a warm-up encode, then mark ready
+    
+    Failed attempts (e.g. ChromaDB not up yet) are retried
+    WARM_UP_ATTEMPTS times, WARM_UP_RETRY_SECONDS apart. If all fail the
+    error is kept, so the liveness check fails and the pod is restarted.
+    """
+    global _warm_up_error
+    
+    for attempt in range(1, settings.WARM_UP_ATTEMPTS + 1):
+        try:
+            get_embedding_service().warm_up()
+            get_embedding_batcher()
+            get_chromadb_service()
+        except Exception as e:
+            logger.error(f"Warm-up attempt {attempt}/{settings.WARM_UP_ATTEMPTS} failed: {e}")
+            if attempt == settings.WARM_UP_ATTEMPTS:
+                _warm_up_error = str(e)
+                logger.error("Warm-up failed, reporting unhealthy")
+                return
+            time.sleep(settings.WARM_UP_RETRY_SECONDS)
+        else:
+            _ready.set()
+            logger.info("RAG services ready")
+            return
+
+
+
+
+def services_ready() -> bool:
+    """True once warm_up_services has completed"""
+    return _ready.is_set()
+
+
+
+
+def warm_up_error() -> Optional[str]:
+    """Error of the last warm-up attempt once every attempt has failed, else None"""
+    return _warm_up_error
+
+
+
+
+# Owner token of this process; a restarted or replacement pod gets a new one
+WORKER_ID = f"{socket.gethostname()}-{uuid4().hex[:8]}"
+
+INTERRUPTED = 'Interrupted: worker stopped heartbeating'
+
+
+
+
+class EmbeddingRunLost(Exception):
+    """Raised when another worker took over a run this process was writing"""
+
+
+
+
+def embedding_progress(db: Session, backtest_id: UUID) -> Optional[Dict[str, Any]]:
+    """
+    Progress of the latest embedding run of a backtest, or None
+    
+    Runs are recorded in embedding_runs, so every replica reports the same
+    run. A running row not updated for EMBEDDING_RUN_STALE_AFTER seconds lost
+    its worker and is reported as failed.
+    """
+    from ..models.database import EmbeddingRun
+    
+    run = db.query(EmbeddingRun).filter(
+        EmbeddingRun.backtest_id == backtest_id
+    ).populate_existing().first()
+    if run is None:
+        return None
+    
+    progress = {
+        'status': run.status,
+        'trades_total': run.trades_total,
+        'trades_processed': run.trades_processed,
+        'chunks_written': run.chunks_written,
+        'chunks_unchanged': run.chunks_unchanged,
+        'chunks_deleted': run.chunks_deleted,
+        'started_at': run.started_at.isoformat() if run.started_at else None,
+        'finished_at': run.finished_at.isoformat() if run.finished_at else None,
+        'error': run.error
+    }
+    
+    stale_after = timedelta(seconds=settings.EMBEDDING_RUN_STALE_AFTER)
+    if run.status == 'running' and datetime.utcnow() - run.updated_at > stale_after:
+        progress.update(status='failed', error=INTERRUPTED)
+    
+    return progress
+
+
+def _claim_run(backtest_id: UUID) -> bool:
+    """
+    Start a run of a backtest in this process; False if another worker runs it
+    
+    One upsert inserts the backtest's row or resets it, unless it is running
+    and still heartbeating. Postgres re-checks that condition on the locked
+    row, so of two replicas claiming at once only one succeeds.
+    """
+    from ..models.database import SessionLocal, EmbeddingRun
+    
+    now = datetime.utcnow()
+    fields = {
+        'status': 'running',
+        'worker_id': WORKER_ID,
+        'trades_total': None,
+        'trades_processed': 0,
+        'chunks_written': 0,
+        'chunks_unchanged': 0,
+        'chunks_deleted': 0,
+        'error': None,
+        'started_at': now,
+        'updated_at': now,
+        'finished_at': None
+    }
+    cutoff = now - timedelta(seconds=settings.EMBEDDING_RUN_STALE_AFTER)
+    
+    statement = insert(EmbeddingRun).values(backtest_id=backtest_id, **fields).on_conflict_do_update(
+        index_elements=[EmbeddingRun.backtest_id],
+        set_=fields,
+        where=or_(EmbeddingRun.status != 'running', EmbeddingRun.updated_at < cutoff)
+    )
+    
+    with SessionLocal() as db:
+        claimed = db.execute(statement).rowcount
+        db.commit()
+    
+    return bool(claimed)
+
+
+def _update_run(backtest_id: UUID, **fields) -> bool:
+    """
+    Update a run only while this process owns it; False if it does not
+    
+    Writes use their own session: the run's session is streaming trades
+    through a server-side cursor, which a commit would close.
+    """
+    from ..models.database import SessionLocal, EmbeddingRun
+    
+    with SessionLocal() as db:
+        written = db.query(EmbeddingRun).filter(
+            EmbeddingRun.backtest_id == backtest_id,
+            EmbeddingRun.worker_id == WORKER_ID,
+            EmbeddingRun.status == 'running'
+        ).update({**fields, 'updated_at': datetime.utcnow()}, synchronize_session=False)
+        db.commit()
+    
+    return bool(written)
+
+
+def _update_progress(backtest_id: UUID, **fields):
+    if not _update_run(backtest_id, **fields):
+        raise EmbeddingRunLost(f"Embedding run of backtest {backtest_id} was taken over by another worker")
+
+
+async def _heartbeat(backtest_id: UUID):
+    """Keep a run fresh while its worker thread is between progress writes"""
+    while True:
+        await asyncio.sleep(settings.EMBEDDING_RUN_HEARTBEAT_INTERVAL)
+        try:
+            if not await asyncio.to_thread(_update_run, backtest_id):
+                return
+        except Exception as e:
+            logger.warning(f"Embedding run heartbeat failed: {e}")
+
+
+
+
+def chunk_id(backtest_id: UUID, metadata: Dict[str, Any]) -> str:
+    """Stable id of a chunk: backtest, date and chunk type"""
+    return f"{backtest_id}_{metadata['date']}_{metadata['type']}"
+
+
 
 
 class RAGService:
@@ -23,18 +215,37 @@ class RAGService:
     
     def __init__(self, db: Session):
         self.db = db
-        self.embedding_service = EmbeddingService()
-        self.chromadb_service = ChromaDBService()
+        self.embedding_service = get_embedding_service()
+        self.chromadb_service = get_chromadb_service()
     
     async def generate_embeddings_for_backtest(
         self,
         backtest_id: UUID,
-        force_regenerate: bool = False
+        force_regenerate: bool = False,
+        incremental: bool = False
     ) -> Dict[str, Any]:
-        """Generate and store embeddings for a backtest"""
+        """
+        Generate and store embeddings for a backtest
+        
+        The pipeline runs on a worker thread, so the event loop keeps serving
+        requests, including the status endpoint that reports its progress.
+        
+        Args:
+            backtest_id: Backtest to embed
+            force_regenerate: Re-embed every day even if embeddings exist
+            incremental: Re-embed only days whose trades changed since the
+                last run, and delete days that no longer have trades
+        """
+        progress = embedding_progress(self.db, backtest_id)
+        if progress is not None and progress['status'] == 'running':
+            return self._in_progress(progress)
+        
+        # A failed run leaves a partial collection, so it is resumed incrementally
+        if progress is not None and progress['status'] == 'failed' and not force_regenerate:
+            incremental = True
         
         # Check if embeddings already exist
-        if not force_regenerate and self.chromadb_service.collection_exists(backtest_id):
+        if not force_regenerate and not incremental and self.chromadb_service.collection_exists(backtest_id):
             count = self.chromadb_service.get_collection_count(backtest_id)
             logger.info(f"Embeddings already exist for backtest {backtest_id}: {count} chunks")
             return {
@@ -43,61 +254,211 @@ class RAGService:
                 'message': 'Embeddings already exist'
             }
         
-        # Fetch trades from database
-        logger.info(f"Fetching trades for backtest {backtest_id}")
+        # Another replica may have started the run since it was read
+        if not _claim_run(backtest_id):
+            return self._in_progress(embedding_progress(self.db, backtest_id))
+        
+        heartbeat = asyncio.create_task(_heartbeat(backtest_id))
+        try:
+            counts = await asyncio.to_thread(self._stream_embeddings, backtest_id, incremental)
+        except Exception as e:
+            _update_run(backtest_id, status='failed', error=str(e), finished_at=datetime.utcnow())
+            raise
+        finally:
+            heartbeat.cancel()
+        
+        _update_run(backtest_id, status='completed', finished_at=datetime.utcnow())
+        
+        if incremental:
+            return {
+                'status': 'updated',
+                **counts,
+                'message': (
+                    f"Re-embedded {counts['chunks_created']} changed days, removed {counts['chunks_deleted']}, "
+                    f"{counts['chunks_unchanged']} unchanged"
+                )
+            }
+        
+        return {
+            'status': 'created',
+            **counts,
+            'message': f"Successfully created {counts['chunks_created']} embeddings"
+        }
+    
+    @staticmethod
+    def _in_progress(progress: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            'status': 'in_progress',
+            'chunks_created': progress['chunks_written'] if progress else 0,
+            'message': 'Embedding generation is already running'
+        }
+    
+    def _stream_embeddings(self, backtest_id: UUID, incremental: bool) -> Dict[str, int]:
+        """
+        Stream daily trade aggregates, summarize each day, and upsert in batches
+        
+        Postgres groups the trades by day (see `_daily_summaries`), so only
+        one row per day reaches Python, read through a server-side cursor.
+        Every EMBEDDING_UPSERT_BATCH chunks are encoded and upserted, so
+        memory is bounded by one batch and the collection fills while the
+        run is in progress.
+        
+        Chunk ids are stable per day and chunk type, and each chunk records
+        a hash of its day's trades. In incremental mode a day whose hash
+        matches the stored chunk is skipped without encoding. In either mode,
+        chunks of days that no longer have trades are deleted.
+        
+        Args:
+            backtest_id: Backtest to embed
+            incremental: Skip days whose trades are unchanged
+        
+        Returns:
+            chunks_created (written this run), chunks_unchanged and chunks_deleted
+        """
         from ..models.database import Trade
         
-        trades = self.db.query(Trade).filter(
+        total = self.db.query(func.count(Trade.id)).filter(
             Trade.backtest_id == backtest_id
-        ).all()
+        ).scalar()
         
-        if not trades:
+        if not total:
             raise ValueError(f"No trades found for backtest {backtest_id}")
         
-        logger.info(f"Found {len(trades)} trades")
-        
-        # Convert to dictionaries
-        trade_dicts = [
-            {
-                'open_time': t.open_time,
-                'close_time': t.close_time,
-                'symbol': t.symbol,
-                'direction': t.direction,
-                'profit': float(t.profit) if t.profit else 0,
-                'pips': float(t.pips) if t.pips else 0,
-                'entry_price': float(t.entry_price) if t.entry_price else 0,
-                'exit_price': float(t.exit_price) if t.exit_price else 0,
+        # Content hashes of the chunks already stored, by id
+        stored: Dict[str, Optional[str]] = {}
+        if self.chromadb_service.collection_exists(backtest_id):
+            stored = {
+                chunk_id: (metadata or {}).get('content_hash')
+                for chunk_id, metadata in self.chromadb_service.get_metadatas(backtest_id).items()
             }
-            for t in trades
-        ]
         
-        # Create chunks
-        chunks = self.embedding_service.create_trade_chunks(trade_dicts)
+        logger.info(
+            f"Streaming daily summaries of {total} trades for backtest {backtest_id} "
+            f"({'incremental' if incremental else 'full'}, {len(stored)} chunks stored)"
+        )
+        _update_progress(backtest_id, trades_total=total)
         
-        # Generate embeddings
+        seen = set()
+        written = unchanged = processed = 0
+        batch: List[Dict[str, Any]] = []
+        
+        for row in self._daily_summaries(backtest_id):
+            summary = self._summary_dict(row)
+            processed += summary['total_trades']
+            
+            chunk = self.embedding_service.create_daily_chunk(summary)
+            chunk['id'] = chunk_id(backtest_id, chunk['metadata'])
+            seen.add(chunk['id'])
+            
+            if incremental and stored.get(chunk['id']) == summary['content_hash']:
+                unchanged += 1
+                continue
+            
+            batch.append(chunk)
+            if len(batch) >= settings.EMBEDDING_UPSERT_BATCH:
+                written += self._upsert_chunks(backtest_id, batch)
+                batch = []
+                _update_progress(
+                    backtest_id,
+                    trades_processed=processed,
+                    chunks_written=written,
+                    chunks_unchanged=unchanged
+                )
+        
+        if batch:
+            written += self._upsert_chunks(backtest_id, batch)
+        
+        # Days without trades any more, and chunks stored under older id schemes
+        deleted = self.chromadb_service.delete_embeddings(
+            backtest_id,
+            [stored_id for stored_id in stored if stored_id not in seen]
+        )
+        
+        _update_progress(
+            backtest_id,
+            trades_processed=processed,
+            chunks_written=written,
+            chunks_unchanged=unchanged,
+            chunks_deleted=deleted
+        )
+        
+        logger.info(
+            f"Embedded {processed} trades for backtest {backtest_id}: "
+            f"{written} chunks written, {unchanged} unchanged, {deleted} deleted"
+        )
+        return {
+            'chunks_created': written,
+            'chunks_unchanged': unchanged,
+            'chunks_deleted': deleted
+        }
+    
+    def _daily_summaries(self, backtest_id: UUID):
+        """
+        Per-day trade aggregates of a backtest, ordered by day
+        
+        One GROUP BY date_trunc('day', open_time) query computes what the
+        daily summary text needs. A missing profit counts as 0. Best and worst
+        trade ties go to the earliest trade. `content_hash` is an md5 over the
+        day's trade ids, open times, symbols and profits, so it changes
+        whenever a trade of that day is added, removed or edited.
+        """
+        from ..models.database import Trade
+        
+        day = func.date_trunc('day', Trade.open_time).label('day')
+        profit = func.coalesce(Trade.profit, 0)
+        
+        return self.db.query(
+            day,
+            func.count().label('total_trades'),
+            func.count().filter(profit > 0).label('winning_trades'),
+            func.sum(profit).label('net_profit'),
+            func.avg(profit).label('avg_profit'),
+            array_agg(aggregate_order_by(distinct(Trade.symbol), Trade.symbol)).label('symbols'),
+            array_agg(aggregate_order_by(Trade.symbol, profit.desc(), Trade.open_time))[1].label('best_symbol'),
+            func.max(profit).label('best_profit'),
+            array_agg(aggregate_order_by(Trade.symbol, profit.asc(), Trade.open_time))[1].label('worst_symbol'),
+            func.min(profit).label('worst_profit'),
+            func.md5(func.string_agg(
+                func.concat_ws(':', Trade.id, Trade.open_time, Trade.symbol, Trade.profit),
+                aggregate_order_by(literal_column("','"), Trade.id)
+            )).label('content_hash')
+        ).filter(
+            Trade.backtest_id == backtest_id
+        ).group_by(day).order_by(day).yield_per(settings.EMBEDDING_STREAM_ROWS)
+    
+    def _upsert_chunks(self, backtest_id: UUID, chunks: List[Dict[str, Any]]) -> int:
+        """Encode a batch of chunks and upsert it under the chunks' ids"""
         texts = [chunk['text'] for chunk in chunks]
         embeddings = self.embedding_service.generate_embeddings_batch(texts)
         
-        # Prepare data for ChromaDB
-        ids = [f"{backtest_id}_{i}" for i in range(len(chunks))]
         metadatas = [
             {**chunk['metadata'], 'backtest_id': str(backtest_id)}
             for chunk in chunks
         ]
         
-        # Store in ChromaDB
-        count = self.chromadb_service.add_embeddings(
+        return self.chromadb_service.upsert_embeddings(
             backtest_id=backtest_id,
             embeddings=embeddings,
             documents=texts,
             metadatas=metadatas,
-            ids=ids
+            ids=[chunk['id'] for chunk in chunks]
         )
-        
+    
+    @staticmethod
+    def _summary_dict(row) -> Dict[str, Any]:
+        """Daily aggregate row as the dict the chunker expects"""
         return {
-            'status': 'created',
-            'chunks_created': count,
-            'message': f'Successfully created {count} embeddings'
+            'date': row.day.date(),
+            'total_trades': row.total_trades,
+            'winning_trades': row.winning_trades,
+            'net_profit': float(row.net_profit),
+            'avg_profit': float(row.avg_profit),
+            'symbols': list(row.symbols),
+            'best_symbol': row.best_symbol,
+            'best_profit': float(row.best_profit),
+            'worst_symbol': row.worst_symbol,
+            'worst_profit': float(row.worst_profit),
+            'content_hash': row.content_hash
         }
     
     async def query(
@@ -110,8 +471,8 @@ class RAGService:
         
         logger.info(f"Processing query: {query}")
         
-        # Generate query embedding
-        query_embedding = self.embedding_service.generate_embedding(query)
+        # Generate query embedding (micro-batched with concurrent queries, off the event loop)
+        query_embedding = await get_embedding_batcher().embed(query)
         
         # Search ChromaDB
         if backtest_id:
@@ -172,7 +533,7 @@ Please provide a detailed, data-driven answer based on the contexts above. Inclu
 
 
 Answer:"""
-        
+
         # Call Ollama API
         ollama_url = f"http://{settings.OLLAMA_HOST}:{settings.OLLAMA_PORT}/api/generate"
         
@@ -0,0 +1,96 @@
+import asyncio
+import time
+import numpy as np
+import pytest
+
+from src.services.embedding_batcher import EmbeddingBatcher
+
+
+class FakeEncoder:
+    """Encodes each text as [len(text), call number]; records batch sizes"""
+    
+    def __init__(self, delay=0.0, fail_on=None):
+        self.delay = delay
+        self.fail_on = fail_on
+        self.batches = []
+    
+    def __call__(self, texts):
+        self.batches.append(len(texts))
+        time.sleep(self.delay)
+        if self.fail_on is not None and self.fail_on in texts:
+            raise ValueError(f"cannot encode {self.fail_on}")
+        return np.array([[len(text), len(self.batches)] for text in texts], dtype=np.float32)
+
+
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_model_calls():
+    """100 concurrent requests with a 20 ms encode take 4 calls of at most 32 texts"""
+    encoder = FakeEncoder(delay=0.02)
+    batcher = EmbeddingBatcher(encoder, max_batch_size=32, max_wait_ms=5)
+    
+    texts = ['x' * i for i in range(100)]
+    vectors = await asyncio.gather(*(batcher.embed(text) for text in texts))
+    await batcher.close()
+    
+    assert encoder.batches == [32, 32, 32, 4]
+    
+    # Every caller gets the vector of its own text
+    assert [vector[0] for vector in vectors] == [float(len(text)) for text in texts]
+
+
+
+
+@pytest.mark.asyncio
+async def test_lone_request_waits_at_most_max_wait():
+    encoder = FakeEncoder()
+    batcher = EmbeddingBatcher(encoder, max_batch_size=32, max_wait_ms=20)
+    
+    start = time.perf_counter()
+    vector = await batcher.embed('alone')
+    elapsed = time.perf_counter() - start
+    await batcher.close()
+    
+    assert vector == [5.0, 1.0]
+    assert encoder.batches == [1]
+    assert elapsed < 0.5
+
+
+
+
+@pytest.mark.asyncio
+async def test_encode_errors_reach_every_caller_in_the_batch():
+    encoder = FakeEncoder(fail_on='bad')
+    batcher = EmbeddingBatcher(encoder, max_batch_size=8, max_wait_ms=5)
+    
+    results = await asyncio.gather(
+        *(batcher.embed(text) for text in ['good', 'bad', 'fine']),
+        return_exceptions=True
+    )
+    
+    assert all(isinstance(result, ValueError) for result in results)
+    
+    # The batcher keeps serving after a failed batch
+    assert await batcher.embed('after') == [5.0, 2.0]
+    await batcher.close()
+
+
+
+
+@pytest.mark.asyncio
+async def test_cancelled_callers_do_not_break_the_batch():
+    encoder = FakeEncoder(delay=0.02)
+    batcher = EmbeddingBatcher(encoder, max_batch_size=8, max_wait_ms=5)
+    
+    cancelled = asyncio.ensure_future(batcher.embed('cancelled'))
+    kept = asyncio.ensure_future(batcher.embed('kept'))
+    await asyncio.sleep(0.01)  # batch collected, encode running
+    cancelled.cancel()
+    
+    assert await kept == [4.0, 1.0]
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    
+    assert await batcher.embed('next') == [4.0, 2.0]
+    await batcher.close()
@@ -0,0 +1,128 @@
+import numpy as np
+
+from src.services.embedding_cache import EmbeddingCache, open_embedding_cache
+
+
+MODEL = 'all-MiniLM-L6-v2'
+
+
+
+
+def vector(seed, dim=8):
+    return np.random.default_rng(seed).random(dim).astype(np.float32)
+
+
+
+
+def test_hits_and_misses(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / 'cache.db'), MODEL)
+    keys = [cache.key(text) for text in ['alpha', 'beta', 'gamma']]
+    
+    assert cache.get_many(keys) == {}
+    
+    cache.put_many({keys[0]: vector(0), keys[1]: vector(1)})
+    found = cache.get_many(keys)
+    
+    assert set(found) == set(keys[:2])
+    assert np.array_equal(found[keys[0]], vector(0))
+    assert found[keys[1]].dtype == np.float32
+    assert len(cache) == 2
+
+
+
+
+def test_lookups_over_sqlite_variable_limit(tmp_path):
+    """More keys than SQLite accepts in one statement are looked up in batches"""
+    cache = EmbeddingCache(str(tmp_path / 'cache.db'), MODEL)
+    keys = [cache.key(f"chunk {i}") for i in range(2500)]
+    cache.put_many({key: np.full(4, i, dtype=np.float32) for i, key in enumerate(keys[::2])})
+    
+    found = cache.get_many(keys)
+    
+    assert len(found) == 1250
+    assert all(found[key][0] == i for i, key in enumerate(keys[::2]))
+    assert not any(key in found for key in keys[1::2])
+
+
+
+
+def test_models_do_not_share_vectors(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    first = EmbeddingCache(path, MODEL)
+    second = EmbeddingCache(path, 'all-mpnet-base-v2')
+    
+    assert first.key('same text') != second.key('same text')
+    
+    first.put_many({first.key('same text'): vector(0)})
+    assert second.get_many([second.key('same text')]) == {}
+
+
+
+
+def test_vectors_survive_reopening(tmp_path):
+    path = str(tmp_path / 'nested' / 'cache.db')
+    cache = EmbeddingCache(path, MODEL)
+    cache.put_many({cache.key('alpha'): vector(0)})
+    cache.close()
+    
+    reopened = EmbeddingCache(path, MODEL)
+    assert np.array_equal(reopened.get_many([reopened.key('alpha')])[reopened.key('alpha')], vector(0))
+
+
+
+
+def test_unusable_path_disables_cache(tmp_path):
+    blocker = tmp_path / 'file'
+    blocker.write_text('not a directory')
+    
+    assert open_embedding_cache('', MODEL) is None
+    assert open_embedding_cache(str(blocker / 'cache.db'), MODEL) is None
+
+
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / 'cache.db'), MODEL, max_entries=3)
+    a, b, c, d, e = [cache.key(text) for text in 'abcde']
+    
+    cache.put_many({a: vector(0), b: vector(1), c: vector(2)})
+    cache.get_many([a])  # a is now more recent than b and c
+    cache.put_many({d: vector(3)})
+    
+    assert len(cache) == 3
+    assert set(cache.get_many([a, b, c, d])) == {a, c, d}
+    
+    # Use order survives reopening: c is now the least recently used
+    cache.get_many([d])
+    cache.get_many([a])
+    cache.close()
+    reopened = EmbeddingCache(str(tmp_path / 'cache.db'), MODEL, max_entries=3)
+    reopened.put_many({e: vector(4)})
+    assert set(reopened.get_many([a, b, c, d, e])) == {a, d, e}
+
+
+
+
+def test_cache_without_use_stamps_is_upgraded(tmp_path):
+    """Files written before eviction existed gain last_used and are evicted first"""
+    import sqlite3
+    
+    path = str(tmp_path / 'cache.db')
+    legacy = EmbeddingCache(path, MODEL)
+    old = legacy.key('old')
+    legacy.close()
+    
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE embeddings")
+    conn.execute("CREATE TABLE embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+    conn.execute("INSERT INTO embeddings VALUES (?, ?)", (old, vector(0).tobytes()))
+    conn.commit()
+    conn.close()
+    
+    cache = EmbeddingCache(path, MODEL, max_entries=2)
+    assert len(cache) == 1
+    
+    first, second = cache.key('first'), cache.key('second')
+    cache.put_many({first: vector(1)})
+    cache.put_many({second: vector(2)})
+    assert set(cache.get_many([old, first, second])) == {first, second}
@@ -0,0 +1,57 @@
+import os
+import numpy as np
+import pytest
+
+
+TEXTS = [
+    "warm-up",
+    "What days should I avoid trading?",
+    "Worst trade: EURUSD $-120.00 on a losing day"
+]
+
+
+
+
+@pytest.fixture(scope='module')
+def tiny_model(tmp_path_factory):
+    """Small randomly initialized BERT sentence-transformer (no download)"""
+    torch = pytest.importorskip('torch')
+    pytest.importorskip('onnxruntime')
+    transformers = pytest.importorskip('transformers')
+    st = pytest.importorskip('sentence_transformers')
+    
+    directory = str(tmp_path_factory.mktemp('bert'))
+    chars = "abcdefghijklmnopqrstuvwxyz0123456789-:?$.,"
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + list(chars) + [f"##{c}" for c in chars]
+    with open(os.path.join(directory, 'vocab.txt'), 'w') as f:
+        f.write("\n".join(vocab))
+    transformers.BertTokenizerFast(os.path.join(directory, 'vocab.txt')).save_pretrained(directory)
+    
+    torch.manual_seed(0)
+    config = transformers.BertConfig(
+        vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2,
+        num_attention_heads=2, intermediate_size=64, type_vocab_size=2
+    )
+    transformers.BertModel(config).save_pretrained(directory)
+    
+    return st.SentenceTransformer(modules=[
+        st.models.Transformer(directory),
+        st.models.Pooling(32, 'mean'),
+        st.models.Normalize()
+    ])
+
+
+
+
+def test_onnx_export_matches_pytorch(tiny_model, tmp_path):
+    """Inputs reach the exported graph under the right names (token types are not swapped with the mask)"""
+    from src.services.onnx_embedder import EXPORT_VERSION, OnnxEmbedder, cosine_parity
+    
+    embedder = OnnxEmbedder(tiny_model, 'tiny/bert', str(tmp_path), quantize=False, threads=1)
+    
+    assert embedder.input_names == ['input_ids', 'attention_mask', 'token_type_ids']
+    assert os.path.exists(tmp_path / f"tiny__bert.v{EXPORT_VERSION}.onnx")
+    
+    parity = cosine_parity(tiny_model.encode(TEXTS), embedder.encode(TEXTS))
+    assert parity['min_cosine'] > 0.9999
+    assert np.allclose(embedder.encode(TEXTS[1]), tiny_model.encode(TEXTS[1]), atol=1e-4)
@@ -0,0 +1,270 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from uuid import uuid4
+import random
+import threading
+import numpy as np
+import pytest
+
+pytest.importorskip('sentence_transformers')
+pytest.importorskip('chromadb')
+
+from src.config import settings
+from src.models.database import EmbeddingRun, Trade
+from src.services import rag_service
+from src.services.chromadb_service import ChromaDBService
+from src.services.embedding_service import EmbeddingService
+from src.services.rag_service import EmbeddingRunLost, INTERRUPTED, RAGService, embedding_progress
+
+
+
+
+def claim_concurrently(backtest_id, workers=4):
+    """Claim one backtest from several threads released at once"""
+    barrier = threading.Barrier(workers)
+    
+    def claim(_):
+        barrier.wait()
+        return rag_service._claim_run(backtest_id)
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(claim, range(workers)))
+
+
+
+
+def age_run(session_factory, backtest_id, seconds):
+    with session_factory() as db:
+        db.query(EmbeddingRun).filter(EmbeddingRun.backtest_id == backtest_id).update(
+            {'updated_at': datetime.utcnow() - timedelta(seconds=seconds)}, synchronize_session=False
+        )
+        db.commit()
+
+
+
+
+def test_concurrent_claims_start_one_run(session_factory):
+    backtest_id = uuid4()
+    
+    # First run of a backtest: the insert races
+    assert sorted(claim_concurrently(backtest_id)) == [False, False, False, True]
+    
+    # A running, heartbeating run cannot be claimed
+    assert not rag_service._claim_run(backtest_id)
+    
+    # A finished run is restarted by exactly one claimant
+    assert rag_service._update_run(backtest_id, status='completed', finished_at=datetime.utcnow())
+    assert sorted(claim_concurrently(backtest_id)) == [False, False, False, True]
+
+
+
+
+def test_stale_run_is_reported_failed_and_reclaimed(session_factory, monkeypatch):
+    backtest_id = uuid4()
+    monkeypatch.setattr(rag_service, 'WORKER_ID', 'dead-pod')
+    assert rag_service._claim_run(backtest_id)
+    age_run(session_factory, backtest_id, settings.EMBEDDING_RUN_STALE_AFTER + 60)
+    
+    with session_factory() as db:
+        progress = embedding_progress(db, backtest_id)
+    assert progress['status'] == 'failed'
+    assert progress['error'] == INTERRUPTED
+    
+    monkeypatch.setattr(rag_service, 'WORKER_ID', 'new-pod')
+    assert rag_service._claim_run(backtest_id)
+    
+    # The old worker's writes no longer match the row
+    monkeypatch.setattr(rag_service, 'WORKER_ID', 'dead-pod')
+    with pytest.raises(EmbeddingRunLost):
+        rag_service._update_progress(backtest_id, trades_processed=10)
+    
+    with session_factory() as db:
+        run = db.query(EmbeddingRun).filter(EmbeddingRun.backtest_id == backtest_id).one()
+        assert run.worker_id == 'new-pod'
+        assert run.status == 'running'
+        assert run.trades_processed == 0
+
+
+
+
+def test_progress_is_read_from_the_run_row(session_factory):
+    backtest_id = uuid4()
+    
+    with session_factory() as db:
+        assert embedding_progress(db, backtest_id) is None
+        
+        assert rag_service._claim_run(backtest_id)
+        rag_service._update_progress(backtest_id, trades_total=500)
+        rag_service._update_progress(backtest_id, trades_processed=200, chunks_written=64)
+        
+        # Same session as an earlier read, as in a status request
+        progress = embedding_progress(db, backtest_id)
+        assert progress['status'] == 'running'
+        assert (progress['trades_total'], progress['trades_processed'], progress['chunks_written']) == (500, 200, 64)
+        assert progress['finished_at'] is None
+        
+        rag_service._update_run(backtest_id, status='completed', finished_at=datetime.utcnow())
+        progress = embedding_progress(db, backtest_id)
+        assert progress['status'] == 'completed'
+        assert progress['finished_at'] is not None
+
+
+
+
+
+SYMBOLS = ['EURUSD', 'GBPUSD', 'USDJPY', 'XAUUSD']
+
+
+
+
+class RecordingModel:
+    """Stands in for the sentence-transformer; records the texts it encodes"""
+    
+    def __init__(self):
+        self.encoded = []
+    
+    def encode(self, texts, **kwargs):
+        self.encoded.extend(texts)
+        return np.array([[float(len(text)), 1.0] for text in texts])
+
+
+
+
+@pytest.fixture
+def service(session_factory, monkeypatch):
+    """RAGService on the test database, an in-memory ChromaDB and a recording model"""
+    import chromadb
+    
+    embedding_service = EmbeddingService.__new__(EmbeddingService)
+    embedding_service.model = RecordingModel()
+    embedding_service.cache = None
+    
+    chromadb_service = ChromaDBService.__new__(ChromaDBService)
+    chromadb_service.client = chromadb.EphemeralClient()
+    
+    monkeypatch.setattr(rag_service, 'get_embedding_service', lambda: embedding_service)
+    monkeypatch.setattr(rag_service, 'get_chromadb_service', lambda: chromadb_service)
+    
+    with session_factory() as db:
+        yield RAGService(db)
+    
+    for collection in chromadb_service.client.list_collections():
+        chromadb_service.client.delete_collection(collection.name)
+
+
+
+
+def add_trades(db, backtest_id, trades):
+    db.add_all(Trade(backtest_id=backtest_id, direction='BUY', **trade) for trade in trades)
+    db.commit()
+
+
+
+
+def random_trades(days=6, seed=3):
+    """Several trades a day, with missing profits and tied best/worst trades"""
+    rng = random.Random(seed)
+    trades = []
+    for day in range(days):
+        for i in range(rng.randint(1, 8)):
+            profit = rng.choice([None, -50.0, 0.0, 25.5, 50.0, round(rng.uniform(-100, 100), 2)])
+            trades.append({
+                'open_time': datetime(2024, 3, 4 + day, 1 + i, rng.randint(0, 59)),
+                'symbol': rng.choice(SYMBOLS),
+                'profit': profit
+            })
+    return trades
+
+
+
+
+def loop_summaries(trades):
+    """Per-day aggregates as the former Python loop computed them (trades in open-time order)"""
+    days = defaultdict(list)
+    for trade in sorted(trades, key=lambda trade: trade['open_time']):
+        days[trade['open_time'].date()].append({**trade, 'profit': trade['profit'] or 0})
+    
+    summaries = []
+    for date, day in sorted(days.items()):
+        best = max(day, key=lambda trade: trade['profit'])
+        worst = min(day, key=lambda trade: trade['profit'])
+        total = sum(trade['profit'] for trade in day)
+        summaries.append({
+            'date': date,
+            'total_trades': len(day),
+            'winning_trades': sum(1 for trade in day if trade['profit'] > 0),
+            'net_profit': total,
+            'avg_profit': total / len(day),
+            'symbols': sorted(set(trade['symbol'] for trade in day)),
+            'best_symbol': best['symbol'],
+            'best_profit': best['profit'],
+            'worst_symbol': worst['symbol'],
+            'worst_profit': worst['profit']
+        })
+    return summaries
+
+
+
+
+def test_daily_summaries_match_the_python_loop(service):
+    backtest_id = uuid4()
+    trades = random_trades()
+    add_trades(service.db, backtest_id, trades)
+    add_trades(service.db, uuid4(), random_trades(seed=4))  # another backtest
+    
+    summaries = [service._summary_dict(row) for row in service._daily_summaries(backtest_id)]
+    
+    for summary in summaries:
+        assert len(summary.pop('content_hash')) == 32
+    assert [summary['date'] for summary in summaries] == [expected['date'] for expected in loop_summaries(trades)]
+    for summary, expected in zip(summaries, loop_summaries(trades)):
+        assert summary == pytest.approx(expected)
+
+
+
+
+@pytest.mark.asyncio
+async def test_incremental_run_re_embeds_only_changed_days(service):
+    backtest_id = uuid4()
+    add_trades(service.db, backtest_id, random_trades(days=5))
+    model = service.embedding_service.model
+    chromadb_service = service.chromadb_service
+    
+    first = await service.generate_embeddings_for_backtest(backtest_id)
+    dates = [f"2024-03-0{4 + day}" for day in range(5)]
+    
+    assert first['chunks_created'] == 5
+    assert sorted(chromadb_service.get_metadatas(backtest_id)) == [
+        f"{backtest_id}_{date}_daily_summary" for date in dates
+    ]
+    
+    # Edit a trade of the second day, remove every trade of the last day
+    service.db.query(Trade).filter(
+        Trade.backtest_id == backtest_id,
+        Trade.open_time >= datetime(2024, 3, 5),
+        Trade.open_time < datetime(2024, 3, 6)
+    ).limit(1).one().profit = 12345
+    service.db.query(Trade).filter(
+        Trade.backtest_id == backtest_id,
+        Trade.open_time >= datetime(2024, 3, 8)
+    ).delete(synchronize_session=False)
+    service.db.commit()
+    model.encoded.clear()
+    
+    second = await service.generate_embeddings_for_backtest(backtest_id, incremental=True)
+    
+    assert second['status'] == 'updated'
+    assert (second['chunks_created'], second['chunks_unchanged'], second['chunks_deleted']) == (1, 3, 1)
+    assert len(model.encoded) == 1
+    assert model.encoded[0].startswith('Trading Summary for 2024-03-05')
+    assert '$12345.00' in model.encoded[0]
+    
+    metadatas = chromadb_service.get_metadatas(backtest_id)
+    assert sorted(metadatas) == [f"{backtest_id}_{date}_daily_summary" for date in dates[:4]]
+    
+    # Nothing changed since: no encodes, nothing deleted
+    model.encoded.clear()
+    third = await service.generate_embeddings_for_backtest(backtest_id, incremental=True)
+    assert (third['chunks_created'], third['chunks_unchanged'], third['chunks_deleted']) == (0, 4, 0)
+    assert model.encoded == []
@@ -28,6 +28,8 @@ echo -e "${YELLOW}Step 2: Creating database schema${NC}"
 POSTGRES_POD=$(kubectl get pod -n databases -l app=postgres -o jsonpath='{.items[0].metadata.name}')
 
 kubectl exec -n databases $POSTGRES_POD -- psql -U trading_user -d trading_db < applications/data-pipeline/schema/001_initial_schema.sql
+kubectl exec -i -n databases $POSTGRES_POD -- psql -U trading_user -d trading_db < applications/data-pipeline/schema/002_ml_optimization_job_columns.sql
+kubectl exec -i -n databases $POSTGRES_POD -- psql -U trading_user -d trading_db < applications/data-pipeline/schema/003_ml_evaluation_cache_columns.sql
 
 echo -e "${GREEN}✓ Database schema created${NC}"
 echo ""
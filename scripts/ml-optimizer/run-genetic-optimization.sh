@@ -61,6 +61,26 @@ if [ "$OPTIMIZATION_ID" != "null" ]; then
     echo -e "${GREEN}✅ Genetic optimization started!${NC}"
     echo ""
     echo "Optimization ID: $OPTIMIZATION_ID"
+    echo ""
+    
+    # Poll the background job until it finishes
+    STATUS="pending"
+    while [ "$STATUS" == "pending" ] || [ "$STATUS" == "running" ]; do
+        sleep 10
+        STATUS_RESPONSE=$(curl -s http://localhost:30804/api/v1/optimize/$OPTIMIZATION_ID/status)
+        STATUS=$(echo $STATUS_RESPONSE | jq -r '.status')
+        PROGRESS=$(echo $STATUS_RESPONSE | jq -r '.progress_percent')
+        echo -e "${YELLOW}Status:${NC} $STATUS ($PROGRESS%)"
+    done
+    
+    if [ "$STATUS" != "completed" ]; then
+        echo -e "${RED}❌ Optimization $STATUS${NC}"
+        echo $STATUS_RESPONSE | jq -r '.error_message // empty'
+        exit 1
+    fi
+    
+    RESPONSE=$(curl -s http://localhost:30804/api/v1/optimize/$OPTIMIZATION_ID/results)
+    
     echo ""
     echo -e "${BLUE}Pareto Front (Trade-off Solutions):${NC}"
     echo $RESPONSE | jq -r '.pareto_front[] | "Rank \(.rank): SL=\(.parameters.stop_loss), TP=\(.parameters.take_profit) → Profit: $\(.objectives.net_profit), DD: \(.objectives.max_drawdown)%"' | head -10